@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Compare the per-object, per-day astropy AltAz transforms the star and
+exoplanet generators used to run with their single broadcast transform.
+
+Coordinates come from the star and exoplanet caches when they exist,
+otherwise a fixed random sample of the same size is used. Both variants are
+timed and the batched output is checked against the per-day output at the
+rounding stored in the JSON caches.
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import altazgrid  # noqa: E402
+import striker  # noqa: E402
+from astropy import units as u  # noqa: E402
+from astropy.coordinates import AltAz, SkyCoord  # noqa: E402
+from astropy.time import Time  # noqa: E402
+
+# Catalog sizes used when no cache is available
+SAMPLE_SIZES = {"stars": 18, "exoplanets": 36}
+
+
+#
+#
+#
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(
+        name.replace("-", "_"), os.path.join(SRC_DIR, f"{name}.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+#
+# {name: (ra_deg, dec_deg)} from a cache, or a seeded random sample.
+#
+def load_coordinates(filename, count):
+    try:
+        entries = striker.get_cache_entries(striker.load_json(filename))
+        coordinates = {
+            name: (entry["ra_deg"], entry["dec_deg"])
+            for name, entry in entries.items()
+            if "ra_deg" in entry
+        }
+        if coordinates:
+            return coordinates
+    except (FileNotFoundError, ValueError):
+        pass
+    rng = random.Random(42)
+    return {
+        f"object {i}": (rng.uniform(0, 360), rng.uniform(-30, 90)) for i in range(count)
+    }
+
+
+#
+# The original star loop: one transform per star per day.
+#
+def stars_per_day(module, coordinates, dates, site):
+    location = altazgrid.get_locations([site])[0, 0, 0]
+    results = {}
+    for name, (ra, dec) in coordinates.items():
+        coord = SkyCoord(ra=ra * u.deg, dec=dec * u.deg)
+        daily = {}
+        for dt in dates:
+            t = Time(dt.isoformat() + " 00:00:00")
+            altaz = coord.transform_to(AltAz(obstime=t, location=location))
+            daily[dt.isoformat()] = {
+                "azimuth_deg": round(altaz.az.deg, 2),
+                "altitude_deg": round(altaz.alt.deg, 2),
+            }
+        results[name] = daily
+    return results
+
+
+#
+#
+#
+def stars_batched(module, coordinates, dates, site):
+    stars = {
+        name: {"ra_deg": ra, "dec_deg": dec, "daily_positions": {}}
+        for name, (ra, dec) in coordinates.items()
+    }
+    module.compute_daily_positions({site["name"]: stars}, [site], dates)
+    return {name: star["daily_positions"] for name, star in stars.items()}
+
+
+#
+# The original exoplanet loop: one transform per world per day.
+#
+def exoplanets_per_day(module, coordinates, dates, site):
+    location = altazgrid.get_locations([site])[0, 0, 0]
+    results = {}
+    for name, (ra, dec) in coordinates.items():
+        coord = SkyCoord(ra=ra * u.deg, dec=dec * u.deg)
+        observations = []
+        for dt in dates:
+            t = Time(dt.isoformat() + " 00:00:00")
+            altaz = coord.transform_to(AltAz(obstime=t, location=location))
+            observations.append(
+                {
+                    "date": dt.isoformat(),
+                    "azimuth_deg": round(altaz.az.deg, 2),
+                    "altitude_deg": round(altaz.alt.deg, 2),
+                }
+            )
+        results[name] = observations
+    return results
+
+
+#
+#
+#
+def exoplanets_batched(module, coordinates, dates, site):
+    worlds = {
+        name: {"ra_deg": ra, "dec_deg": dec, "observations": []}
+        for name, (ra, dec) in coordinates.items()
+    }
+    module.compute_observations({site["name"]: worlds}, [site], dates)
+    return {name: world["observations"] for name, world in worlds.items()}
+
+
+#
+# Best wall time over `repeat` runs and the output of the last run.
+#
+def time_call(function, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+
+#
+# Yield (path, expected, actual) for every leaf that differs.
+#
+def diff_values(expected, actual, path=""):
+    if isinstance(expected, dict):
+        for key in expected:
+            yield from diff_values(expected[key], actual.get(key), f"{path}/{key}")
+    elif isinstance(expected, list):
+        for i, item in enumerate(expected):
+            yield from diff_values(item, actual[i], f"{path}[{i}]")
+    elif expected != actual:
+        yield path, expected, actual
+
+
+#
+#
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=90, help="days to sample")
+    parser.add_argument("--repeat", type=int, default=1, help="timing repetitions")
+    args = parser.parse_args()
+
+    today = datetime.utcnow().date()
+    site = striker.load_observer_sites()[0]
+    catalogs = (
+        (
+            "stars",
+            load_script("get-star-data"),
+            striker.FILE_STAR_DATA,
+            [today + timedelta(days=i) for i in range(args.days)],
+            stars_per_day,
+            stars_batched,
+        ),
+        (
+            "exoplanets",
+            load_script("get-exoplanet-data"),
+            striker.FILE_EXOPLANET_DATA,
+            [today + timedelta(days=i) for i in range(args.days)],
+            exoplanets_per_day,
+            exoplanets_batched,
+        ),
+    )
+
+    failed = False
+    for label, module, filename, dates, per_day, batched in catalogs:
+        coordinates = load_coordinates(filename, SAMPLE_SIZES[label])
+        per_day_time, expected = time_call(
+            lambda: per_day(module, coordinates, dates, site), args.repeat
+        )
+        batched_time, actual = time_call(
+            lambda: batched(module, coordinates, dates, site), args.repeat
+        )
+        differences = list(diff_values(expected, actual))
+        failed = failed or bool(differences)
+
+        print(f"{label:<11} {len(coordinates)} objects x {len(dates)} days")
+        print(f"  per day    {per_day_time * 1000:9.1f} ms")
+        print(f"  batched    {batched_time * 1000:9.1f} ms")
+        print(f"  speedup    {per_day_time / batched_time:9.1f}x")
+        print(f"  mismatches {len(differences)}")
+        for path, value, other in differences[:10]:
+            print(f"    {path}: {value} != {other}")
+
+    sys.exit(1 if failed else 0)
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Render the disks panel against mounts that are slow, hang or fail.
+
+psutil.disk_usage is replaced by a stand-in where every NAS volume (NFS) takes
+a fixed delay and one of them can be made to hang. The volumes must be sampled
+concurrently, the local root on every render and the NAS usage reused within
+CONKY_DISK_RESAMPLE. A hung volume must show its cached usage flagged stale at
+the deadline, without another worker while the first still hangs and without
+waiting for it, and its late sample must be picked up, stamped with the time it
+returned. Last, the I/O line must leave out the member disks of md arrays.
+"""
+
+import argparse
+import collections
+import os
+import sys
+import tempfile
+import threading
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+MOUNTPOINTS = ["/", "/mnt/nas/volume1", "/mnt/nas/volume2", "/mnt/nas/volume3"]
+DELAY_SECONDS = 0.2
+DEADLINE_SECONDS = 0.5
+
+Usage = collections.namedtuple("Usage", "total used free percent")
+Partition = collections.namedtuple("Partition", "device mountpoint fstype opts")
+IO = collections.namedtuple("IO", "read_bytes write_bytes")
+
+# /sys/block of a host with md0 on two partitions, md1 on two whole disks
+BLOCK_DEVICES = ["sda", "sdb", "sdc", "sdd", "sde", "md0", "md1", "nvme0n1", "loop0"]
+PARTITIONS = ["sda1", "sdb1", "sde1"]
+RAID_MEMBERS = {"md0": ["sda1", "sdb1"], "md1": ["sdc", "sdd"]}
+
+
+#
+# Stand-in for psutil.disk_usage: NAS volumes take DELAY_SECONDS, `hung` ones
+# wait for `release`, `failing` ones raise.
+#
+class FakeDisks:
+    def __init__(self):
+        self.calls = collections.Counter()
+        self.hung = set()
+        self.failing = set()
+        self.release = threading.Event()
+        self.used = 100 * 1024**3
+
+    def disk_usage(self, mountpoint):
+        self.calls[mountpoint] += 1
+        if mountpoint.startswith("/mnt/nas"):
+            time.sleep(DELAY_SECONDS)
+        if mountpoint in self.hung:
+            self.release.wait()
+        if mountpoint in self.failing:
+            raise OSError(f"[Errno 5] Input/output error: '{mountpoint}'")
+        return Usage(1000 * 1024**3, self.used, 0, self.used / (1000 * 1024**3) * 100)
+
+    def disk_partitions(self, all=False):
+        return [
+            Partition(
+                "server:" + mountpoint if mountpoint != "/" else "/dev/sda1",
+                mountpoint,
+                "ext4" if mountpoint == "/" else "nfs4",
+                "rw",
+            )
+            for mountpoint in MOUNTPOINTS
+        ]
+
+
+#
+# Write a /sys/block tree of BLOCK_DEVICES under `root`, the devices linked
+# from their own directories as in sysfs.
+#
+def build_sys_block(root):
+    devices = os.path.join(root, "devices")
+    block = os.path.join(root, "block")
+    os.makedirs(block)
+    for name in BLOCK_DEVICES:
+        os.makedirs(os.path.join(devices, name))
+        os.symlink(os.path.join(devices, name), os.path.join(block, name))
+    for name in PARTITIONS:
+        os.makedirs(os.path.join(devices, name[:-1], name))
+        with open(os.path.join(devices, name[:-1], name, "partition"), "w") as f:
+            f.write(name[-1] + "\n")
+    for array, members in RAID_MEMBERS.items():
+        os.makedirs(os.path.join(devices, array, "slaves"))
+        for member in members:
+            disk = member.rstrip("0123456789")
+            target = os.path.join(devices, disk, member if member != disk else "")
+            os.symlink(target, os.path.join(devices, array, "slaves", member))
+    return block
+
+
+#
+# Print a phase and its checks, True when they all pass.
+#
+def report(name, elapsed, checks):
+    print(
+        f"{name:<10} {elapsed * 1000:>7.0f}ms  "
+        + " ".join(f"{check} {'OK' if ok else 'FAIL'}" for check, ok in checks.items())
+    )
+    return all(checks.values())
+
+
+#
+# Render the panel lines of the mounts: ({mountpoint: line}, seconds).
+#
+def render(disks):
+    started = time.perf_counter()
+    lines = disks.get_disk_usage().split("\n")
+    elapsed = time.perf_counter() - started
+    return dict(zip(MOUNTPOINTS, lines)), elapsed
+
+
+#
+#
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+
+    os.environ.setdefault("CONKY_ASTRO_HOME", os.path.dirname(os.path.abspath(SRC_DIR)))
+    import psutil
+    import disks
+    import striker
+
+    scratch_dir = tempfile.TemporaryDirectory()
+    striker.CONKY_ASTRO_CACHE = scratch_dir.name
+    striker.CONKY_ASTRO_DATA = scratch_dir.name
+    with open(os.path.join(scratch_dir.name, "mountpoints.txt"), "w") as f:
+        f.write("\n".join(MOUNTPOINTS) + "\n")
+    fake = FakeDisks()
+    psutil.disk_usage = fake.disk_usage
+    psutil.disk_partitions = fake.disk_partitions
+    disks.DISK_DEADLINE_SECONDS = DEADLINE_SECONDS
+    striker.CONKY_DISK_RESAMPLE = 300
+    passed = []
+
+    # Cold: every mount sampled, the volumes concurrently
+    lines, elapsed = render(disks)
+    passed.append(
+        report(
+            "cold",
+            elapsed,
+            {
+                "sampled": all(fake.calls[m] == 1 for m in MOUNTPOINTS),
+                "concurrent": elapsed < 2 * DELAY_SECONDS,
+                "fresh": not any("stale" in line for line in lines.values()),
+            },
+        )
+    )
+
+    # Cached: the local root is sampled again, the NAS volumes are not within
+    # CONKY_DISK_RESAMPLE
+    lines, elapsed = render(disks)
+    passed.append(
+        report(
+            "cached",
+            elapsed,
+            {
+                "local": fake.calls["/"] == 2,
+                "no calls": all(fake.calls[m] == 1 for m in MOUNTPOINTS[1:]),
+                "time": elapsed < 0.05,
+            },
+        )
+    )
+
+    # Hang: volume2 stops answering, it shows its cached usage flagged stale at
+    # the deadline while the other mounts are fresh
+    striker.CONKY_DISK_RESAMPLE = 0
+    fake.hung.add("/mnt/nas/volume2")
+    fake.used = 200 * 1024**3
+    lines, elapsed = render(disks)
+    passed.append(
+        report(
+            "hang",
+            elapsed,
+            {
+                "deadline": DEADLINE_SECONDS <= elapsed < DEADLINE_SECONDS + 0.1,
+                "stale": "stale" in lines["/mnt/nas/volume2"]
+                and "Used:   100 GB" in lines["/mnt/nas/volume2"],
+                "fresh": "Used:   200 GB" in lines["/mnt/nas/volume1"]
+                and "stale" not in lines["/mnt/nas/volume1"],
+            },
+        )
+    )
+
+    # Still hung: no second worker and no wait for the first
+    calls = fake.calls["/mnt/nas/volume2"]
+    lines, elapsed = render(disks)
+    passed.append(
+        report(
+            "in flight",
+            elapsed,
+            {
+                "one worker": fake.calls["/mnt/nas/volume2"] == calls,
+                "stale": "stale" in lines["/mnt/nas/volume2"],
+                "time": elapsed < DEADLINE_SECONDS,
+            },
+        )
+    )
+
+    # Recovered: the late sample is shown on the next render, stamped with the
+    # time it returned rather than the time of that render
+    released_at = time.time()
+    fake.release.set()
+    time.sleep(DEADLINE_SECONDS)
+    striker.CONKY_DISK_RESAMPLE = 300
+    lines, elapsed = render(disks)
+    sampled_at = disks.load_usage_cache()["/mnt/nas/volume2"]["sampled_at"]
+    passed.append(
+        report(
+            "late",
+            elapsed,
+            {
+                "fresh": "stale" not in lines["/mnt/nas/volume2"]
+                and "Used:   200 GB" in lines["/mnt/nas/volume2"],
+                "sampled at": abs(sampled_at - released_at) < 0.1,
+            },
+        )
+    )
+
+    # Failing: a volume that errors keeps its cached usage, one never sampled
+    # shows the error
+    striker.CONKY_DISK_RESAMPLE = 0
+    fake.failing.add("/mnt/nas/volume3")
+    os.remove(disks.get_usage_file())
+    lines, elapsed = render(disks)
+    failed = "Input/output error" in lines["/mnt/nas/volume3"]
+    fake.failing.clear()
+    render(disks)
+    fake.failing.add("/mnt/nas/volume3")
+    lines, elapsed = render(disks)
+    passed.append(
+        report(
+            "failing",
+            elapsed,
+            {
+                "error": failed,
+                "stale": "stale" in lines["/mnt/nas/volume3"]
+                and "Used:" in lines["/mnt/nas/volume3"],
+            },
+        )
+    )
+
+    # I/O: the disks under md0 and md1 are counted on the arrays only
+    disks.SYS_BLOCK = build_sys_block(os.path.join(scratch_dir.name, "sys"))
+    psutil.disk_io_counters = lambda perdisk=False: {
+        name: IO(0, 0) for name in BLOCK_DEVICES + PARTITIONS
+    }
+    started = time.perf_counter()
+    try:
+        line, error = disks.get_disk_io(), None
+    except Exception as e:
+        line, error = "", e
+    passed.append(
+        report(
+            "raid",
+            time.perf_counter() - started,
+            {
+                "no error": error is None,
+                "members": "I/O (md0, md1, nvme0n1, sde)" in line,
+            },
+        )
+    )
+
+    scratch_dir.cleanup()
+    sys.exit(0 if all(passed) else 1)
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Compare the per-day scalar ephemeris loop that get-astro-data.py used to run
+with the vectorised compute_daily_positions() pass.
+
+Both are timed on the same ephemeris and horizon, and the vectorised output is
+checked against the scalar output at the rounding stored in the JSON cache.
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import striker  # noqa: E402
+
+
+#
+#
+#
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(
+        name.replace("-", "_"), os.path.join(SRC_DIR, f"{name}.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+#
+# The original loop: one apparent position per body per day.
+#
+def compute_daily_positions_scalar(astro, eph, ts, observer, dates):
+    positions = {}
+    for current in dates:
+        t = ts.utc(current.year, current.month, current.day)
+
+        sun_pos = observer.at(t).observe(eph["sun"]).apparent()
+        moon_pos = observer.at(t).observe(eph["moon"]).apparent()
+
+        phase_angle = sun_pos.separation_from(moon_pos).degrees
+        illumination = (1 + np.cos(np.radians(phase_angle))) / 2 * 100
+        phase_name, emoji = astro.get_phase_info(phase_angle)
+        _, sun_dec, _ = sun_pos.radec()
+
+        planets_info = {}
+        for planet_name in astro.PLANETS:
+            app = observer.at(t).observe(eph[planet_name]).apparent()
+            alt, az, _ = app.altaz()
+            ra, dec, _ = app.radec()
+            planets_info[planet_name] = {
+                "azimuth_deg": round(float(az.degrees), 2),
+                "altitude_deg": round(float(alt.degrees), 2),
+                "right_ascension_hr": round(float(ra.hours), 3),
+                "declination_deg": round(float(dec.degrees), 3),
+            }
+
+        positions[current.isoformat()] = {
+            "moon_illumination_percent": round(float(illumination), 1),
+            "sun_declination": round(float(sun_dec.degrees), 4),
+            "moon_phase": phase_name,
+            "moon_emoji": emoji,
+            "planets": planets_info,
+        }
+    return positions
+
+
+#
+# Yield (path, expected, actual) for every leaf that differs.
+#
+def diff_values(expected, actual, path=""):
+    if isinstance(expected, dict):
+        for key in expected:
+            yield from diff_values(expected[key], actual.get(key), f"{path}/{key}")
+    elif expected != actual:
+        yield path, expected, actual
+
+
+#
+#
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=90, help="days after today")
+    parser.add_argument("--repeat", type=int, default=3, help="timing repetitions")
+    args = parser.parse_args()
+
+    astro = load_script("get-astro-data")
+    eph = astro.ensure_ephemeris()
+    ts = astro.load.timescale()
+    site = striker.load_observer_sites()[0]
+    observer = eph["earth"] + astro.get_topos(site)
+
+    today = datetime.utcnow().date()
+    dates = [today + timedelta(days=i) for i in range(args.days + 1)]
+
+    timings = {}
+    outputs = {}
+    for label, compute in (
+        (
+            "scalar",
+            lambda: compute_daily_positions_scalar(astro, eph, ts, observer, dates),
+        ),
+        (
+            "vectorised",
+            lambda: astro.compute_daily_positions(eph, ts, [site], dates)[site["name"]],
+        ),
+    ):
+        best = None
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            outputs[label] = compute()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        timings[label] = best
+
+    differences = list(diff_values(outputs["scalar"], outputs["vectorised"]))
+    print(f"days        {len(dates)}")
+    print(f"scalar      {timings['scalar'] * 1000:9.1f} ms")
+    print(f"vectorised  {timings['vectorised'] * 1000:9.1f} ms")
+    print(f"speedup     {timings['scalar'] / timings['vectorised']:9.1f}x")
+    print(f"mismatches  {len(differences)}")
+    for path, expected, actual in differences[:10]:
+        print(f"  {path}: {expected} != {actual}")
+
+    sys.exit(1 if differences else 0)
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
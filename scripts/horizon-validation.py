@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Bound the error of src/horizon.py against astropy.
+
+A seeded sample of fixed RA/Dec positions is transformed by both for every
+latitude in LATITUDES at weekly epochs (at a varying hour) over a year. The
+angular separation between the two horizontal positions is reported per
+latitude, without refraction and, above MIN_REFRACTION_ALT_DEG, with it.
+The script fails when an error exceeds its bound.
+"""
+
+import argparse
+import calendar
+import os
+import sys
+import time
+
+import numpy as np
+from astropy import units as u
+from astropy.coordinates import AltAz, EarthLocation, SkyCoord
+from astropy.time import Time
+from astropy.utils import iers
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import horizon  # noqa: E402
+
+LATITUDES = [-70.0, -33.9, 0.0, 19.8, 40.7, 64.8, 78.2]
+LONGITUDE = -111.9
+
+# Nutation and aberration are ignored, both stay well under this
+GEOMETRIC_BOUND_ARCSEC = 60.0
+# Bennett's formula against the erfa model, above MIN_REFRACTION_ALT_DEG
+REFRACTION_BOUND_ARCSEC = 90.0
+MIN_REFRACTION_ALT_DEG = 5.0
+
+PRESSURE_HPA = 1010.0
+TEMPERATURE_C = 10.0
+
+
+#
+# Great-circle distance in arcseconds between two (az, alt) arrays in degrees.
+#
+def separation_arcsec(az1, alt1, az2, alt2):
+    az1, alt1, az2, alt2 = (np.radians(a) for a in (az1, alt1, az2, alt2))
+    cos_sep = np.sin(alt1) * np.sin(alt2) + np.cos(alt1) * np.cos(alt2) * np.cos(
+        az1 - az2
+    )
+    return np.degrees(np.arccos(np.clip(cos_sep, -1.0, 1.0))) * 3600.0
+
+
+#
+# horizon.py over the (objects x epochs) grid.
+#
+def horizon_grid(ra, dec, latitude, timestamps, refraction):
+    az = np.empty((len(ra), len(timestamps)))
+    alt = np.empty_like(az)
+    for i in range(len(ra)):
+        for j, timestamp in enumerate(timestamps):
+            az[i, j], alt[i, j] = horizon.equatorial_to_horizontal(
+                ra[i], dec[i], latitude, LONGITUDE, float(timestamp), refraction
+            )
+    return az, alt
+
+
+#
+# astropy over the same grid, with the matching refraction conditions.
+#
+def astropy_grid(ra, dec, latitude, timestamps, refraction):
+    location = EarthLocation(lat=latitude * u.deg, lon=LONGITUDE * u.deg)
+    conditions = {}
+    if refraction:
+        conditions = {
+            "pressure": PRESSURE_HPA * u.hPa,
+            "temperature": TEMPERATURE_C * u.deg_C,
+            "relative_humidity": 0.0,
+            "obswl": 0.55 * u.micron,
+        }
+    frame = AltAz(
+        obstime=Time(timestamps, format="unix").reshape(1, -1),
+        location=location,
+        **conditions,
+    )
+    altaz = SkyCoord(ra=ra[:, None] * u.deg, dec=dec[:, None] * u.deg).transform_to(
+        frame
+    )
+    return altaz.az.deg, altaz.alt.deg
+
+
+#
+#
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--objects", type=int, default=40, help="sample positions")
+    parser.add_argument("--year", type=int, default=time.gmtime().tm_year)
+    args = parser.parse_args()
+
+    # The bounds hold without the latest IERS tables, do not download them
+    iers.conf.auto_download = False
+
+    rng = np.random.default_rng(42)
+    ra = rng.uniform(0.0, 360.0, args.objects)
+    dec = np.degrees(np.arcsin(rng.uniform(-1.0, 1.0, args.objects)))
+    start = calendar.timegm((args.year, 1, 1, 0, 0, 0))
+    # Weekly epochs, shifted by 1h37m each time to sample every hour angle
+    timestamps = start + np.arange(53) * (7 * 86400 + 5820)
+
+    failed = False
+    print(f"{'latitude':>9} {'mode':<11} {'samples':>8} {'max':>9} {'mean':>9}")
+    for latitude in LATITUDES:
+        for refraction, bound in (
+            (False, GEOMETRIC_BOUND_ARCSEC),
+            (True, REFRACTION_BOUND_ARCSEC),
+        ):
+            az, alt = horizon_grid(ra, dec, latitude, timestamps, refraction)
+            ref_az, ref_alt = astropy_grid(ra, dec, latitude, timestamps, refraction)
+            errors = separation_arcsec(az, alt, ref_az, ref_alt)
+            if refraction:
+                errors = errors[ref_alt > MIN_REFRACTION_ALT_DEG]
+
+            worst = float(errors.max())
+            failed = failed or worst > bound
+            mode = "refracted" if refraction else "geometric"
+            status = "OK" if worst <= bound else "OVER"
+            print(
+                f"{latitude:>+9.1f} {mode:<11} {errors.size:>8} "
+                f'{worst:>8.1f}" {float(errors.mean()):>8.1f}"  {status}'
+            )
+
+    runs = 20000
+    started = time.perf_counter()
+    for _ in range(runs):
+        horizon.equatorial_to_horizontal(279.23, 38.78, 40.7, LONGITUDE)
+    elapsed = (time.perf_counter() - started) / runs
+    print(f"\nhorizon.equatorial_to_horizontal: {elapsed * 1e6:.1f} us per call")
+    print(
+        f'bounds: geometric {GEOMETRIC_BOUND_ARCSEC:.0f}", refracted '
+        f'{REFRACTION_BOUND_ARCSEC:.0f}" above {MIN_REFRACTION_ALT_DEG:.0f}° altitude'
+    )
+
+    sys.exit(1 if failed else 0)
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
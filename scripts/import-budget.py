@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Report the import cost of every panel entry point and fail when a panel goes
+over its import budget.
+
+Each panel is imported in a fresh interpreter with `python -X importtime`, the
+cumulative time of the panel module is compared with its budget and the
+heaviest modules it pulled in are listed.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Import budget per panel in milliseconds
+DEFAULT_BUDGET_MS = 100
+PANEL_BUDGETS_MS = {
+    "sun": DEFAULT_BUDGET_MS,
+    "airports": 250,  # requests + pytz
+    "system": DEFAULT_BUDGET_MS,
+    "network": DEFAULT_BUDGET_MS,
+    "memory": DEFAULT_BUDGET_MS,
+    "gpu": DEFAULT_BUDGET_MS,
+    "cpu": DEFAULT_BUDGET_MS,
+    "disks": DEFAULT_BUDGET_MS,
+    "planets": DEFAULT_BUDGET_MS,
+    "exoplanets": DEFAULT_BUDGET_MS,
+    "stars": DEFAULT_BUDGET_MS,
+    "definitions": DEFAULT_BUDGET_MS,
+}
+
+# Modules that must never be loaded just to render a panel
+FORBIDDEN_MODULES = ("astropy", "numpy", "skyfield")
+
+
+#
+# Parse `-X importtime` output into (module, self_us, cumulative_us, depth).
+#
+def parse_importtime(stderr):
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+#
+#
+#
+def measure_panel(panel):
+    env = dict(os.environ)
+    env.setdefault("CONKY_ASTRO_HOME", os.path.dirname(os.path.abspath(SRC_DIR)))
+    env["PYTHONPATH"] = SRC_DIR
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {panel}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=SRC_DIR,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    rows = parse_importtime(result.stderr)
+    error = None
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1]
+    return rows, wall_ms, error
+
+
+#
+#
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("panels", nargs="*", help="panels to measure (default: all)")
+    parser.add_argument(
+        "--budget-ms", type=float, help="override the budget for every panel"
+    )
+    parser.add_argument(
+        "--top", type=int, default=5, help="heaviest imports to list per panel"
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for panel in args.panels or PANEL_BUDGETS_MS:
+        budget_ms = args.budget_ms or PANEL_BUDGETS_MS.get(panel, DEFAULT_BUDGET_MS)
+        rows, wall_ms, error = measure_panel(panel)
+        if error:
+            print(f"{panel:<12} ERROR  {error}")
+            failed = True
+            continue
+
+        # importtime prints children before their parent, so the panel's own
+        # imports are the rows between the previous top-level row and it.
+        index = next((i for i, row in enumerate(rows) if row[0] == panel), None)
+        if index is None:
+            print(f"{panel:<12} ERROR  no importtime row for {panel}")
+            failed = True
+            continue
+        start = index
+        while start > 0 and rows[start - 1][3] > 0:
+            start -= 1
+        panel_rows = rows[start : index + 1]
+        import_ms = rows[index][2] / 1000
+        forbidden = sorted(
+            {row[0] for row in panel_rows if row[0].split(".")[0] in FORBIDDEN_MODULES}
+        )
+        status = "OK"
+        if import_ms > budget_ms or forbidden:
+            status = "OVER"
+            failed = True
+
+        print(
+            f"{panel:<12} {status:<5} import {import_ms:7.1f} ms "
+            f"(budget {budget_ms:.0f} ms) | process {wall_ms:7.1f} ms"
+        )
+        if forbidden:
+            print(f"{'':<12} loads {', '.join(forbidden)}")
+        children = sorted(
+            (row for row in panel_rows if row[3] == 1), key=lambda row: -row[2]
+        )
+        for name, _, cumulative_us, _ in children[: args.top]:
+            print(f"{'':<12} {cumulative_us / 1000:7.1f} ms  {name}")
+
+    sys.exit(1 if failed else 0)
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
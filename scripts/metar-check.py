@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Run the airports panel on the bulk METAR source with a generated cycle file.
+
+The fixture holds a report for every airport of airport-data.json among
+thousands of other stations, in the aviationweather.gov CSV cache layout. The
+panel is rendered from the file dropped in a directory, then from a local HTTP
+server serving it: every airport must render without errors and with the
+fixture's temperature, one download must serve every airport until the cycle
+expires, and the single-pass parse of the whole file is timed.
+"""
+
+import argparse
+import contextlib
+import csv
+import gzip
+import io
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+# Columns of the aviationweather.gov METAR cache
+COLUMNS = (
+    "raw_text,station_id,observation_time,latitude,longitude,temp_c,dewpoint_c,"
+    "wind_dir_degrees,wind_speed_kt,wind_gust_kt,visibility_statute_mi,"
+    "altim_in_hg,sea_level_pressure_mb,corrected,auto,auto_station,"
+    "maintenance_indicator_on,no_signal,lightning_sensor_off,"
+    "freezing_rain_sensor_off,present_weather_sensor_off,wx_string,"
+    "sky_cover,cloud_base_ft_agl,sky_cover,cloud_base_ft_agl,"
+    "sky_cover,cloud_base_ft_agl,sky_cover,cloud_base_ft_agl,flight_category,"
+    "three_hr_pressure_tendency_mb,maxT_c,minT_c,maxT24hr_c,minT24hr_c,"
+    "precip_in,pcp3hr_in,pcp6hr_in,pcp24hr_in,snow_in,vert_vis_ft,metar_type,"
+    "elevation_m"
+).split(",")
+
+WEATHER = ("", "", "-RA", "BR", "+TSRA", "-SN", "VCSH")
+SKY = ("CLR", "FEW", "SCT", "BKN", "OVC")
+
+
+#
+# A report row for a station, with the fields the panel reads.
+#
+def make_row(code, rng):
+    fields = dict.fromkeys(COLUMNS, "")
+    temp_c = rng.randint(-20, 35)
+    fields.update(
+        raw_text=f"{code} 181853Z AUTO",
+        station_id=code,
+        observation_time="2026-10-18T18:53:00Z",
+        temp_c=f"{temp_c:.1f}",
+        dewpoint_c=f"{temp_c - rng.randint(0, 20):.1f}",
+        wind_dir_degrees=rng.choice(("VRB", str(rng.randrange(10, 370, 10)))),
+        wind_speed_kt=str(rng.randint(0, 30)),
+        visibility_statute_mi=rng.choice(("10+", "3.0", "0.5")),
+        altim_in_hg=f"{rng.uniform(29.5, 30.5):.2f}",
+        wx_string=rng.choice(WEATHER),
+        precip_in=rng.choice(("", "0.02")),
+        metar_type="METAR",
+    )
+    row = [fields[name] for name in COLUMNS]
+    row[COLUMNS.index("sky_cover")] = rng.choice(SKY)
+    return row
+
+
+#
+# The cycle file as CSV text: the cache preamble, the header and one row per
+# station.
+#
+def make_cycle(codes, rng):
+    output = io.StringIO()
+    output.write("No errors\nNo warnings\n6 ms\ndata source=metars\n")
+    output.write(f"{len(codes)} results\n")
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(COLUMNS)
+    rows = {code: make_row(code, rng) for code in codes}
+    writer.writerows(rows.values())
+    return output.getvalue(), rows
+
+
+#
+# Serves the gzipped cycle and counts downloads.
+#
+class CycleHandler(BaseHTTPRequestHandler):
+    body = b""
+    downloads = 0
+
+    def do_GET(self):
+        CycleHandler.downloads += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/gzip")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+#
+# Render the panel and return the temperature shown per airport and the codes
+# shown as errors.
+#
+def render(airports):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        airports.main()
+    text = output.getvalue()
+    shown = re.findall(r"\(([A-Z0-9]{3,4})[,)].*\n.*?(-?\d+)°C", text)
+    errors = set(re.findall(r"\$\{alignc\}([A-Z0-9]{3,4}):", text))
+    return dict(shown), errors
+
+
+#
+# Expected temperature shown for each airport of the panel.
+#
+def expected_temps(airports, coords, rows):
+    index = COLUMNS.index("temp_c")
+    return {
+        code: f"{float(rows[code][index]):.0f}"
+        for code, _, _ in airports.get_panel_airports(coords)
+    }
+
+
+#
+#
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--stations", type=int, default=5000, help="stations in the cycle file"
+    )
+    args = parser.parse_args()
+
+    os.environ["CONKY_WEATHER_SOURCE"] = "metar"
+    os.environ.setdefault("CONKY_ASTRO_HOME", os.path.dirname(os.path.abspath(SRC_DIR)))
+    import airports
+    import striker
+
+    scratch_dir = tempfile.TemporaryDirectory()
+    striker.CONKY_ASTRO_CACHE = scratch_dir.name
+    striker.CONKY_ASTRO_WEATHER = os.path.join(scratch_dir.name, "weather")
+    striker.CONKY_ASTRO_REMOTE = os.path.join(scratch_dir.name, "remote")
+    drop_dir = os.path.join(scratch_dir.name, "metars")
+    os.makedirs(drop_dir)
+
+    rng = random.Random(7)
+    coords = striker.load_json_cached(striker.FILE_AIRPORT_DATA)
+    codes = list(coords) + [f"X{i:03X}" for i in range(args.stations - len(coords))]
+    text, rows = make_cycle(codes, rng)
+    body = gzip.compress(text.encode())
+    with open(os.path.join(drop_dir, "metars.cache.csv.gz"), "wb") as stream:
+        stream.write(body)
+
+    passed = []
+    print(f"{len(codes)} stations, {len(body) / 1024:.0f} KiB gzipped\n")
+
+    # Single-pass parse of the plain and gzipped file
+    for name, data in (("csv", text.encode()), ("csv.gz", body)):
+        started = time.perf_counter()
+        stations = airports.metar.parse_metars(
+            airports.metar.get_lines(io.BytesIO(data))
+        )
+        elapsed = time.perf_counter() - started
+        ok = len(stations) == len(codes)
+        passed.append(ok)
+        print(
+            f"parse {name:<7} {elapsed * 1000:>6.0f}ms {len(stations)} stations  "
+            f"{'OK' if ok else 'FAIL'}"
+        )
+
+    # Dropped file, then the same cycle downloaded once for every airport
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CycleHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    CycleHandler.body = body
+    expected = expected_temps(airports, coords, rows)
+
+    for source in ("drop", "url", "url"):
+        if source == "url":
+            striker.CONKY_METAR_DIR = ""
+            striker.CONKY_METAR_URL = f"http://127.0.0.1:{server.server_port}/metars"
+        else:
+            striker.CONKY_METAR_DIR = drop_dir
+        # Empty the weather cache so every airport is fetched
+        airports.weathercache.evict(max_bytes=0)
+
+        started = time.perf_counter()
+        shown, errors = render(airports)
+        elapsed = time.perf_counter() - started
+        checks = {
+            "shown": shown == expected,
+            "errors": not errors,
+            "downloads": CycleHandler.downloads == (source == "url"),
+        }
+        passed.append(all(checks.values()))
+        print(
+            f"render {source:<6} {elapsed * 1000:>6.0f}ms {len(shown)} airports, "
+            f"{CycleHandler.downloads} downloads  "
+            + " ".join(
+                f"{check} {'OK' if ok else 'FAIL'}" for check, ok in checks.items()
+            )
+        )
+
+    server.shutdown()
+    scratch_dir.cleanup()
+    sys.exit(0 if all(passed) else 1)
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
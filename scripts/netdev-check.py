@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Check the /proc/net/dev reader against recorded samples and the live file.
+
+Four recorded samples, ten seconds apart, follow a laptop whose VPN link
+(nordlynx) goes down and comes back with reset counters while a Docker bridge
+appears. The reader must parse and select the interfaces by glob, compute the
+per-interface and aggregate rates, drop the missing link without failing,
+report no rate for the reset one, and the network panel must render every
+sample, while the command line keeps its rates apart from the panel's. Last, the
+live /proc/net/dev is parsed against psutil.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+HEADER = """\
+Inter-|   Receive                                                |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+"""
+
+# Recorded samples, SAMPLE_SECONDS apart
+SAMPLE_SECONDS = 10
+SAMPLES = [
+    HEADER + """\
+    lo: 1043722    9881    0    0    0     0          0         0  1043722    9881    0    0    0     0       0          0
+ wlp2s0: 88412003  102233    0   12    0     0          0      1433 9012334   51230    0    0    0     0       0          0
+nordlynx: 52110020   61022    0    0    0     0          0         0 4410203   30221    0    0    0     0       0          0
+""",
+    HEADER + """\
+    lo: 1053722    9901    0    0    0     0          0         0  1053722    9901    0    0    0     0       0          0
+ wlp2s0: 89412003  103233    0   12    0     0          0      1440 9112334   52230    0    0    0     0       0          0
+nordlynx: 53110020   62022    0    0    0     0          0         0 4460203   30721    0    0    0     0       0          0
+""",
+    HEADER + """\
+    lo: 1063722    9921    0    0    0     0          0         0  1063722    9921    0    0    0     0       0          0
+ wlp2s0: 91412003  105233    0   13    0     0          0      1452 9212334   53230    1    0    0     0       0          0
+docker0:       0       0    0    0    0     0          0         0     1286      15    0    0    0     0       0          0
+""",
+    HEADER + """\
+    lo: 1073722    9941    0    0    0     0          0         0  1073722    9941    0    0    0     0       0          0
+ wlp2s0: 91912003  105733    0   13    0     0          0      1460 9262334   53730    1    0    0     0       0          0
+docker0:   20480      40    0    0    0     0          0         0    61286     215    0    0    0     0       0          0
+nordlynx:   30000      50    0    0    0     0          0         0     4000      40    0    0    0     0       0          0
+""",
+]
+
+
+#
+# Print a phase and its checks, True when they all pass.
+#
+def report(name, elapsed, checks):
+    print(
+        f"{name:<10} {elapsed * 1000:>7.2f}ms  "
+        + " ".join(f"{check} {'OK' if ok else 'FAIL'}" for check, ok in checks.items())
+    )
+    return all(checks.values())
+
+
+#
+#
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--iterations", type=int, default=2000, help="live reads to time"
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault("CONKY_ASTRO_HOME", os.path.dirname(os.path.abspath(SRC_DIR)))
+    os.environ.pop("CONKY_NET_INTERFACES", None)
+    import psutil
+    import netdev
+    import network
+    import rates
+    import striker
+
+    scratch_dir = tempfile.TemporaryDirectory()
+    striker.CONKY_ASTRO_CACHE = scratch_dir.name
+    physical = striker.CONKY_NET_INTERFACES
+    striker.CONKY_NET_INTERFACES = "*,!lo"
+    striker.CONKY_NET_TOP = 2
+    paths = []
+    for index, text in enumerate(SAMPLES):
+        paths.append(os.path.join(scratch_dir.name, f"net-dev-{index}"))
+        with open(paths[-1], "w") as f:
+            f.write(text)
+    passed = []
+
+    # Parse and select by glob
+    started = time.perf_counter()
+    counters = netdev.read_net_dev(path=paths[0])
+    elapsed = time.perf_counter() - started
+    passed.append(
+        report(
+            "parse",
+            elapsed,
+            {
+                "default": sorted(counters) == ["nordlynx", "wlp2s0"],
+                "fields": counters["wlp2s0"]["bytes_recv"] == 88412003
+                and counters["wlp2s0"]["dropin"] == 12
+                and counters["nordlynx"]["packets_sent"] == 30221,
+                "glob": list(netdev.read_net_dev("wl*", paths[0])) == ["wlp2s0"],
+                "exclude": sorted(netdev.read_net_dev("*,!nord*", paths[0]))
+                == ["lo", "wlp2s0"],
+                "physical": list(netdev.read_net_dev(physical, paths[3])) == ["wlp2s0"],
+            },
+        )
+    )
+
+    # Sample each recording in turn
+    now = time.time()
+    samples = []
+    for index, path in enumerate(paths):
+        samples.append(netdev.sample(path=path, now=now + index * SAMPLE_SECONDS))
+
+    # Second sample: every link has a rate and the total adds them up
+    interfaces, total = samples[1]
+    passed.append(
+        report(
+            "rates",
+            0,
+            {
+                "first": all(
+                    stats["down_speed"] is None for stats in samples[0][0].values()
+                ),
+                "wlp2s0": interfaces["wlp2s0"]["down_speed"] == 100000
+                and interfaces["wlp2s0"]["up_speed"] == 10000,
+                "nordlynx": interfaces["nordlynx"]["down_speed"] == 100000
+                and interfaces["nordlynx"]["up_speed"] == 5000,
+                "total": total["down_speed"] == 200000
+                and total["up_speed"] == 15000
+                and total["total_down"] == 89412003 + 53110020,
+            },
+        )
+    )
+
+    # Third sample: the VPN is gone and a bridge appeared
+    interfaces, total = samples[2]
+    passed.append(
+        report(
+            "vpn down",
+            0,
+            {
+                "dropped": "nordlynx" not in interfaces,
+                "new": interfaces["docker0"]["down_speed"] is None,
+                "total": total["down_speed"] == 200000 and total["up_speed"] == 10000,
+                "errors": total["errors"] == 1 and total["drops"] == 13,
+            },
+        )
+    )
+
+    # Fourth sample: the VPN is back with reset counters
+    interfaces, total = samples[3]
+    passed.append(
+        report(
+            "vpn back",
+            0,
+            {
+                "reset": interfaces["nordlynx"]["down_speed"] is None,
+                "bridge": interfaces["docker0"]["up_speed"] == 6000,
+                "busiest": netdev.get_busiest(interfaces, 3)
+                == ["wlp2s0", "docker0", "nordlynx"],
+            },
+        )
+    )
+
+    # Panel: every recording renders (with rates of its own), with the top
+    # links only
+    striker.CONKY_ASTRO_CACHE = os.path.join(scratch_dir.name, "panel")
+    os.makedirs(striker.CONKY_ASTRO_CACHE)
+    outputs = []
+    started = time.perf_counter()
+    for path in paths:
+        netdev.NET_DEV_FILE = path
+        try:
+            outputs.append(network.get_network())
+        except Exception as e:
+            outputs.append(f"{type(e).__name__}: {e}")
+    elapsed = (time.perf_counter() - started) / len(paths)
+    passed.append(
+        report(
+            "panel",
+            elapsed,
+            {
+                "renders": all("Total transferred" in output for output in outputs),
+                "top": outputs[3].count("Download:") == 1 + striker.CONKY_NET_TOP,
+                "vpn": "nordlynx" in outputs[1] and "nordlynx" not in outputs[2],
+            },
+        )
+    )
+
+    # Command line: rates of its own, the panel's snapshot is left alone
+    snapshot_file = rates.get_snapshot_file("network")
+    with open(snapshot_file, "rb") as f:
+        before = f.read()
+    argv = sys.argv
+    sys.argv = ["netdev.py", "--file", paths[0]]
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()) as printed:
+            netdev.main()
+        error = None
+    except Exception as e:
+        error = e
+    elapsed = time.perf_counter() - started
+    sys.argv = argv
+    with open(snapshot_file, "rb") as f:
+        after = f.read()
+    passed.append(
+        report(
+            "cli",
+            elapsed,
+            {
+                "no error": error is None,
+                "prints": error is None and "wlp2s0" in printed.getvalue(),
+                "panel": after == before,
+            },
+        )
+    )
+
+    # Live file: the same interfaces as psutil
+    netdev.NET_DEV_FILE = "/proc/net/dev"
+    counters = netdev.read_net_dev("*")
+    names = set(psutil.net_io_counters(pernic=True))
+    started = time.perf_counter()
+    for _ in range(args.iterations):
+        netdev.read_net_dev()
+    reader = (time.perf_counter() - started) / args.iterations
+    started = time.perf_counter()
+    for _ in range(args.iterations):
+        psutil.net_io_counters(pernic=True)
+    baseline = (time.perf_counter() - started) / args.iterations
+    passed.append(report("live", reader, {"interfaces": set(counters) == names}))
+    print(f"{'':<10} psutil.net_io_counters {baseline * 1000:.2f}ms")
+
+    scratch_dir.cleanup()
+    sys.exit(0 if all(passed) else 1)
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Check the "display" precision tier of get-astro-data.py against the "full" tier.
+
+Daily positions and hourly samples are computed with both tiers over a window
+starting today. The largest difference of every stored field is compared with
+DISPLAY_MAX_ERRORS and the time spent in each tier is reported. Azimuths are
+compared on the circle and skipped within 5 degrees of the zenith or nadir, where they
+are undefined (this includes Earth itself, straight down).
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import striker  # noqa: E402
+
+
+#
+#
+#
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(
+        name.replace("-", "_"), os.path.join(SRC_DIR, f"{name}.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+#
+# Difference of two values of `field`, azimuths and hours taken on the circle.
+#
+def field_error(field, value, reference):
+    error = abs(value - reference)
+    if field == "azimuth_deg":
+        error = min(error, 360.0 - error)
+    elif field in ("right_ascension_hr", "ra_hr"):
+        error = min(error, 24.0 - error)
+    return error
+
+
+#
+# Largest error per field between two outputs of compute_daily_positions() and
+# compute_hourly_samples(), plus the number of differing moon phase names.
+#
+def compare(display, full, display_samples, full_samples):
+    errors = defaultdict(float)
+    phase_flips = 0
+    for day, reference in full.items():
+        values = display[day]
+        for field in ("sun_declination", "moon_illumination_percent"):
+            errors[field] = max(
+                errors[field], field_error(field, values[field], reference[field])
+            )
+        phase_flips += values["moon_phase"] != reference["moon_phase"]
+
+        for planet, position in reference["planets"].items():
+            for field, expected in position.items():
+                if field == "azimuth_deg" and abs(position["altitude_deg"]) > 85:
+                    continue
+                actual = values["planets"][planet][field]
+                errors[field] = max(errors[field], field_error(field, actual, expected))
+
+        for planet, samples in full_samples[day].items():
+            for field, expected in samples.items():
+                actual = display_samples[day][planet][field]
+                for value, reference_value in zip(actual, expected):
+                    errors[field] = max(
+                        errors[field], field_error(field, value, reference_value)
+                    )
+    return errors, phase_flips
+
+
+#
+#
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=365, help="days after today")
+    args = parser.parse_args()
+
+    astro = load_script("get-astro-data")
+    today = datetime.utcnow().date()
+    dates = [today + timedelta(days=i) for i in range(args.days + 1)]
+    eph = astro.ensure_ephemeris(dates[0], dates[-1] + timedelta(days=1))
+    ts = astro.load.timescale()
+    sites = striker.load_observer_sites()[:1]
+    name = sites[0]["name"]
+
+    outputs = {}
+    timings = {}
+    for precision in astro.PRECISION_TIERS:
+        started = time.perf_counter()
+        outputs[precision] = (
+            astro.compute_daily_positions(eph, ts, sites, dates, precision)[name],
+            astro.compute_hourly_samples(eph, ts, sites, dates, precision)[name],
+        )
+        timings[precision] = time.perf_counter() - started
+
+    errors, phase_flips = compare(
+        outputs["display"][0],
+        outputs["full"][0],
+        outputs["display"][1],
+        outputs["full"][1],
+    )
+
+    print(f"days {len(dates)}, {len(astro.PLANETS)} planets")
+    for precision, elapsed in timings.items():
+        print(f"  {precision:<8} {elapsed * 1000:9.1f} ms")
+    print(f"  speedup  {timings['full'] / timings['display']:9.1f}x\n")
+
+    failed = False
+    print(f"{'field':<26} {'max error':>11} {'bound':>11}")
+    for field, bound in astro.DISPLAY_MAX_ERRORS.items():
+        error = errors[field]
+        status = "OK" if error <= bound else "OVER"
+        failed = failed or error > bound
+        print(f"{field:<26} {error:>11.6f} {bound:>11.6f}  {status}")
+    print(f"moon phase names differing: {phase_flips} of {len(dates)} days")
+
+    sys.exit(1 if failed else 0)
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
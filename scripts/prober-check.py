@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Run the network prober against local stand-ins and render the network panel.
+
+Connectivity is probed against a local listener and the public IP against a
+local HTTP server. Every probe must run on the first pass, none again before
+its interval, only connectivity after 30 seconds, and a lost listener and
+server must show as a change of connectivity while the public IP keeps its last
+value. Once the connect has failed FAILURE_THRESHOLD times its breaker must
+report the link down without connecting. The network panel is then rendered
+with sockets and subprocesses disabled, from the status record alone.
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+PUBLIC_IP = "203.0.113.7"
+
+
+#
+# Answers every request with PUBLIC_IP.
+#
+class PublicIpHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = PUBLIC_IP.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+#
+# Print a phase and its checks, True when they all pass.
+#
+def report(name, elapsed, checks):
+    print(
+        f"{name:<10} {elapsed * 1000:>7.1f}ms  "
+        + " ".join(f"{check} {'OK' if ok else 'FAIL'}" for check, ok in checks.items())
+    )
+    return all(checks.values())
+
+
+#
+# Raise on any socket or process created while the panel renders.
+#
+def forbidden(*args, **kwargs):
+    raise AssertionError("the panel opened a socket or started a process")
+
+
+#
+#
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+
+    os.environ.setdefault("CONKY_ASTRO_HOME", os.path.dirname(os.path.abspath(SRC_DIR)))
+    import network
+    import prober
+    import remote
+    import striker
+
+    scratch_dir = tempfile.TemporaryDirectory()
+    striker.CONKY_ASTRO_CACHE = scratch_dir.name
+    striker.CONKY_ASTRO_REMOTE = os.path.join(scratch_dir.name, "remote")
+
+    listener = socket.create_server(("127.0.0.1", 0), backlog=128)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PublicIpHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    prober.CONNECTIVITY_HOST, prober.CONNECTIVITY_PORT = listener.getsockname()
+    prober.CONNECTIVITY_TIMEOUT_SECONDS = 1
+    prober.PUBLIC_IP_URL = f"http://127.0.0.1:{server.server_port}/ip"
+    passed = []
+
+    # First pass: every probe
+    now = time.time()
+    started = time.perf_counter()
+    ran = prober.run_due(now)
+    elapsed = time.perf_counter() - started
+    status = prober.load_status()
+    passed.append(
+        report(
+            "first",
+            elapsed,
+            {
+                "all": set(ran) == set(prober.PROBE_INTERVALS),
+                "connected": status["connectivity"]["value"] is True
+                and status["connectivity"]["latency_ms"] >= 0,
+                "public ip": status["public_ip"]["value"] == PUBLIC_IP,
+                "local ip": status["local_ip"]["value"] == "127.0.0.1",
+            },
+        )
+    )
+
+    # Nothing is due right away, only connectivity after its interval
+    started = time.perf_counter()
+    again = prober.run_due(now + 1)
+    later = prober.run_due(now + prober.PROBE_INTERVALS["connectivity"] + 1)
+    passed.append(
+        report(
+            "intervals",
+            time.perf_counter() - started,
+            {"none due": again == [], "connectivity": later == ["connectivity"]},
+        )
+    )
+
+    # Lost link: connectivity changes, the public IP keeps its value and is
+    # retried sooner
+    listener.close()
+    server.shutdown()
+    server.server_close()
+    lost = now + prober.PROBE_INTERVALS["public_ip"] + 1
+    started = time.perf_counter()
+    prober.run_due(lost)
+    elapsed = time.perf_counter() - started
+    status = prober.load_status()
+    passed.append(
+        report(
+            "lost",
+            elapsed,
+            {
+                "disconnected": status["connectivity"]["value"] is False
+                and status["connectivity"]["changed_at"] == lost,
+                "kept ip": status["public_ip"]["value"] == PUBLIC_IP
+                and "error" in status["public_ip"],
+                "retry": status["public_ip"]["next_at"] == lost + prober.RETRY_SECONDS,
+            },
+        )
+    )
+
+    # Breaker: after FAILURE_THRESHOLD failed connects the link is reported
+    # down without connecting again
+    for attempt in range(1, remote.FAILURE_THRESHOLD):
+        prober.run_due(lost + attempt * prober.PROBE_INTERVALS["connectivity"])
+    connects = []
+    saved = remote.probe_tcp
+    remote.probe_tcp = lambda *args: connects.append(args)
+    started = time.perf_counter()
+    prober.run_due(
+        lost + remote.FAILURE_THRESHOLD * prober.PROBE_INTERVALS["connectivity"]
+    )
+    elapsed = time.perf_counter() - started
+    remote.probe_tcp = saved
+    status = prober.load_status()
+    passed.append(
+        report(
+            "breaker",
+            elapsed,
+            {
+                "open": remote.is_open("connectivity"),
+                "no connect": connects == [],
+                "disconnected": status["connectivity"]["value"] is False,
+            },
+        )
+    )
+
+    # Panel: no sockets and no processes, only the status record
+    saved = socket.socket, subprocess.Popen
+    socket.socket = subprocess.Popen = forbidden
+    started = time.perf_counter()
+    try:
+        output = network.get_network()
+        error = None
+    except AssertionError as e:
+        output, error = "", e
+    elapsed = time.perf_counter() - started
+    socket.socket, subprocess.Popen = saved
+    passed.append(
+        report(
+            "panel",
+            elapsed,
+            {
+                "no io": error is None,
+                "status": PUBLIC_IP in output and "Disconnected" in output,
+                "no exec": "${exec" not in output and "execi" not in output,
+            },
+        )
+    )
+
+    scratch_dir.cleanup()
+    sys.exit(0 if all(passed) else 1)
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Check the deadlines and circuit breakers of remote calls against a local server
+that answers, drops or delays connections.
+
+A delayed call must give up at its deadline. Repeated failures must open the
+endpoint's breaker, after which calls fail at once without reaching the server,
+until one attempt is let through after the cooldown. The TCP probe must not
+leak sockets. Last, the airports panel is rendered against a failing weather
+API: it must show the last good weather with a staleness marker, and once the
+breaker is open, without waiting.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+# How long a delayed reply takes, and the deadline of the calls waiting for it
+DELAY_SECONDS = 3.0
+DEADLINE_SECONDS = 0.5
+
+SAMPLE_WEATHER = {
+    "main": {"temp": 12.5, "humidity": 40, "pressure": 1016},
+    "wind": {"speed": 3.2, "deg": 310},
+    "visibility": 16000,
+    "weather": [{"description": "scattered clouds"}],
+}
+
+
+#
+# Stub server: `mode` is "ok", "drop" (close without replying) or "delay".
+#
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    mode = "ok"
+    requests = 0
+
+    def do_GET(self):
+        StubHandler.requests += 1
+        if self.mode == "drop":
+            self.close_connection = True
+            return
+        if self.mode == "delay":
+            time.sleep(DELAY_SECONDS)
+        body = json.dumps(SAMPLE_WEATHER).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+#
+# Wall time of a call and the exception it raised (None when it returned).
+#
+def time_call(function, *args, **kwargs):
+    started = time.perf_counter()
+    try:
+        function(*args, **kwargs)
+        error = None
+    except Exception as e:
+        error = e
+    return time.perf_counter() - started, error
+
+
+#
+# Print a phase and its checks, True when they all pass.
+#
+def report(name, elapsed, checks):
+    print(
+        f"{name:<12} {elapsed * 1000:>7.0f}ms  "
+        + " ".join(f"{check} {'OK' if ok else 'FAIL'}" for check, ok in checks.items())
+    )
+    return all(checks.values())
+
+
+#
+# Let the next call through an open breaker, as if its cooldown had passed.
+#
+def expire_breaker(remote, endpoint):
+    breaker = remote.load_breaker(endpoint)
+    breaker["opened_at"] -= breaker["open_seconds"]
+    remote.striker.save_json_atomic(remote.get_breaker_file(endpoint), breaker)
+
+
+#
+#
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/weather"
+
+    os.environ["CONKY_WEATHER_URL"] = url
+    os.environ["CONKY_WEATHER_SOURCE"] = "openweather"
+    os.environ.setdefault("KEY_OPEN_WEATHER_API", "stub")
+    os.environ.setdefault("CONKY_ASTRO_HOME", os.path.dirname(os.path.abspath(SRC_DIR)))
+    import requests
+    import airports
+    import remote
+    import striker
+
+    scratch_dir = tempfile.TemporaryDirectory()
+    striker.CONKY_ASTRO_CACHE = scratch_dir.name
+    striker.CONKY_ASTRO_WEATHER = os.path.join(scratch_dir.name, "weather")
+    striker.CONKY_ASTRO_REMOTE = os.path.join(scratch_dir.name, "remote")
+    passed = []
+
+    # Deadline: a delayed reply is abandoned at the deadline
+    StubHandler.mode = "delay"
+    elapsed, error = time_call(
+        remote.call, "slow", requests.get, url, timeout=10, deadline=DEADLINE_SECONDS
+    )
+    passed.append(
+        report(
+            "deadline",
+            elapsed,
+            {
+                "error": isinstance(error, remote.DeadlineError),
+                "time": elapsed < DEADLINE_SECONDS + 0.2,
+            },
+        )
+    )
+
+    # Breaker: dropped connections open it, then calls fail without a request
+    StubHandler.mode = "drop"
+    for _ in range(remote.FAILURE_THRESHOLD - 1):
+        time_call(remote.call, "stub", requests.get, url, timeout=2)
+    before = StubHandler.requests
+    time_call(remote.call, "stub", requests.get, url, timeout=2)
+    opened = remote.is_open("stub") and StubHandler.requests == before + 1
+    elapsed, error = time_call(remote.call, "stub", requests.get, url, timeout=2)
+    passed.append(
+        report(
+            "open",
+            elapsed,
+            {
+                "opened": opened,
+                "error": isinstance(error, remote.CircuitOpenError),
+                "no request": StubHandler.requests == before + 1,
+                "time": elapsed < 0.05,
+            },
+        )
+    )
+
+    # Cooldown: a failing attempt reopens it for twice as long, a good one
+    # closes it
+    expire_breaker(remote, "stub")
+    time_call(remote.call, "stub", requests.get, url, timeout=2)
+    doubled = remote.load_breaker("stub")["open_seconds"] == 2 * remote.OPEN_SECONDS
+    StubHandler.mode = "ok"
+    expire_breaker(remote, "stub")
+    elapsed, error = time_call(remote.call, "stub", requests.get, url, timeout=2)
+    passed.append(
+        report(
+            "cooldown",
+            elapsed,
+            {
+                "reopened": doubled,
+                "closed": error is None and not remote.is_open("stub"),
+            },
+        )
+    )
+
+    # TCP probe: no socket left open, and a refused port opens the breaker so
+    # probing stops
+    with socket.create_server(("127.0.0.1", 0), backlog=128) as listener:
+        descriptors = len(os.listdir("/proc/self/fd"))
+        for _ in range(50):
+            remote.probe_tcp("127.0.0.1", listener.getsockname()[1], 1)
+        leaked = len(os.listdir("/proc/self/fd")) - descriptors
+    with socket.socket() as closed:
+        closed.bind(("127.0.0.1", 0))
+        refused_port = closed.getsockname()[1]
+    for _ in range(remote.FAILURE_THRESHOLD):
+        time_call(remote.call, "probe", remote.probe_tcp, "127.0.0.1", refused_port, 1)
+    probe_open = remote.is_open("probe")
+    elapsed, error = time_call(
+        remote.call, "probe", remote.probe_tcp, "127.0.0.1", refused_port, 1
+    )
+    passed.append(
+        report(
+            "tcp probe",
+            elapsed,
+            {
+                "no leak": leaked <= 0,
+                "opened": probe_open,
+                "error": isinstance(error, remote.CircuitOpenError),
+                "time": elapsed < 0.05,
+            },
+        )
+    )
+
+    # Airports: good weather is cached, then the API stops answering; past
+    # CONKY_WEATHER_MAX_STALE the last reply is shown with a staleness marker,
+    # at once when the breaker is open
+    airports.WEATHER_TIMEOUT_SECONDS = (DEADLINE_SECONDS, DEADLINE_SECONDS)
+    airports.WEATHER_DEADLINE_SECONDS = 2 * DEADLINE_SECONDS
+    coords = striker.load_json_cached(striker.FILE_AIRPORT_DATA)
+    shown = len(airports.get_panel_airports(coords))
+    with contextlib.redirect_stdout(io.StringIO()):
+        airports.main()
+    airports.wait_for_refresh()
+    striker.CONKY_WEATHER_MAX_STALE = 0
+    striker.CONKY_WEATHER_TTL = 0
+    StubHandler.mode = "delay"
+    for render in range(remote.FAILURE_THRESHOLD + 1):
+        output = io.StringIO()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            airports.main()
+        elapsed = time.perf_counter() - started
+        text = output.getvalue()
+        stale = text.count("Stale, updated")
+        last = render == remote.FAILURE_THRESHOLD
+        checks = {
+            "stale": stale == shown and "scattered clouds".title() in text,
+            "errors": "${alignc}" not in text,
+        }
+        if last:
+            checks["open"] = "retry in" in text
+            checks["time"] = elapsed < 0.1
+        passed.append(report(f"airports {render + 1}", elapsed, checks))
+
+    server.shutdown()
+    scratch_dir.cleanup()
+    sys.exit(0 if all(passed) else 1)
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
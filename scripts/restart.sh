@@ -1,6 +1,7 @@
 #!/bin/bash
 
 killall conky
+pkill -f panel-daemon.py
+/home/wade/Conky/conky-astro/src/panel-daemon.py >/dev/null 2>&1 &
 /usr/bin/conky -d -c /home/wade/Conky/conky-astro/conf/astronomy-display.conf  2>/dev/null &
 #/usr/bin/conky -d -c /home/wade/Conky/conky-astro/conf/astronomy-display.conf
-
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Read sensors from a fake hwmon tree with missing, garbled and moving inputs.
+
+The tree has a coretemp device (two cores shared by four logical CPUs, one
+garbled core input), an NVMe drive and a fan controller with an empty input.
+Discovery must drop the unreadable inputs, a reading that breaks later must
+come back as None without walking the tree again, and only a hwmon device that
+moved must trigger one rediscovery. Last, the CPU panel's sensor lines are
+rendered with a failed reading.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+# hwmon device → {file: contents}
+HWMON_TREE = {
+    "hwmon0": {
+        "name": "coretemp",
+        "temp1_label": "Package id 0",
+        "temp1_input": "52000",
+        "temp2_label": "Core 0",
+        "temp2_input": "48000",
+        "temp3_label": "Core 1",
+        "temp3_input": "51000",
+        "temp4_label": "Core 4",
+        "temp4_input": "garbled",
+    },
+    "hwmon1": {
+        "name": "nvme",
+        "temp1_label": "Composite",
+        "temp1_input": "38850",
+    },
+    "hwmon2": {
+        "name": "nct6775",
+        "fan1_input": "",
+        "fan2_input": "1200",
+    },
+}
+
+# Logical CPU → (package, core)
+TOPOLOGY = {0: (0, 0), 1: (0, 1), 2: (0, 0), 3: (0, 1)}
+
+
+#
+# Write HWMON_TREE and TOPOLOGY under `root`.
+#
+def build_tree(root):
+    for device, files in HWMON_TREE.items():
+        os.makedirs(os.path.join(root, "hwmon", device))
+        for name, text in files.items():
+            with open(os.path.join(root, "hwmon", device, name), "w") as f:
+                f.write(text + "\n" if text else "")
+    for cpu, (package, core) in TOPOLOGY.items():
+        base = os.path.join(root, "cpu", f"cpu{cpu}", "topology")
+        os.makedirs(base)
+        for name, value in (("physical_package_id", package), ("core_id", core)):
+            with open(os.path.join(base, name), "w") as f:
+                f.write(f"{value}\n")
+
+
+#
+# Print a phase and its checks, True when they all pass.
+#
+def report(name, elapsed, checks):
+    print(
+        f"{name:<10} {elapsed * 1000:>7.2f}ms  "
+        + " ".join(f"{check} {'OK' if ok else 'FAIL'}" for check, ok in checks.items())
+    )
+    return all(checks.values())
+
+
+#
+# read_sensors() with the number of tree walks it made: (result, error,
+# walks, seconds).
+#
+def read(sensors, walks):
+    before = len(walks)
+    started = time.perf_counter()
+    try:
+        result, error = sensors.read_sensors(("nvme", "fan")), None
+    except Exception as e:
+        result, error = None, e
+    return result, error, len(walks) - before, time.perf_counter() - started
+
+
+#
+#
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+
+    os.environ.setdefault("CONKY_ASTRO_HOME", os.path.dirname(os.path.abspath(SRC_DIR)))
+    import sensors
+    import striker
+
+    scratch_dir = tempfile.TemporaryDirectory()
+    build_tree(scratch_dir.name)
+    hwmon = os.path.join(scratch_dir.name, "hwmon")
+    sensors.HWMON_ROOT = hwmon
+    sensors.CPU_ROOT = os.path.join(scratch_dir.name, "cpu")
+    striker.FILE_SENSOR_INDEX = os.path.join(scratch_dir.name, "sensor-index.json")
+
+    walks = []
+    discover_sensors = sensors.discover_sensors
+
+    def counted_discover(*args, **kwargs):
+        walks.append(1)
+        return discover_sensors(*args, **kwargs)
+
+    sensors.discover_sensors = counted_discover
+    passed = []
+
+    # Discovery: the garbled core and the empty fan are left out
+    result, error, walked, elapsed = read(sensors, walks)
+    index = sensors.get_sensor_index()
+    labels = [sensor["label"] for sensor in index["extra"]]
+    passed.append(
+        report(
+            "discover",
+            elapsed,
+            {
+                "no error": error is None,
+                "walked": walked == 1,
+                "cores": sorted(index["cores"]) == ["0:0", "0:1"],
+                "extra": labels == ["nvme Composite", "nct6775 fan2"],
+            },
+        )
+    )
+
+    # Readings: each logical CPU gets its physical core's temperature
+    (cpu_temps, core_temps), extra = result
+    passed.append(
+        report(
+            "read",
+            0,
+            {
+                "cpus": cpu_temps == [48.0, 51.0, 48.0, 51.0],
+                "extra": extra
+                == [("nvme", "nvme Composite", 38.85), ("fan", "nct6775 fan2", 1200.0)],
+            },
+        )
+    )
+
+    # A core input turns garbled and the NVMe input goes missing: None for
+    # those, the tree is not walked again
+    with open(os.path.join(hwmon, "hwmon0", "temp3_input"), "w") as f:
+        f.write("\n")
+    os.remove(os.path.join(hwmon, "hwmon1", "temp1_input"))
+    result, error, walked, elapsed = read(sensors, walks)
+    (cpu_temps, core_temps), extra = result if result else ((None, {}), [])
+    passed.append(
+        report(
+            "broken",
+            elapsed,
+            {
+                "no error": error is None,
+                "none": cpu_temps == [48.0, None, 48.0, None]
+                and extra[0][2] is None
+                and extra[1][2] == 1200.0,
+                "no walk": walked == 0,
+            },
+        )
+    )
+    result, error, walked, elapsed = read(sensors, walks)
+    passed.append(
+        report("again", elapsed, {"no error": error is None, "no walk": walked == 0})
+    )
+
+    # The fan controller moves to another hwmon number: one walk, then the
+    # index is current again
+    shutil.move(os.path.join(hwmon, "hwmon2"), os.path.join(hwmon, "hwmon7"))
+    result, error, walked, elapsed = read(sensors, walks)
+    moved = result and result[1][-1] == ("fan", "nct6775 fan2", 1200.0)
+    _, _, walked_again, _ = read(sensors, walks)
+    passed.append(
+        report(
+            "moved",
+            elapsed,
+            {
+                "no error": error is None,
+                "walked": walked == 1 and walked_again == 0,
+                "fan": bool(moved),
+            },
+        )
+    )
+
+    # Panel lines: a failed reading shows dashes
+    import cpu
+
+    striker.CONKY_EXTRA_SENSORS = "nvme,fan"
+    with open(os.path.join(hwmon, "hwmon7", "fan2_input"), "w") as f:
+        f.write("-\n")
+    (cpu_temps, core_temps), extra = sensors.read_sensors(("nvme", "fan"))
+    lines = [
+        striker.get_line_align_right(label, "${color grey}---")
+        for kind, label, value in extra
+        if value is None
+    ]
+    try:
+        output, error = cpu.conky_cpu_usage(), None
+    except Exception as e:
+        output, error = "", e
+    passed.append(
+        report(
+            "panel",
+            0,
+            {
+                "no error": error is None,
+                "dashes": all(line in output for line in lines) and len(lines) == 1,
+            },
+        )
+    )
+
+    scratch_dir.cleanup()
+    sys.exit(0 if all(passed) else 1)
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Time the batched multi-site generation against the number of observer sites.
+
+The solar-system days (events, positions and hourly samples) and the alt/az
+grid of the star and exoplanet generators are computed for 1, 2, 4 ... sites
+of SITES and compared with the linear cost (sites x one site). Each site of
+the largest batch is checked against a run of that site alone, and its
+rise/set events against skyfield's find_discrete() search; events that search
+skips are accepted when its almanac function confirms them.
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from astropy.time import Time
+from skyfield import almanac
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import altazgrid  # noqa: E402
+
+# Sample sites across latitudes, longitudes and heights
+SITES = [
+    {"name": "salt-lake-city", "latitude": 40.7, "longitude": -111.9, "height_m": 1500},
+    {"name": "sydney", "latitude": -33.9, "longitude": 151.2, "height_m": 50},
+    {"name": "fairbanks", "latitude": 64.8, "longitude": -147.7, "height_m": 140},
+    {"name": "mauna-kea", "latitude": 19.8, "longitude": -155.5, "height_m": 4200},
+    {"name": "london", "latitude": 51.5, "longitude": -0.1, "height_m": 20},
+    {"name": "tokyo", "latitude": 35.7, "longitude": 139.7, "height_m": 40},
+    {"name": "quito", "latitude": -0.2, "longitude": -78.5, "height_m": 2850},
+    {"name": "cape-town", "latitude": -33.9, "longitude": 18.4, "height_m": 10},
+]
+# Objects in the sample star and exoplanet grids
+GRID_OBJECTS = 54
+
+# Largest difference allowed between an event and find_discrete(), seconds
+EVENT_BOUND_S = 2
+
+
+#
+#
+#
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(
+        name.replace("-", "_"), os.path.join(SRC_DIR, f"{name}.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+#
+# Wall time and output of a call.
+#
+def time_call(function):
+    started = time.perf_counter()
+    output = function()
+    return time.perf_counter() - started, output
+
+
+#
+# Compare the events stored in the days of a batched run ({body: {date: day}})
+# with a find_discrete() search of the site alone: the largest difference in
+# seconds, the number of times that differ once formatted, the events
+# find_discrete() reports that are missing, the extra events found, and the
+# extra events the almanac function confirms (short passes near the poles
+# that find_discrete()'s 6-hour moon steps skip).
+#
+def compare_events(astro, eph, ts, site, dates, batched):
+    first, last = dates[0], dates[-1] + timedelta(days=1)
+    start = ts.utc(first.year, first.month, first.day)
+    end = ts.utc(last.year, last.month, last.day)
+    topos = astro.get_topos(site)
+    searches = (
+        ("sun", almanac.sunrise_sunset(eph, topos), astro.SUN_LABELS),
+        (
+            "moon",
+            almanac.risings_and_settings(eph, eph["moon"], topos),
+            astro.MOON_LABELS,
+        ),
+    )
+
+    worst = formatted = missing = extra = short = 0
+    for body, function, labels in searches:
+        times, events = almanac.find_discrete(start, end, function)
+        expected = astro.group_events_by_date(times, events, labels)
+        actual = batched[body]
+        for day in set(expected) | set(actual):
+            for label in labels.values():
+                found = actual.get(day, {}).get(f"{label}_epoch")
+                reference = expected.get(day, {}).get(f"{label}_epoch")
+                if reference is None and found is not None:
+                    rising = label.endswith("rise")
+                    before, after = function(
+                        ts.utc(1970, 1, 1, 0, 0, [found - 60, found + 60])
+                    )
+                    confirmed = before != rising and after == rising
+                    short += confirmed
+                    extra += not confirmed
+                elif reference is None:
+                    continue
+                elif found is None or abs(found - reference) > 3600:
+                    missing += 1
+                else:
+                    worst = max(worst, abs(found - reference))
+                    formatted += expected[day][label] != actual[day][label]
+    return worst, formatted, missing, extra, short
+
+
+#
+#
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=90, help="days after today")
+    parser.add_argument(
+        "--precision", choices=("display", "full"), default="full", help="tier"
+    )
+    args = parser.parse_args()
+
+    astro = load_script("get-astro-data")
+
+    today = datetime.utcnow().date()
+    dates = [today + timedelta(days=i) for i in range(args.days + 1)]
+    eph = astro.ensure_ephemeris(dates[0], dates[-1] + timedelta(days=1))
+    ts = astro.load.timescale()
+    rng = random.Random(42)
+    ra = [rng.uniform(0, 360) for _ in range(GRID_OBJECTS)]
+    dec = [rng.uniform(-30, 90) for _ in range(GRID_OBJECTS)]
+    times = Time([d.isoformat() for d in dates])
+
+    # Warm up the ephemeris and astropy caches before timing
+    astro.compute_days(eph, ts, SITES[:1], dates[:2], args.precision)
+    altazgrid.compute_altaz_grid(ra, dec, times[:2], SITES[:1])
+
+    counts = [n for n in (1, 2, 4, 8, 16) if n <= len(SITES)]
+    print(
+        f"{len(dates)} days, {args.precision} precision, "
+        f"{GRID_OBJECTS} objects in the alt/az grid\n"
+    )
+    print(f"{'sites':>5} {'solar':>10} {'alt/az':>10} {'total':>10} {'linear':>10}")
+    single = None
+    batched = None
+    for count in counts:
+        solar_time, batched = time_call(
+            lambda: astro.compute_days(eph, ts, SITES[:count], dates, args.precision)
+        )
+        grid_time, _ = time_call(
+            lambda: altazgrid.compute_altaz_grid(ra, dec, times, SITES[:count])
+        )
+        total = solar_time + grid_time
+        single = single or total
+        print(
+            f"{count:>5} {solar_time * 1000:>8.0f}ms {grid_time * 1000:>8.0f}ms "
+            f"{total * 1000:>8.0f}ms {total / (count * single):>9.2f}x"
+        )
+
+    failed = False
+    print(
+        f"\n{'site':<16} {'vs alone':>9} {'events':>7} {'%H:%M':>6} "
+        f"{'missing':>8} {'extra':>6} {'short':>6}"
+    )
+    for site in SITES[: counts[-1]]:
+        days = batched[site["name"]]
+        alone = astro.compute_days(eph, ts, [site], dates, args.precision)
+        same = alone[site["name"]] == days
+        worst, formatted, missing, extra, short = compare_events(
+            astro, eph, ts, site, dates, {"sun": days, "moon": days}
+        )
+        ok = same and not missing and not extra and worst <= EVENT_BOUND_S
+        failed = failed or not ok
+        print(
+            f"{site['name']:<16} {'same' if same else 'DIFFERS':>9} {worst:>6}s "
+            f"{formatted:>6} {missing:>8} {extra:>6} {short:>6}  "
+            f"{'OK' if ok else 'FAIL'}"
+        )
+
+    sys.exit(1 if failed else 0)
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
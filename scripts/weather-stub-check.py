@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Run the airports panel against a local stub of the weather API.
+
+The stub answers every airport after a short delay, except one that fails with
+HTTP 500 and one that never answers in time. The weather cache is moved to a
+temporary directory and the panel is rendered several times over the same
+process: cold, every airport is fetched within the request timeout rather than
+the sum of the replies, keeping the order and showing the two broken airports
+as errors; warm, nothing is fetched; with stale entries, the panel renders from
+the cache at once and a background refresh updates them. The clock is then
+moved just before the next rotation, where the prefetch timer fetches the next
+window's airports, and past it, where the render must not fetch anything; a
+prefetch far off must be cancelled at a standalone exit rather than waited for.
+With a tiny call budget only the home airports are fetched. Eviction of old entries
+and the pooled connections are checked last.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+# Reply delay of a healthy airport, and of the one that never makes it
+REPLY_DELAY_SECONDS = 0.4
+SLOW_DELAY_SECONDS = 6.0
+
+# Shorter limits than the panel defaults keep the check quick
+TIMEOUT_SECONDS = (1.0, 1.5)
+DEADLINE_SECONDS = 2.5
+
+# time.time() before set_clock()
+REAL_TIME = time.time
+
+SAMPLE_WEATHER = {
+    "main": {"temp": 12.5, "humidity": 40, "pressure": 1016},
+    "wind": {"speed": 3.2, "deg": 310},
+    "visibility": 16000,
+    "weather": [{"description": "scattered clouds"}],
+}
+
+
+#
+# Stub weather API: `behaviour` maps a latitude (as sent) to "fail" or "slow".
+#
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    behaviour = {}
+    connections = set()
+    requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StubHandler.lock:
+            StubHandler.connections.add(self.client_address)
+            StubHandler.requests += 1
+        latitude = parse_qs(urlparse(self.path).query).get("lat", [""])[0]
+        mode = self.behaviour.get(latitude)
+
+        time.sleep(SLOW_DELAY_SECONDS if mode == "slow" else REPLY_DELAY_SECONDS)
+        status, body = 200, json.dumps(SAMPLE_WEATHER).encode()
+        if mode == "fail":
+            status, body = 500, b'{"message": "stub failure"}'
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+#
+#
+#
+def render(airports):
+    output = io.StringIO()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        airports.main()
+    return time.perf_counter() - started, output.getvalue()
+
+
+#
+# Make time.time() run from `now`, for the panel and the cache alike.
+#
+def set_clock(now):
+    offset = now - REAL_TIME()
+    time.time = lambda: REAL_TIME() + offset
+
+
+#
+# Codes in the order they are shown, and the codes shown as errors.
+#
+def parse_output(output):
+    shown = re.findall(r"\(([A-Z0-9]{3,4})[,)]|\$\{alignc\}([A-Z0-9]{3,4}):", output)
+    order = [code or error_code for code, error_code in shown]
+    errors = set(re.findall(r"\$\{alignc\}([A-Z0-9]{3,4}):", output))
+    return order, errors
+
+
+#
+# Print a phase and its checks, True when they all pass.
+#
+def report(name, elapsed, requests, checks):
+    print(
+        f"{name:<8} {elapsed:>6.2f}s {requests:>3} requests  "
+        + " ".join(f"{check} {'OK' if ok else 'FAIL'}" for check, ok in checks.items())
+    )
+    return all(checks.values())
+
+
+#
+# Move every cache entry `seconds` into the past.
+#
+def age_entries(weathercache, seconds):
+    for name in os.listdir(weathercache.striker.CONKY_ASTRO_WEATHER):
+        filename = os.path.join(weathercache.striker.CONKY_ASTRO_WEATHER, name)
+        entry = weathercache.striker.load_json(filename)
+        entry["fetched_at"] -= seconds
+        weathercache.striker.save_json_atomic(filename, entry)
+        os.utime(filename, (entry["fetched_at"], entry["fetched_at"]))
+
+
+#
+#
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--home", default="KSLC,KOGD", help="CONKY_AIRPORT_CODE for the check"
+    )
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["CONKY_WEATHER_URL"] = f"http://127.0.0.1:{server.server_port}/weather"
+    os.environ["CONKY_AIRPORT_CODE"] = args.home
+    os.environ.setdefault("KEY_OPEN_WEATHER_API", "stub")
+    os.environ.setdefault("CONKY_ASTRO_HOME", os.path.dirname(os.path.abspath(SRC_DIR)))
+    import airports
+    import striker
+    import weathercache
+    import weatherbudget
+
+    airports.WEATHER_TIMEOUT_SECONDS = TIMEOUT_SECONDS
+    airports.WEATHER_DEADLINE_SECONDS = DEADLINE_SECONDS
+    # Weather cache, call budget and breakers in a scratch directory
+    scratch_dir = tempfile.TemporaryDirectory()
+    striker.CONKY_ASTRO_CACHE = scratch_dir.name
+    striker.CONKY_ASTRO_WEATHER = os.path.join(scratch_dir.name, "weather")
+    striker.CONKY_ASTRO_REMOTE = os.path.join(scratch_dir.name, "remote")
+
+    # Early in a rotation window, so the airports do not change mid-check
+    set_clock(airports.get_next_window(REAL_TIME()) + 10)
+
+    coords = striker.load_json_cached(striker.FILE_AIRPORT_DATA)
+    expected = [code for code, _, _ in airports.get_panel_airports(coords)]
+    failing, slow = expected[1], expected[-1]
+    broken = {
+        str(coords[failing]["latitude"]): "fail",
+        str(coords[slow]["latitude"]): "slow",
+    }
+    healthy = len(expected) - 2
+    sequential = (len(expected) - 1) * REPLY_DELAY_SECONDS + TIMEOUT_SECONDS[1]
+
+    print(f"airports {', '.join(expected)} (failing {failing}, slow {slow})")
+    print(f"sequential estimate {sequential:.2f}s\n")
+    passed = []
+
+    # Cold: everything is fetched, the broken airports are errors and the
+    # healthy ones are cached
+    StubHandler.behaviour = broken
+    before = StubHandler.requests
+    elapsed, output = render(airports)
+    order, errors = parse_output(output)
+    passed.append(
+        report(
+            "cold",
+            elapsed,
+            StubHandler.requests - before,
+            {
+                "order": order == expected,
+                "errors": errors == {failing, slow},
+                "time": elapsed < sequential,
+                "cached": len(os.listdir(striker.CONKY_ASTRO_WEATHER)) == healthy,
+            },
+        )
+    )
+
+    # Warm: the healthy airports come from the cache, only the broken ones are
+    # fetched again
+    before = StubHandler.requests
+    elapsed, output = render(airports)
+    order, errors = parse_output(output)
+    passed.append(
+        report(
+            "warm",
+            elapsed,
+            StubHandler.requests - before,
+            {
+                "order": order == expected,
+                "errors": errors == {failing, slow},
+                "fetched": StubHandler.requests - before == 2,
+            },
+        )
+    )
+
+    # Stale: every airport answers again, the cached ones are past their TTL;
+    # they render at once and are refreshed in the background
+    StubHandler.behaviour = {}
+    age_entries(weathercache, striker.CONKY_WEATHER_TTL + 60)
+    airports.wait_for_refresh()
+    before = StubHandler.requests
+    elapsed, output = render(airports)
+    order, _ = parse_output(output)
+    refreshing = airports.wait_for_refresh()
+    states = [
+        weathercache.load(airports.get_cache_key((code, coords[code])))[0]
+        for code in expected
+    ]
+    passed.append(
+        report(
+            "stale",
+            elapsed,
+            StubHandler.requests - before,
+            {
+                "order": order == expected,
+                # Only the two uncached airports are fetched before rendering
+                "time": elapsed < 2 * REPLY_DELAY_SECONDS + TIMEOUT_SECONDS[1],
+                "refreshed": refreshing
+                and states.count(weathercache.FRESH) == len(expected),
+            },
+        )
+    )
+
+    # Expired: past CONKY_WEATHER_MAX_STALE entries are fetched again; the
+    # airports that fail show their last reply with a staleness marker
+    age_entries(weathercache, striker.CONKY_WEATHER_MAX_STALE + 60)
+    StubHandler.behaviour = broken
+    before = StubHandler.requests
+    elapsed, output = render(airports)
+    order, errors = parse_output(output)
+    passed.append(
+        report(
+            "expired",
+            elapsed,
+            StubHandler.requests - before,
+            {
+                "order": order == expected,
+                "errors": not errors and output.count("Stale, updated") == 2,
+                "fetched": StubHandler.requests - before == len(expected),
+            },
+        )
+    )
+
+    # Prefetch: shortly before a rotation the timer fetches the next window's
+    # airports, and the render after the boundary only reads the cache
+    StubHandler.behaviour = {}
+    window = airports.get_next_window(airports.get_next_window())
+    upcoming = [code for code, _, _ in airports.get_panel_airports(coords, window)]
+    set_clock(window - airports.PREFETCH_LEAD_SECONDS - 0.3)
+    before = StubHandler.requests
+    airports.schedule_prefetch(coords)
+    pending = airports.wait_for_prefetch(due_within=airports.PREFETCH_WAIT_SECONDS)
+    prefetched = StubHandler.requests - before
+    set_clock(window + 1)
+    before = StubHandler.requests
+    elapsed, output = render(airports)
+    order, errors = parse_output(output)
+    passed.append(
+        report(
+            "prefetch",
+            elapsed,
+            StubHandler.requests - before,
+            {
+                "timer": pending and prefetched > 0,
+                "order": order == upcoming and order != expected,
+                "errors": not errors,
+                "fetched": StubHandler.requests - before == 0,
+            },
+        )
+    )
+
+    # Standalone exit: a prefetch due well after PREFETCH_WAIT_SECONDS is
+    # cancelled instead of waited for
+    later = airports.get_next_window(window)
+    set_clock(later - airports.PREFETCH_LEAD_SECONDS - 100)
+    airports.schedule_prefetch(coords)
+    timer = airports._prefetch
+    started = time.perf_counter()
+    waited = airports.wait_for_prefetch(due_within=airports.PREFETCH_WAIT_SECONDS)
+    elapsed = time.perf_counter() - started
+    timer.join(1)
+    passed.append(
+        report(
+            "exit",
+            elapsed,
+            0,
+            {
+                "no wait": not waited and elapsed < 0.1,
+                "cancelled": not timer.is_alive(),
+            },
+        )
+    )
+
+    # Budget: with two calls a minute and nothing cached, the home airports get
+    # both and the rotating ones are refused with an error line
+    striker.CONKY_WEATHER_CALLS_PER_MINUTE = 2
+    for name in os.listdir(striker.CONKY_ASTRO_WEATHER):
+        os.remove(os.path.join(striker.CONKY_ASTRO_WEATHER, name))
+    set_clock((time.time() // 60 + 1) * 60 + 1)
+    denied = weatherbudget.get_usage()["month_denied"]
+    before = StubHandler.requests
+    elapsed, output = render(airports)
+    order, errors = parse_output(output)
+    homes = [code for code in upcoming if code in args.home.split(",")]
+    passed.append(
+        report(
+            "budget",
+            elapsed,
+            StubHandler.requests - before,
+            {
+                "order": order == upcoming,
+                "errors": errors == set(upcoming) - set(homes)
+                and output.count("budget exhausted") == len(errors),
+                "fetched": StubHandler.requests - before == len(homes),
+                "counted": weatherbudget.get_usage()["month_denied"] - denied
+                == len(upcoming) - len(homes),
+            },
+        )
+    )
+
+    # Eviction: a day-old entry goes, then the oldest until under the limit
+    weathercache.store("OLD_0.0000_0.0000", {"dt": 0}, now=time.time() - 2 * 86400)
+    old = os.path.join(striker.CONKY_ASTRO_WEATHER, "OLD_0.0000_0.0000.json")
+    os.utime(old, (time.time() - 2 * 86400,) * 2)
+    removed_old = weathercache.evict()
+    kept = len(os.listdir(striker.CONKY_ASTRO_WEATHER))
+    removed_size = weathercache.evict(max_bytes=1)
+    passed.append(
+        report(
+            "evict",
+            0,
+            0,
+            {
+                "old": removed_old == 1 and not os.path.exists(old),
+                "size": removed_size == kept
+                and not os.listdir(striker.CONKY_ASTRO_WEATHER),
+            },
+        )
+    )
+
+    # The slow requests of the three renders with the slow airport can still be
+    # pending on their own connections
+    pooled = len(StubHandler.connections) <= airports.WEATHER_WORKERS + 3
+    passed.append(pooled)
+    print(
+        f"\n{StubHandler.requests} requests over {len(StubHandler.connections)} "
+        f"connections  {'OK' if pooled else 'FAIL'}"
+    )
+    server.shutdown()
+    scratch_dir.cleanup()
+    sys.exit(0 if all(passed) else 1)
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,62 @@
 #!/usr/bin/env python3
 """
 Display current weather data for a rotating set of airports including KSLC,
-using OpenWeatherMap and formatting for Conky.
+using OpenWeatherMap or bulk METAR reports (CONKY_WEATHER_SOURCE) and
+formatting for Conky.
 """
 
 import json
 import os
 import time
+import threading
 import requests
 import pytz
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-from astropy.coordinates import EarthLocation
 import striker
 import exception
+import weathercache
+import weatherbudget
+import metar
+import remote
 
 # Rotate through different airports every 3 minutes
 ROTATION_INTERVAL_SECONDS = 3 * 60
+# The next window's airports are fetched into the cache this long before the
+# rotation, so the render after it only reads the cache
+PREFETCH_LEAD_SECONDS = 30
+# A standalone run waits for a prefetch that is running or starts within this
+# many seconds; a later one is cancelled rather than keeping the process alive
+PREFETCH_WAIT_SECONDS = 5
+
+# Weather requests run concurrently over one keep-alive session. Each request
+# has (connect, read) timeouts, and airports still missing after
+# WEATHER_DEADLINE_SECONDS are rendered as unavailable.
+WEATHER_WORKERS = 6
+WEATHER_TIMEOUT_SECONDS = (3.05, 5)
+WEATHER_DEADLINE_SECONDS = 8
+
+# Values of CONKY_WEATHER_SOURCE
+WEATHER_SOURCES = ("openweather", "metar")
+
+# Shared HTTP session, kept across refreshes by the panel daemon
+_session = None
+# Background refresh of stale cache entries started by the last render
+_refresh = None
+# Pending prefetch of the next rotation window, the window it is for and when
+# it starts
+_prefetch = None
+_prefetch_window = None
+_prefetch_at = None
 
 
 # --- Helper Functions ---
 
 
-def get_current_airports(airport_coords, n=3):
+def get_current_airports(airport_coords, n=3, now=None):
     """
     Return a rotating selection of 'n' airport codes (excluding the home airport)
-    based on the current time interval.
+    based on the time interval of `now` (default: the current time).
     """
     # Get fixed airports that should always be displayed
     always_display_airports = striker.CONKY_AIRPORT_CODE.split(",")
@@ -34,7 +66,7 @@ def get_current_airports(airport_coords, n=3):
         key for key in airport_coords if key not in always_display_airports
     ]
 
-    now = time.time()
+    now = time.time() if now is None else now
     base_index = int(now // ROTATION_INTERVAL_SECONDS) % len(rotating_keys)
     result = []
     # Get the rotating airports
@@ -49,15 +81,56 @@ def get_current_airports(airport_coords, n=3):
     return result
 
 
+def get_panel_airports(airport_coords, now=None):
+    """
+    The airports shown at `now` as (code, info, is_home_airport): the home
+    airports from CONKY_AIRPORT_CODE, then the rotating ones. Only the first
+    home airport gets the home header.
+    """
+    airports = []
+    for airport_code in striker.CONKY_AIRPORT_CODE.split(","):
+        home_airportinfo = airport_coords.get(airport_code)
+        if home_airportinfo:
+            airports.append((airport_code, home_airportinfo, not airports))
+
+    rotating_airports = get_current_airports(airport_coords, now=now)
+    airports += [(code, info, False) for code, info in rotating_airports]
+    return airports
+
+
+def get_next_window(now=None):
+    """
+    Start time of the rotation window after the one of `now`.
+    """
+    now = time.time() if now is None else now
+    return (now // ROTATION_INTERVAL_SECONDS + 1) * ROTATION_INTERVAL_SECONDS
+
+
+def get_session():
+    """
+    Return the shared requests session, pooling up to WEATHER_WORKERS
+    keep-alive connections.
+    """
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=WEATHER_WORKERS
+        )
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+    return _session
+
+
 def get_weather(lat, lon, api_key):
     """
     Query the OpenWeatherMap API for current weather at a given latitude and longitude.
     """
-    url = (
-        f"https://api.openweathermap.org/data/2.5/weather?"
-        f"lat={lat}&lon={lon}&appid={api_key}&units=metric"
+    response = get_session().get(
+        striker.CONKY_WEATHER_URL,
+        params={"lat": lat, "lon": lon, "appid": api_key, "units": "metric"},
+        timeout=WEATHER_TIMEOUT_SECONDS,
     )
-    response = requests.get(url)
     if response.status_code != 200:
         raise RuntimeError(
             f"Failed to fetch weather: {response.status_code} {response.text}"
@@ -65,6 +138,234 @@ def get_weather(lat, lon, api_key):
     return response.json()
 
 
+def fetch_metar_weather(airports):
+    """
+    Weather of every (code, info, ...) airport from the current bulk METAR
+    cycle, or the exception that replaced it, in the same order.
+    """
+    try:
+        stations = remote.call(
+            "metar",
+            metar.get_stations,
+            get_session(),
+            WEATHER_TIMEOUT_SECONDS,
+            deadline=WEATHER_DEADLINE_SECONDS,
+        )
+    except (
+        remote.RemoteError,
+        requests.RequestException,
+        OSError,
+        EOFError,
+        ValueError,
+    ) as e:
+        return [e] * len(airports)
+    return [
+        stations.get(airport[0]) or LookupError(f"No METAR for {airport[0]}")
+        for airport in airports
+    ]
+
+
+def fetch_weather(airports):
+    """
+    Fetch the weather of every (code, info, ...) airport concurrently. Returns
+    the weather data, or the exception that replaced it, in the same order.
+    The API counts as failing when no airport gets a reply; while its breaker
+    is open nothing is requested.
+    """
+    if striker.CONKY_WEATHER_SOURCE == "metar":
+        return fetch_metar_weather(airports)
+    if not airports:
+        return []
+    retry_in = remote.get_retry_in("openweather")
+    if retry_in:
+        error = remote.CircuitOpenError(
+            f"Weather API unavailable, retry in {remote.format_age(retry_in)}"
+        )
+        return [error] * len(airports)
+
+    executor = ThreadPoolExecutor(max_workers=WEATHER_WORKERS)
+    futures = [
+        executor.submit(
+            get_weather,
+            airport[1]["latitude"],
+            airport[1]["longitude"],
+            striker.KEY_OPEN_WEATHER_API,
+        )
+        for airport in airports
+    ]
+    done, _ = wait(futures, timeout=WEATHER_DEADLINE_SECONDS)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for future in futures:
+        if future not in done:
+            results.append(TimeoutError(f"no reply in {WEATHER_DEADLINE_SECONDS}s"))
+        elif future.exception() is not None:
+            results.append(future.exception())
+        else:
+            results.append(future.result())
+    remote.record_result(
+        "openweather", any(not isinstance(data, Exception) for data in results)
+    )
+    return results
+
+
+def get_cache_key(airport):
+    return weathercache.get_key(
+        airport[0], airport[1]["latitude"], airport[1]["longitude"]
+    )
+
+
+def get_priority(airport, background=False):
+    """
+    Budget priority of fetching an airport: home airports first, then the
+    rotating ones on screen, then background refreshes and prefetches.
+    """
+    if airport[0] in striker.CONKY_AIRPORT_CODE.split(","):
+        return weatherbudget.HOME
+    return weatherbudget.BACKGROUND if background else weatherbudget.ROTATING
+
+
+def fetch_and_store(airports, background=False):
+    """
+    Fetch the weather of the `airports` the call budget allows and cache every
+    successful reply. Airports refused by the budget get a RuntimeError.
+    """
+    if not airports:
+        return []
+    if striker.CONKY_WEATHER_SOURCE == "metar":
+        # One bulk file for every airport, not calls against the API key
+        granted = [True] * len(airports)
+    else:
+        granted = weatherbudget.reserve(
+            [get_priority(airport, background) for airport in airports]
+        )
+    fetched = iter(
+        fetch_weather([airport for airport, ok in zip(airports, granted) if ok])
+    )
+    results = []
+    for airport, ok in zip(airports, granted):
+        if not ok:
+            results.append(RuntimeError("Weather call budget exhausted"))
+            continue
+        data = next(fetched)
+        if not isinstance(data, Exception):
+            weathercache.store(get_cache_key(airport), data)
+        results.append(data)
+    return results
+
+
+def get_cached_weather(airports, now=None):
+    """
+    Weather of every airport, in order, from the disk cache. Missing and expired
+    entries are fetched now; stale ones are served as they are and refreshed
+    by a background thread (see wait_for_refresh()).
+    """
+    global _refresh
+    results = [None] * len(airports)
+    missing = []
+    stale = []
+    for i, airport in enumerate(airports):
+        state, entry = weathercache.load(get_cache_key(airport), now)
+        if state == weathercache.MISSING:
+            missing.append(i)
+            continue
+        results[i] = entry["payload"]
+        if state == weathercache.STALE:
+            stale.append(i)
+
+    for i, data in zip(missing, fetch_and_store([airports[i] for i in missing])):
+        results[i] = data
+
+    if stale and (_refresh is None or not _refresh.is_alive()):
+        _refresh = threading.Thread(
+            target=fetch_and_store, args=([airports[i] for i in stale], True)
+        )
+        _refresh.start()
+    return results
+
+
+def wait_for_refresh(timeout=None):
+    """
+    Wait for the background refresh of the last render, True when one ran.
+    """
+    if _refresh is None or not _refresh.is_alive():
+        return False
+    _refresh.join(timeout)
+    return True
+
+
+def prefetch_airports(airport_coords, window):
+    """
+    Fetch into the cache the airports shown in the rotation window starting at
+    `window` whose entries would not stay fresh until it ends. Returns the
+    airports fetched.
+    """
+    window_end = window + ROTATION_INTERVAL_SECONDS
+    airports = [
+        airport
+        for airport in get_panel_airports(airport_coords, window)
+        if weathercache.load(get_cache_key(airport), window_end)[0]
+        != weathercache.FRESH
+    ]
+    fetch_and_store(airports, background=True)
+    return airports
+
+
+def schedule_prefetch(airport_coords, now=None):
+    """
+    Start a timer that prefetches the next rotation window
+    PREFETCH_LEAD_SECONDS before it begins (at once when the boundary is
+    closer), unless it is already scheduled.
+    """
+    global _prefetch, _prefetch_window, _prefetch_at
+    now = time.time() if now is None else now
+    window = get_next_window(now)
+    if window == _prefetch_window:
+        return
+    delay = max(0.0, window - PREFETCH_LEAD_SECONDS - now)
+    _prefetch_window = window
+    _prefetch_at = now + delay
+    _prefetch = threading.Timer(
+        delay,
+        prefetch_airports,
+        args=(airport_coords, window),
+    )
+    # Does not hold up an exiting process; standalone runs wait for it
+    _prefetch.daemon = True
+    _prefetch.start()
+
+
+def wait_for_prefetch(timeout=None, due_within=None, now=None):
+    """
+    Wait for the scheduled prefetch, True when one was pending. With
+    `due_within`, a prefetch that has not started and would start later than
+    that many seconds from now is cancelled instead.
+    """
+    global _prefetch_window
+    if _prefetch is None or not _prefetch.is_alive():
+        return False
+    now = time.time() if now is None else now
+    if due_within is not None and _prefetch_at - now > due_within:
+        _prefetch.cancel()
+        _prefetch_window = None
+        return False
+    _prefetch.join(timeout)
+    return True
+
+
+def describe_error(error):
+    """
+    Short reason for a failed fetch. Request errors are not shown verbatim,
+    their message holds the URL with the API key.
+    """
+    if isinstance(error, requests.Timeout):
+        return "Weather request timed out"
+    if isinstance(error, requests.RequestException):
+        return f"Weather request failed ({type(error).__name__})"
+    return str(error)
+
+
 def get_temp_color(temp_f):
     if temp_f < 35:
         return "color2"
@@ -190,43 +491,68 @@ def display_weather(code, info, data, is_home_airport):
     )
 
 
-def go_weather(code, info, is_home_airport):
-    lat = info["latitude"]
-    lon = info["longitude"]
-    weather_data = get_weather(lat, lon, striker.KEY_OPEN_WEATHER_API)
-    display_weather(code, info, weather_data, is_home_airport)
-
-
 def get_home_airportdata(airport_coords):
     return airport_coords.get(striker.CONKY_AIRPORT_CODE)
 
 
 # --- Main Execution ---
-if __name__ == "__main__":
+def main():
     try:
-        airport_coords = striker.load_json(striker.FILE_AIRPORT_DATA)
-
-        # Show home airports first (from CONKY_AIRPORT_CODE)
-        home_airports = striker.CONKY_AIRPORT_CODE.split(",")
-
-        # Flag to track the first airport
-        is_first_airport = True
-
-        for airport_code in home_airports:
-            home_airportinfo = airport_coords.get(airport_code)
-            if home_airportinfo:
-                # Only set is_home_airport=True for the first airport
-                go_weather(airport_code, home_airportinfo, is_first_airport)
-
-                # After the first airport, set the flag to False
-                is_first_airport = False
-
-        # Show other rotating airports (excluding the ones in CONKY_AIRPORT_CODE)
-        rotating_airports = get_current_airports(airport_coords)
-        for code, info in rotating_airports:
-            go_weather(code, info, False)
+        if striker.CONKY_WEATHER_SOURCE not in WEATHER_SOURCES:
+            raise exception.StrikerException(
+                f"Unknown CONKY_WEATHER_SOURCE {striker.CONKY_WEATHER_SOURCE}"
+            )
+        airport_coords = striker.load_json_cached(striker.FILE_AIRPORT_DATA)
+
+        # Home airports first, then the rotating ones
+        airports = get_panel_airports(airport_coords)
+
+        # Read or fetch everything at once, then render in order from this
+        # thread (the panel daemon captures print() per thread)
+        for (code, info, is_home_airport), data in zip(
+            airports, get_cached_weather(airports)
+        ):
+            if isinstance(data, Exception):
+                # The last reply received, however old, rather than nothing
+                last = weathercache.load_last(get_cache_key((code, info)))
+                if last is None:
+                    print(
+                        exception.StrikerException.get_message(
+                            f"{code}: {describe_error(data)}"
+                        )
+                    )
+                    continue
+                display_weather(code, info, last["payload"], is_home_airport)
+                print(remote.get_stale_marker(last["fetched_at"], describe_error(data)))
+            else:
+                display_weather(code, info, data, is_home_airport)
+
+        # Warn when the calls so far would overrun the month
+        projected = weatherbudget.get_usage()["projected"]
+        if projected and projected > striker.CONKY_WEATHER_CALLS_PER_MONTH:
+            print(
+                exception.StrikerException.get_message(
+                    f"Weather calls projected {projected} of "
+                    f"{striker.CONKY_WEATHER_CALLS_PER_MONTH} this month"
+                )
+            )
+
+        schedule_prefetch(airport_coords)
+        weathercache.evict()
 
     except exception.StrikerException as e:
         print(exception.StrikerException.get_message(e))
     except Exception as e:
         print(f"${{color red}}Error: {e}")
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
+    # Let conky render while stale entries are refreshed and, when it is due
+    # shortly, the next window is prefetched
+    striker.detach_stdout()
+    wait_for_refresh()
+    wait_for_prefetch(due_within=PREFETCH_WAIT_SECONDS)
@@ -0,0 +1,38 @@
+"""
+Broadcast alt/az transforms shared by the star and exoplanet generators.
+
+Every site, object and time is transformed by astropy in one call: the sites
+are laid along the first axis, the objects along the second and the times
+along the third.
+"""
+
+from astropy.coordinates import SkyCoord, AltAz, EarthLocation
+from astropy import units as u
+import numpy as np
+
+
+#
+# Astropy locations of the sites, shaped (sites x 1 x 1) to broadcast against
+# an (objects x times) grid.
+#
+def get_locations(sites):
+    return EarthLocation(
+        lat=np.array([site["latitude"] for site in sites])[:, None, None] * u.deg,
+        lon=np.array([site["longitude"] for site in sites])[:, None, None] * u.deg,
+        height=np.array([site["height_m"] for site in sites])[:, None, None] * u.m,
+    )
+
+
+#
+# Azimuth and altitude of every coordinate at every time from every site, as
+# (sites x objects x times) arrays from a single broadcast transform.
+#
+def compute_altaz_grid(ra_deg, dec_deg, times, sites):
+    coords = SkyCoord(
+        ra=np.asarray(ra_deg)[None, :, None] * u.deg,
+        dec=np.asarray(dec_deg)[None, :, None] * u.deg,
+    )
+    altaz = coords.transform_to(
+        AltAz(obstime=times.reshape(1, 1, -1), location=get_locations(sites))
+    )
+    return altaz.az.deg, altaz.alt.deg
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Astronomy helpers shared by the star, exoplanet and planet panels.
+
+Kept out of striker.py so the system panels never load them.
+"""
+
+import re
+
+
+#
+#
+#
+def parse_spectral_type(spt):
+    # Spectral class → (Color, Temp in Kelvin, Color Code)
+    spectral_classes = {
+        "O": ("Blue", 40000, "blue"),
+        "B": ("Blue-White", 20000, "lightblue"),
+        "A": ("White", 8500, "white"),
+        "F": ("Yellow-White", 6500, "lightyellow"),
+        "G": ("Yellow", 5800, "yellow"),
+        "K": ("Orange", 4500, "orange"),
+        "M": ("Red", 3200, "red"),
+    }
+
+    luminosity_classesX = {
+        "I": "I",
+        "II": "II",
+        "III": "III",
+        "IV": "IV",
+        "V": "V",
+        "VI": "VI",
+        "VII": "VII",
+    }
+    luminosity_classes = {
+        "I": "Supergiant",
+        "II": "Bright Giant",
+        "III": "Giant",
+        "IV": "Sub-giant",
+        "V": "Main Sequence",
+        "VI": "Sub-dwarf",
+        "VII": "White-dwarf",
+    }
+
+    if not spt:
+        return {
+            "type": "-",
+            "color": "-",
+            "temperature": "-",
+            "size": "-",
+            "color_code": "gray",
+        }
+
+    match = re.match(r"([OBAFGKM])(\d)?([IV]+)?", spt)
+    if not match:
+        return {
+            "type": "-",
+            "color": "-",
+            "temperature": "-",
+            "size": "-",
+            "color_code": "gray",
+        }
+
+    spectral_class = match.group(1)
+    subclass = int(match.group(2)) if match.group(2) else 5
+    lum_class_raw = match.group(3) or "V"
+
+    # Get color and base temp
+    color, base_temp, color_code = spectral_classes.get(
+        spectral_class, ("Unknown", 0, "gray")
+    )
+    # Adjust temp slightly by subclass (lower subclass = hotter)
+    temp = int(base_temp - (subclass * (base_temp * 0.05)))
+
+    # Map luminosity class
+    size = luminosity_classes.get(lum_class_raw, "Unknown")
+
+    return {
+        "type": spectral_class,
+        "color": color,
+        "temperature": temp,
+        "size": size,
+        "color_code": color_code,
+    }
+
+
+def classify_luminosity_class(spectral):
+    if not spectral:
+        return "?"
+    if "Ia" in spectral or "Ib" in spectral:
+        return "🌟"  # Supergiant
+    elif "III" in spectral:
+        return "🌕"  # Giant
+    elif "IV" in spectral:
+        return "🌓"  # Subgiant
+    elif "V" in spectral:
+        return "☀️"  # Main sequence
+    elif "D" in spectral:
+        return "⚪"  # White dwarf
+    return "?"
+
+
+def classify_temp_color(temp_k):
+    if temp_k is None:
+        return ("?", "?")
+    t = float(temp_k)
+    if t >= 30000:
+        return ("Blue", "🔵")
+    elif t >= 10000:
+        return ("Blue-white", "🔹")
+    elif t >= 7500:
+        return ("White", "⚪")
+    elif t >= 6000:
+        return ("Yellow-white", "🟡")
+    elif t >= 5000:
+        return ("Yellow", "🟨")
+    elif t >= 3500:
+        return ("Orange", "🟧")
+    else:
+        return ("Red", "🔴")
+
+
+#
+#
+#
+def azimuth_direction(az_deg):
+    """Convert azimuth degrees to compass direction."""
+    directions = [
+        "N",
+        "NNE",
+        "NE",
+        "ENE",
+        "E",
+        "ESE",
+        "SE",
+        "SSE",
+        "S",
+        "SSW",
+        "SW",
+        "WSW",
+        "W",
+        "WNW",
+        "NW",
+        "NNW",
+    ]
+    index = int((az_deg + 11.25) % 360 // 22.5)
+    return directions[index]
+
+
+#
+#
+#
+def altitude_description(alt_deg):
+    """Categorize altitude angle into visibility height."""
+    if alt_deg < 0:
+        return "Below"
+    elif alt_deg < 20:
+        return "Low"
+    elif alt_deg < 50:
+        return "Mid"
+    else:
+        return "High"
+
+
+#
+#
+#
+def location_description(az, alt):
+    direction = azimuth_direction(az)
+    height = altitude_description(alt)
+    return f"{height:<5}, {direction:>3}"
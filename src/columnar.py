@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Columnar store for per-object, per-day positions (stars, exoplanets).
+
+The store is an uncompressed NumPy `.npz` holding:
+
+    meta      the JSON cache "_meta" (schema, observer location)
+    names     object names, one per row
+    metadata  one JSON object per row (everything the panel shows)
+    epoch     date ordinal of day column 0
+    az, alt   float32 arrays indexed [object, day offset from epoch]
+
+The generators write it with NumPy. Panels open it with the stdlib only: the
+archive members are stored uncompressed, so the reader memory-maps the file
+and unpacks just the cells it needs, keeping parse time and memory flat as
+the catalogs grow. `np.load()` still opens the file for debugging. Nothing
+is pickled.
+
+Run this module with a store file (and optionally a date) to dump it as JSON.
+"""
+
+import ast
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+import zipfile
+from datetime import date
+
+NPY_MAGIC = b"\x93NUMPY"
+ZIP_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+
+
+#
+# Write `rows` ({name: metadata}) and the day columns ({column: rows x days})
+# covering `days` days from `epoch`. Missing cells should be NaN.
+#
+def write_store(filename, rows, epoch, days, columns, meta=None):
+    import numpy as np
+
+    arrays = {
+        "meta": np.array(json.dumps(meta or {}), dtype=str),
+        "names": np.array(list(rows), dtype=str),
+        "metadata": np.array(
+            [json.dumps(metadata, ensure_ascii=False) for metadata in rows.values()],
+            dtype=str,
+        ),
+        "epoch": np.array(epoch.toordinal(), dtype="<i8"),
+    }
+    for column, values in columns.items():
+        arrays[column] = np.asarray(values, dtype="<f4").reshape(len(rows), days)
+
+    temp_filename = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_filename, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(temp_filename, filename)
+
+
+#
+# az/alt columns for `entries` over `days` days from `epoch`.
+# `get_position(entry, day)` returns the cached {"azimuth_deg", "altitude_deg"}
+# of an entry for a date, or None.
+#
+def build_columns(entries, epoch, days, get_position):
+    columns = {"az": [], "alt": []}
+    for entry in entries:
+        az, alt = [], []
+        for offset in range(days):
+            position = get_position(entry, date.fromordinal(epoch.toordinal() + offset))
+            position = position or {}
+            az.append(position.get("azimuth_deg", math.nan))
+            alt.append(position.get("altitude_deg", math.nan))
+        columns["az"].append(az)
+        columns["alt"].append(alt)
+    return columns
+
+
+#
+# Read-only view of a store written by write_store().
+#
+class ColumnarStore:
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, "rb")
+        try:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            with zipfile.ZipFile(self._file) as archive:
+                self._arrays = {
+                    info.filename[: -len(".npy")]: self._locate(info)
+                    for info in archive.infolist()
+                }
+        except Exception:
+            self._file.close()
+            raise
+
+        self.meta = (
+            json.loads(self._read_strings("meta")[0]) if "meta" in self._arrays else {}
+        )
+        self.names = self._read_strings("names")
+        self.epoch = date.fromordinal(self._read_scalar("epoch"))
+        self.days = self._arrays["az"][2][1]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._buffer.close()
+        self._file.close()
+
+    def __len__(self):
+        return len(self.names)
+
+    #
+    # (format, data offset, shape) of a stored, uncompressed .npy member.
+    #
+    def _locate(self, info):
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ValueError(f"Compressed member {info.filename} in {self.filename}")
+        header = ZIP_LOCAL_HEADER.unpack_from(self._buffer, info.header_offset)
+        offset = info.header_offset + ZIP_LOCAL_HEADER.size + header[-2] + header[-1]
+
+        if self._buffer[offset : offset + len(NPY_MAGIC)] != NPY_MAGIC:
+            raise ValueError(f"Not an .npy member: {info.filename}")
+        major = self._buffer[offset + 6]
+        if major == 1:
+            (length,) = struct.unpack_from("<H", self._buffer, offset + 8)
+            offset += 10
+        else:
+            (length,) = struct.unpack_from("<I", self._buffer, offset + 8)
+            offset += 12
+        npy_header = ast.literal_eval(
+            self._buffer[offset : offset + length].decode("latin1")
+        )
+        if npy_header["fortran_order"] or npy_header["descr"][0] not in "<|":
+            raise ValueError(f"Unsupported array layout: {info.filename}")
+        return npy_header["descr"], offset + length, npy_header["shape"]
+
+    def _read_scalar(self, name):
+        descr, offset, _ = self._arrays[name]
+        return struct.unpack_from(descr.replace("i8", "q"), self._buffer, offset)[0]
+
+    def _read_strings(self, name, start=0, stop=None):
+        descr, offset, shape = self._arrays[name]
+        width = int(descr[2:]) * 4
+        stop = (shape[0] if shape else 1) if stop is None else stop
+        return [
+            self._buffer[offset + i * width : offset + (i + 1) * width]
+            .decode("utf-32-le")
+            .rstrip("\0")
+            for i in range(start, stop)
+        ]
+
+    #
+    # Column offset of `day`, None outside the stored window.
+    #
+    def day_index(self, day):
+        index = day.toordinal() - self.epoch.toordinal()
+        return index if 0 <= index < self.days else None
+
+    def metadata(self, row):
+        return json.loads(self._read_strings("metadata", row, row + 1)[0])
+
+    #
+    # Value of `column` for one row and day, None when missing.
+    #
+    def value(self, column, row, day):
+        index = self.day_index(day)
+        if index is None:
+            return None
+        _, offset, shape = self._arrays[column]
+        (value,) = struct.unpack_from(
+            "<f", self._buffer, offset + (row * shape[1] + index) * 4
+        )
+        return None if math.isnan(value) else round(value, 2)
+
+
+#
+#
+#
+if __name__ == "__main__":
+    day = date.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else date.today()
+    with ColumnarStore(sys.argv[1]) as store:
+        dump = {
+            name: dict(
+                store.metadata(row),
+                azimuth_deg=store.value("az", row, day),
+                altitude_deg=store.value("alt", row, day),
+            )
+            for row, name in enumerate(store.names)
+        }
+    print(
+        json.dumps(
+            {"epoch": store.epoch.isoformat(), day.isoformat(): dump},
+            indent=2,
+            ensure_ascii=False,
+        )
+    )
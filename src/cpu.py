@@ -2,26 +2,91 @@
 
 import striker
 import exception
+import hostfacts
+import sensors
 
 # import argparse
 import psutil
 
 # import platform
-import time
-import subprocess
 
 
 #
 #
 #
 def get_cpu_model():
+    return hostfacts.get_host_facts()["cpu_model"]
+
+
+#
+# Read the aggregate and per-CPU jiffy counters and the boot time from /proc/stat.
+#
+def read_proc_stat(path="/proc/stat"):
+    boot_time = None
+    counters = {}
+    with open(path, "r") as f:
+        for line in f:
+            fields = line.split()
+            if fields and fields[0].startswith("cpu"):
+                counters[fields[0]] = [int(value) for value in fields[1:]]
+            elif fields and fields[0] == "btime":
+                boot_time = int(fields[1])
+    return boot_time, counters
+
+
+#
+# Busy percentage between two counter snapshots, None if the delta is unusable.
+# Fields: user nice system idle iowait irq softirq steal (guest is part of user).
+# A single field may step back (iowait does in normal operation), so each delta
+# is clamped at 0; only a total that goes back means the counters were reset.
+#
+def busy_percent(current, previous):
+    if len(current) != len(previous):
+        return None
+    if sum(current[:8]) < sum(previous[:8]):
+        return None  # counters wrapped or were reset
+    deltas = [max(0, now - before) for now, before in zip(current[:8], previous[:8])]
+    total = sum(deltas)
+    idle = deltas[3] + deltas[4]
+    if total <= 0:
+        return None
+    return 100.0 * (total - idle) / total
+
+
+#
+# CPU usage since the previous invocation, without sleeping.
+# The counters are persisted in FILE_CPU_SNAPSHOT; on the first run, after a
+# reboot or when a counter wraps the usage since boot is reported instead.
+#
+def sample_cpu_percent():
+    boot_time, counters = read_proc_stat()
     try:
-        result = subprocess.run(["lscpu"], capture_output=True, text=True)
-        for line in result.stdout.split("\n"):
-            if "Model name" in line:
-                return line.split(":")[1].strip()
-    except Exception as e:
-        return f"Error retrieving CPU model: {e}"
+        snapshot = striker.load_json(striker.FILE_CPU_SNAPSHOT)
+    except (FileNotFoundError, ValueError):
+        snapshot = {}
+    previous = {}
+    if snapshot.get("boot_time") == boot_time:
+        previous = snapshot.get("counters", {})
+
+    def percent(name):
+        current = counters[name]
+        value = None
+        if name in previous:
+            value = busy_percent(current, previous[name])
+        if value is None:
+            value = busy_percent(current, [0] * len(current))
+        return value or 0.0
+
+    cpu_names = sorted(
+        (name for name in counters if name != "cpu"), key=lambda n: int(n[3:])
+    )
+    cpu_usage = percent("cpu")
+    cpu_usages = [percent(name) for name in cpu_names]
+
+    striker.save_json_atomic(
+        striker.FILE_CPU_SNAPSHOT, {"boot_time": boot_time, "counters": counters}
+    )
+    return cpu_usage, cpu_usages
 
 
 #
@@ -29,23 +94,21 @@ def get_cpu_model():
 #
 def conky_cpu_usage():
     # Get CPU and temperature info
+    facts = hostfacts.get_host_facts()
     cpu_freq = psutil.cpu_freq()
-    cpu_count_physical = psutil.cpu_count(logical=False)
-    cpu_count_logical = psutil.cpu_count(logical=True)
-    cpu_usage = psutil.cpu_percent(interval=1, percpu=False)
-    cpu_usages = psutil.cpu_percent(interval=1, percpu=True)
+    cpu_count_physical = facts["cpu_count_physical"]
+    cpu_count_logical = facts["cpu_count_logical"]
+    cpu_usage, cpu_usages = sample_cpu_percent()
     cpu_slices = [cpu_usages[i : i + 8] for i in range(0, len(cpu_usages), 8)]
 
-    temps = psutil.sensors_temperatures()
-    cpu_temps = [
-        t.current for t in temps.get("coretemp", []) if t.label.startswith("Core ")
-    ]
-    overall_temp = sum(cpu_temps) / len(cpu_temps) if cpu_temps else 0.0
+    extra_kinds = [kind for kind in striker.CONKY_EXTRA_SENSORS.split(",") if kind]
+    (cpu_temps, core_temps), extra_sensors = sensors.read_sensors(extra_kinds)
+    overall_temp = sum(core_temps.values()) / len(core_temps) if core_temps else 0.0
 
     lines = []
     lines.append(
-        f"${{font}}${{goto 20}}${{color cyan}}Frequency: ${{alignr}}${{color white}}Min: {cpu_freq.min:.0f} MHz | "
-        f"Max: {cpu_freq.max:.0f} MHz | Current: {cpu_freq.current:.0f} MHz"
+        f"${{font}}${{goto 20}}${{color cyan}}Frequency: ${{alignr}}${{color white}}Min: {facts['cpu_freq_min']:.0f} MHz | "
+        f"Max: {facts['cpu_freq_max']:.0f} MHz | Current: {cpu_freq.current:.0f} MHz"
     )
     lines.append(
         f"${{goto 20}}${{color cyan}}Cores: (temperatures in °C)${{alignr}}${{color white}}Physical: {cpu_count_physical} (0-23)"
@@ -55,11 +118,10 @@ def conky_cpu_usage():
     for i, slice in enumerate(cpu_slices, start=0):
         output = f"${{goto 40}}${{color cyan}}{i*8:>2} - {(i+1)*8-1:>2}: ${{alignc}}"
         for j, usage in enumerate(slice, start=0):
-            core_index = i * len(slice) + j
-            temp = cpu_temps[core_index] if core_index < len(cpu_temps) else 0.0
+            cpu_index = i * 8 + j
+            temp = cpu_temps[cpu_index] if cpu_index < len(cpu_temps) else None
             color = striker.get_color_percent(usage)
-            if core_index < len(cpu_temps):
-                temp = cpu_temps[core_index]
+            if temp is not None:
                 t_color = striker.get_color_percent(temp)
                 temp_display = f"${{color {t_color}}}{temp:2.0f}°"
             else:
@@ -67,15 +129,33 @@ def conky_cpu_usage():
             output += f"${{color {color}}}{usage:>7.0f}%/{temp_display}"
         lines.append(output)
 
+    for kind, label, value in extra_sensors:
+        if value is None:
+            lines.append(striker.get_line_align_right(label, "${color grey}---"))
+        elif kind == "fan":
+            lines.append(striker.get_line_align_right(label, f"{value:,.0f} RPM"))
+        else:
+            color = striker.get_color_percent(value)
+            lines.append(
+                striker.get_line_align_right(label, f"${{color {color}}}{value:.0f}°C")
+            )
+
     return "\n".join(lines)
 
 
 #
 #
 #
-if __name__ == "__main__":
+def main():
     print(striker.get_section_title("CPU", get_cpu_model()))
     try:
         print(conky_cpu_usage())
     except exception.StrikerException as e:
         print(exception.StrikerException.get_message(e))
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
@@ -138,9 +138,16 @@ def get_definitions(toggle):
 #
 #
 #
-if __name__ == "__main__":
+def main():
     print(striker.get_section_title("Definitions", ""))
     try:
         print(get_definitions(get_toggle_suffix()))
     except exception.StrikerException as e:
         print(exception.StrikerException.get_message(e))
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
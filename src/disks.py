@@ -3,7 +3,44 @@
 import psutil
 import striker
 import exception
+import rates
+import remote
+import glob
 import os
+import threading
+import time
+
+SYS_BLOCK = "/sys/block"
+
+# Block devices that are not physical disks or would double count them
+VIRTUAL_DISK_PREFIXES = ("loop", "ram", "zram", "dm-")
+
+# File systems that reach over the network: their usage is reused for
+# CONKY_DISK_RESAMPLE seconds, local mounts are sampled on every refresh
+REMOTE_FSTYPES = {
+    "nfs",
+    "nfs4",
+    "cifs",
+    "smb3",
+    "smbfs",
+    "9p",
+    "afs",
+    "ceph",
+    "glusterfs",
+    "davfs",
+    "fuse.sshfs",
+    "fuse.rclone",
+}
+
+# Seconds the panel waits for the usage of its mounts; a network mount that is
+# slower shows its last cached usage, flagged stale
+DISK_DEADLINE_SECONDS = 2
+
+# Mounts whose statvfs is still running, and finished samples not saved yet;
+# a hung mount keeps one worker, the panel daemon saves its late sample
+_in_flight = set()
+_samples = {}
+_lock = threading.Lock()
 
 
 # Function to read mount points from a file
@@ -12,6 +49,121 @@ def read_mount_points(file_path):
         return [line.strip() for line in f.readlines() if line.strip()]
 
 
+#
+#
+#
+def get_usage_file():
+    return os.path.join(striker.CONKY_ASTRO_CACHE, "disk-usage.json")
+
+
+#
+# Last usage of each mount ({mountpoint: {total, used, percent, sampled_at}}).
+#
+def load_usage_cache():
+    try:
+        return striker.load_json(get_usage_file())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+#
+# Mount points on a remote file system, from the mount table.
+#
+def get_remote_mounts():
+    return {
+        partition.mountpoint
+        for partition in psutil.disk_partitions(all=True)
+        if partition.fstype in REMOTE_FSTYPES
+    }
+
+
+#
+# statvfs one mount into _samples, stamped with the time it returned; runs in
+# a worker that may hang.
+#
+def sample_mount(mountpoint):
+    try:
+        usage = psutil.disk_usage(mountpoint)
+        sample = {
+            "total": usage.total,
+            "used": usage.used,
+            "percent": usage.percent,
+            "sampled_at": time.time(),
+        }
+    except OSError as e:
+        sample = {"error": str(e) or type(e).__name__}
+    with _lock:
+        _samples[mountpoint] = sample
+        _in_flight.discard(mountpoint)
+
+
+#
+# Sample the usage of the mounts concurrently, waiting at most `deadline`
+# seconds for all of them. Mounts still running from an earlier call are not
+# sampled again. Returns the finished samples ({mountpoint: sample}, errors as
+# {"error": ...}), late ones of earlier calls included.
+#
+def sample_usage(mountpoints, deadline):
+    workers = []
+    with _lock:
+        for mountpoint in mountpoints:
+            if mountpoint in _in_flight:
+                continue
+            _in_flight.add(mountpoint)
+            workers.append(
+                threading.Thread(target=sample_mount, args=(mountpoint,), daemon=True)
+            )
+    for worker in workers:
+        worker.start()
+
+    end = time.monotonic() + deadline
+    for worker in workers:
+        worker.join(max(0.0, end - time.monotonic()))
+    with _lock:
+        samples = dict(_samples)
+        _samples.clear()
+    return samples
+
+
+#
+# Usage of every mount: fresh samples of the local mounts and of the remote
+# ones not sampled within CONKY_DISK_RESAMPLE seconds, the cached usage of the
+# others. Each mount gets (usage or None, reason it is stale or None).
+#
+def get_mount_usage(mountpoints, now=None):
+    now = time.time() if now is None else now
+    cache = load_usage_cache()
+    remote_mounts = get_remote_mounts()
+    due = [
+        mountpoint
+        for mountpoint in mountpoints
+        if mountpoint not in remote_mounts
+        or now - cache.get(mountpoint, {}).get("sampled_at", 0)
+        >= striker.CONKY_DISK_RESAMPLE
+    ]
+    samples = sample_usage(due, DISK_DEADLINE_SECONDS)
+
+    for mountpoint, sample in samples.items():
+        if "error" not in sample:
+            cache[mountpoint] = sample
+    if samples:
+        striker.save_json_atomic(get_usage_file(), cache)
+
+    results = {}
+    for mountpoint in mountpoints:
+        sample = samples.get(mountpoint)
+        if mountpoint not in due or (sample and "error" not in sample):
+            results[mountpoint] = (cache[mountpoint], None)
+        elif sample:
+            results[mountpoint] = (cache.get(mountpoint), sample["error"])
+        else:
+            results[mountpoint] = (
+                cache.get(mountpoint),
+                f"no reply in {DISK_DEADLINE_SECONDS}s",
+            )
+    return results
+
+
 #
 #
 #
@@ -19,20 +171,30 @@ def get_disk_usage():
     results = f"${{font}}"
     mountpoints_file = os.path.join(striker.CONKY_ASTRO_DATA, "mountpoints.txt")
     mountpoints = read_mount_points(mountpoints_file)
+    mount_usage = get_mount_usage(mountpoints)
 
     i = 1
     for mountpoint in mountpoints:
-        usage = psutil.disk_usage(mountpoint)
-        disk_color = striker.get_color_percent(usage.percent)
-        total = usage.total / striker.CONVERT_GB
-        used = usage.used / striker.CONVERT_GB
-        free = total - used
-        size = f"Size: {total:>5,.0f} GB"
-        free = f"Free: {free:>5,.0f} GB"
-        used = f"Used: {used:>5,.0f} GB ({usage.percent:3.0f}%)"
-        results += striker.get_line_align_right(
-            f"{mountpoint}", f"${{color {disk_color}}}{size} | {free} | {used}"
-        )
+        usage, reason = mount_usage[mountpoint]
+        if usage is None:
+            results += striker.get_line_align_right(
+                f"{mountpoint}", f"${{color red}}{reason}"
+            )
+        else:
+            disk_color = striker.get_color_percent(usage["percent"])
+            total = usage["total"] / striker.CONVERT_GB
+            used = usage["used"] / striker.CONVERT_GB
+            free = total - used
+            size = f"Size: {total:>5,.0f} GB"
+            free = f"Free: {free:>5,.0f} GB"
+            used = f"Used: {used:>5,.0f} GB ({usage['percent']:3.0f}%)"
+            label = f"{mountpoint}"
+            if reason:
+                age = remote.format_age(time.time() - usage["sampled_at"])
+                label += f" ${{color orange}}(stale {age})"
+            results += striker.get_line_align_right(
+                label, f"${{color {disk_color}}}{size} | {free} | {used}"
+            )
         if i < len(mountpoints):
             results += f"\n"
         i = i + 1
@@ -40,11 +202,65 @@ def get_disk_usage():
 
 
 #
+# Disks holding the members of md (software RAID) arrays; their I/O is
+# counted on the array. A member partition stands for its disk.
 #
+def get_raid_member_disks():
+    members = set()
+    for member in glob.glob(os.path.join(SYS_BLOCK, "md*", "slaves", "*")):
+        device = os.path.realpath(member)
+        if os.path.exists(os.path.join(device, "partition")):
+            device = os.path.dirname(device)
+        members.add(os.path.basename(device))
+    return members
+
+
 #
-if __name__ == "__main__":
+# Whole physical disks only: partitions are not listed in /sys/block, and the
+# disks of `raid_members` are counted on their array.
+#
+def is_physical_disk(name, raid_members=()):
+    return (
+        os.path.exists(os.path.join(SYS_BLOCK, name))
+        and not name.startswith(VIRTUAL_DISK_PREFIXES)
+        and name not in raid_members
+    )
+
+
+#
+# Read/write throughput since the previous refresh, summed over physical disks.
+#
+def get_disk_io():
+    raid_members = get_raid_member_disks()
+    counters = {
+        name: {"read_bytes": io.read_bytes, "write_bytes": io.write_bytes}
+        for name, io in psutil.disk_io_counters(perdisk=True).items()
+        if is_physical_disk(name, raid_members)
+    }
+    results = rates.update_rates("disks", counters)
+    read = striker.format_rate(rates.sum_rates(results, "read_bytes"), 1024**2, "MB/s")
+    write = striker.format_rate(
+        rates.sum_rates(results, "write_bytes"), 1024**2, "MB/s"
+    )
+    return striker.get_line_align_right(
+        f"I/O ({', '.join(sorted(counters))})", f"Read: {read} | Write: {write}"
+    )
+
+
+#
+#
+#
+def main():
     print(striker.get_section_title("Disks", ""))
     try:
         print(get_disk_usage())
+        print(get_disk_io())
     except exception.StrikerException as e:
         print(exception.StrikerException.get_message(e))
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 
-from astropy.coordinates import SkyCoord, AltAz
-from astropy.time import Time
-from astropy import units as u
 from datetime import datetime, timedelta
 import os
 import json
 import striker
+import astro
+import columnar
+import horizon
 import exception
 
 DISPLAY_COUNT = 8
@@ -26,19 +26,51 @@ def get_rotation_index(total):
     return index
 
 
+#
+# (location, [(name, data, az, alt)]) of the exoplanets to show on `day`, with
+# the az/alt cached for 00:00 UTC. Only the visible rows are read from the
+# columnar store; the JSON cache is the fallback.
+#
+def load_visible_exoplanets(day):
+    if os.path.exists(striker.FILE_EXOPLANET_POSITIONS):
+        with columnar.ColumnarStore(striker.FILE_EXOPLANET_POSITIONS) as store:
+            rows = list(range(len(store)))
+            start_index = get_rotation_index(len(rows))
+            return store.meta.get("location"), [
+                (
+                    store.names[row],
+                    store.metadata(row),
+                    store.value("az", row, day),
+                    store.value("alt", row, day),
+                )
+                for row in (rows[start_index:] + rows[:start_index])[:DISPLAY_COUNT]
+            ]
+
+    cache = striker.load_json_cached(striker.FILE_EXOPLANET_DATA)
+    location = cache.get(striker.CACHE_META_KEY, {}).get("location")
+    exoplanets = list(striker.get_cache_entries(cache).items())
+    start_index = get_rotation_index(len(exoplanets))
+    visible = []
+    for exoplanet, data in (exoplanets[start_index:] + exoplanets[:start_index])[
+        :DISPLAY_COUNT
+    ]:
+        obs = next(
+            (o for o in data["observations"] if o["date"] == day.isoformat()),
+            {},
+        )
+        visible.append(
+            (exoplanet, data, obs.get("azimuth_deg"), obs.get("altitude_deg"))
+        )
+    return location, visible
+
+
 def get_exoplanets():
     today = datetime.utcnow().date()
-    exoplanet_data = striker.load_json(striker.FILE_EXOPLANET_DATA)
-    exoplanets = list(exoplanet_data.items())
-    total = len(exoplanets)
 
-    # Rotation index for display paging
-    start_index = get_rotation_index(total)
-    visible = exoplanets[start_index:] + exoplanets[:start_index]
-    visible = visible[:DISPLAY_COUNT]
+    location, visible = load_visible_exoplanets(today)
 
     lines = []
-    for exoplanet, data in visible:
+    for exoplanet, data, az, alt in visible:
         try:
             mass = data.get("mass_earth", 0)
             distance = data.get("star_distance_ly", 0)
@@ -46,16 +78,14 @@ def get_exoplanets():
             exo_type = data.get("type", "")
             host_star = data.get("host_star", "")
             star_type = data.get("star_spectral_type", "")
-            spt_info = striker.parse_spectral_type(star_type)
+            spt_info = astro.parse_spectral_type(star_type)
 
-            obs = next(
-                (o for o in data["observations"] if o["date"] == today.isoformat()),
-                None,
-            )
+            # Live az/alt from the cached RA/Dec, else the 00:00 UTC position
+            live = horizon.current_position(data, location)
+            if live:
+                az, alt = live
             color = "lightgray"
-            if obs:
-                az = obs["azimuth_deg"]
-                alt = obs["altitude_deg"]
+            if az is not None and alt is not None:
                 color = "green" if alt > 0 else "lightgray"
             else:
                 az = "---"
@@ -77,7 +107,7 @@ def get_exoplanets():
     return "\n".join(lines)
 
 
-if __name__ == "__main__":
+def main():
     print(
         f"${{color yellow}}${{goto 20}}Exoplanet${{alignr}}| Host star           | Temperature   | Star type     | World Type    | Az   | Alt  | Distance     | Mass      "
     )
@@ -86,3 +116,10 @@ if __name__ == "__main__":
         print(get_exoplanets())
     except exception.StrikerException as e:
         print(exception.StrikerException.get_message(e))
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
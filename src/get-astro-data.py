@@ -1,15 +1,20 @@
 #!/usr/bin/env python3
 
+import argparse
 import os
+import subprocess
+import sys
+import horizon
+import solarstore
 import striker
-import json
 from datetime import datetime, timedelta
 from collections import defaultdict
 import numpy as np
 from skyfield.api import load, Topos, load_file
 from skyfield.almanac import find_discrete, sunrise_sunset, risings_and_settings
+from skyfield.functions import length_of, mxv
+from skyfield.positionlib import ICRF
 
-LOCATION = Topos(latitude_degrees=40.7, longitude_degrees=-111.9)  # Salt Lake City
 PLANETS = [
     "mercury",
     "venus",
@@ -21,8 +26,67 @@ PLANETS = [
     "neptune barycenter",
 ]
 
+# Number of days after today to compute
+DAYS = 90
+
+# Full kernel; only the excerpt below is loaded for the computations
+EPHEMERIS_URL = "https://ssd.jpl.nasa.gov/ftp/eph/planets/bsp/de422.bsp"
+# NAIF ids of the segments needed for the Sun, the Moon and PLANETS
+EPHEMERIS_TARGETS = [1, 2, 3, 4, 5, 6, 7, 8, 10, 199, 299, 301, 399, 499]
+# Days of margin excerpted on each side of the window, so the kernel is only
+# rebuilt every EPHEMERIS_PADDING_DAYS days
+EPHEMERIS_PADDING_DAYS = int(os.getenv("CONKY_EPH_PADDING_DAYS", "30"))
+
+# Precision of the sun, moon and planet positions (not of the rise/set times):
+#   full     skyfield apparent places (light time, aberration, deflection),
+#            alt/az from skyfield
+#   display  geometric topocentric vectors, alt/az from horizon.py; about 3x
+#            cheaper and well within the whole-degree panel display
+PRECISION_TIERS = ("display", "full")
+PRECISION = os.getenv("CONKY_ASTRO_PRECISION", "full")
+# Maximum difference of each stored field between "display" and "full",
+# including the rounding of the stored values. Checked over a year by
+# scripts/precision-validation.py.
+DISPLAY_MAX_ERRORS = {
+    "azimuth_deg": 0.05,
+    "altitude_deg": 0.05,
+    "right_ascension_hr": 0.003,
+    "declination_deg": 0.01,
+    "sun_declination": 0.01,
+    "moon_illumination_percent": 0.2,
+    "ra_hr": 0.002,
+    "dec_deg": 0.01,
+    "distance_au": 0.001,
+}
+
+# Bump when the fields stored per day change, cached days are then recomputed
+SCHEMA_VERSION = 4
+DAY_KEYS = (
+    "moon_illumination_percent",
+    "sun_declination",
+    "moon_phase",
+    "moon_emoji",
+    "planets",
+    "day_length",
+    "day_length_minutes",
+)
+
+# Sub-daily planet samples (RA/Dec and distance) from 00:00 to 24:00 UTC, so
+# the panel can interpolate the position at any time of the day
+HOURLY_SAMPLES = 25
+
 SUN_LABELS = {0: "sunset", 1: "sunrise"}
 MOON_LABELS = {0: "moonset", 1: "moonrise"}
+# Altitudes of rising and setting, as in skyfield's sunrise_sunset() (upper
+# limb, refracted) and risings_and_settings() (centre, refracted)
+SUN_HORIZON_DEG = -0.8333
+MOON_HORIZON_DEG = -34.0 / 60.0
+# Spacing of the shared altitude samples the crossings are bracketed on
+EVENT_STEP_MINUTES = 10
+# Half width of the bracket around an interpolated crossing, and the bisection
+# steps of its almanac refinement (0.5 s / 2**6, under 10 ms)
+EVENT_MARGIN_SECONDS = 0.25
+EVENT_REFINE_STEPS = 6
 
 
 def get_phase_info(angle):
@@ -44,110 +108,559 @@ def get_phase_info(angle):
         return ("waning_crescent", "🌘")
 
 
+#
+# Events per date, as "%H:%M" for display and "<label>_epoch" UTC seconds.
+#
 def group_events_by_date(times, events, labels):
     grouped = defaultdict(dict)
     for t, e in zip(times, events):
-        date = t.utc_datetime().date().isoformat()
+        moment = t.utc_datetime()
+        date = moment.date().isoformat()
         label = labels[e]
         grouped[date][label] = t.utc_strftime("%H:%M")
+        grouped[date][f"{label}_epoch"] = int(moment.timestamp())
     return grouped
 
 
-def ensure_ephemeris():
-    if not os.path.exists(striker.FILE_EPH_DATA):
-        eph = load("de422.bsp")
-        os.rename(eph.filename, striker.FILE_EPH_DATA)
-    return load_file(striker.FILE_EPH_DATA)
+#
+# Julian date of 00:00 UTC on a calendar date.
+#
+def get_julian_date(day):
+    return day.toordinal() + 1721424.5
 
 
-def collect_data():
-    eph = ensure_ephemeris()
-    ts = load.timescale()
-    observer = eph["earth"] + LOCATION
+#
+# True when the kernel holds every target over [start, end].
+#
+def kernel_covers(filename, start, end):
+    eph = load_file(filename)
+    try:
+        covered = {
+            segment.target
+            for segment in eph.spk.segments
+            if segment.start_jd <= get_julian_date(start)
+            and segment.end_jd >= get_julian_date(end)
+        }
+    finally:
+        eph.close()
+    return set(EPHEMERIS_TARGETS) <= covered
 
-    today = datetime.utcnow().date()
-    start = ts.utc(today.year, today.month, today.day)
-    end = ts.utc(today.year, today.month, today.day + 90)
 
-    sun_times, sun_events = find_discrete(start, end, sunrise_sunset(eph, LOCATION))
-    moon_times, moon_events = find_discrete(
-        start, end, risings_and_settings(eph, eph["moon"], LOCATION)
+#
+# Write a compact SPK holding only EPHEMERIS_TARGETS over [start, end]. The
+# segments are cut from the full kernel when it is cached, otherwise jplephem
+# fetches just the needed byte ranges from the JPL server.
+#
+def excerpt_ephemeris(start, end):
+    source = striker.FILE_EPH_DATA
+    if not os.path.exists(source):
+        source = EPHEMERIS_URL
+    temp_filename = f"{striker.FILE_EPH_EXCERPT}.tmp"
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "jplephem",
+            "excerpt",
+            "--targets",
+            ",".join(str(target) for target in EPHEMERIS_TARGETS),
+            start.strftime("%Y/%m/%d"),
+            end.strftime("%Y/%m/%d"),
+            source,
+            temp_filename,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    os.replace(temp_filename, striker.FILE_EPH_EXCERPT)
+    print(
+        f"✅ Ephemeris excerpt {start} - {end} written to: {striker.FILE_EPH_EXCERPT}"
     )
 
-    sun_data = group_events_by_date(sun_times, sun_events, SUN_LABELS)
-    moon_data = group_events_by_date(moon_times, moon_events, MOON_LABELS)
-
-    daily_data = defaultdict(dict)
-    for date in set(list(sun_data.keys()) + list(moon_data.keys())):
-        daily_data[date].update(sun_data.get(date, {}))
-        daily_data[date].update(moon_data.get(date, {}))
-
-    current = today
-    while current <= (today + timedelta(days=90)):
-        date_str = current.isoformat()
-        t = ts.utc(current.year, current.month, current.day)
-
-        sun_pos = observer.at(t).observe(eph["sun"]).apparent()
-        moon_pos = observer.at(t).observe(eph["moon"]).apparent()
-
-        phase_angle = sun_pos.separation_from(moon_pos).degrees
-        illumination = (1 + np.cos(np.radians(phase_angle))) / 2 * 100
-        phase_name, emoji = get_phase_info(phase_angle)
-
-        _, sun_dec, _ = sun_pos.radec()
-        sun_declination = round(sun_dec.degrees, 4)
-
-        sunrise = daily_data[date_str].get("sunrise")
-        sunset = daily_data[date_str].get("sunset")
-        day_length = "--:--"
-        if sunrise and sunset:
-            try:
-                sr = datetime.strptime(sunrise, "%H:%M")
-                ss = datetime.strptime(sunset, "%H:%M")
-                delta = ss - sr
-                if delta.total_seconds() < 0:
-                    delta += timedelta(days=1)
-                hours, rem = divmod(delta.total_seconds(), 3600)
-                minutes = int(rem // 60)
-                day_length = f"{int(hours)}:{minutes:02d}"
-            except Exception:
-                pass
-
-        daily_data[date_str].update(
-            {
-                "moon_illumination_percent": round(illumination, 1),
-                "sun_declination": sun_declination,
-                "day_length": day_length,
-                "moon_phase": phase_name,
-                "moon_emoji": emoji,
-            }
+
+#
+# Load the trimmed kernel, re-excerpting it (with EPHEMERIS_PADDING_DAYS on
+# both sides) when it no longer spans [start, end].
+#
+def ensure_ephemeris(start=None, end=None):
+    start = start or datetime.utcnow().date()
+    end = end or start + timedelta(days=DAYS + 1)
+    if not os.path.exists(striker.FILE_EPH_EXCERPT) or not kernel_covers(
+        striker.FILE_EPH_EXCERPT, start, end
+    ):
+        padding = timedelta(days=EPHEMERIS_PADDING_DAYS)
+        excerpt_ephemeris(start - padding, end + padding)
+    return load_file(striker.FILE_EPH_EXCERPT)
+
+
+#
+# Day length in minutes between sunrise and sunset as displayed, i.e. rounded
+# to the minute like solarstore.format_time(), -1 without both.
+#
+def get_day_length_minutes(sunrise_epoch, sunset_epoch):
+    if sunrise_epoch is None or sunset_epoch is None:
+        return -1
+    return ((sunset_epoch + 30) // 60 - (sunrise_epoch + 30) // 60) % 1440
+
+
+#
+# Cache metadata of a site and precision tier, so incremental runs never mix
+# sites or tiers.
+#
+def get_cache_meta(site, precision):
+    return {
+        "schema": SCHEMA_VERSION,
+        "location": striker.get_site_location(site),
+        "precision": precision,
+    }
+
+
+#
+# Skyfield location of an observer site from striker.load_observer_sites().
+#
+def get_topos(site):
+    return Topos(
+        latitude_degrees=site["latitude"],
+        longitude_degrees=site["longitude"],
+        elevation_m=site["height_m"],
+    )
+
+
+#
+# Skyfield times at `hours` (UTC) of every date in `dates`, date-major.
+#
+def get_times(ts, dates, hours):
+    return ts.utc(
+        np.repeat([d.year for d in dates], len(hours)),
+        np.repeat([d.month for d in dates], len(hours)),
+        np.repeat([d.day for d in dates], len(hours)),
+        np.tile(hours, len(dates)),
+    )
+
+
+#
+# Rotate the vectors `xyz` (3 x n) by the angles `angle` (radians) about the z
+# or y axis, as a change of frame.
+#
+def rotate_z(xyz, angle):
+    x, y, z = xyz
+    cos, sin = np.cos(angle), np.sin(angle)
+    return np.array([x * cos + y * sin, y * cos - x * sin, z])
+
+
+def rotate_y(xyz, angle):
+    x, y, z = xyz
+    cos, sin = np.cos(angle), np.sin(angle)
+    return np.array([x * cos - z * sin, y, x * sin + z * cos])
+
+
+#
+# Geocentric ICRF position of a site at `t` for the "display" tier: the site's
+# ITRS vector turned by the Greenwich mean sidereal time and precessed back to
+# J2000 with the IAU 1976 angles of horizon.py. Nutation, most of the cost of
+# placing the observer, is left out; the position is within 0.3 km of
+# skyfield's.
+#
+def get_display_observer_at(site, t):
+    topos = get_topos(site)
+    xyz = np.repeat(np.reshape(topos.itrs_xyz.au, (3, 1)), len(t.tt), axis=1)
+    xyz = rotate_z(xyz, -np.radians(horizon.gmst_deg(t.ut1)))
+
+    zeta, z, theta = horizon.precession_angles(t.tt)
+    xyz = rotate_z(rotate_y(rotate_z(xyz, z), -theta), zeta)
+    return ICRF(xyz, t=t, center=399, target=topos)
+
+
+#
+# Geocentric positions of `bodies` at `t`, computed once and shared by every
+# site in the "display" tier. The "full" tier observes each body from each
+# site instead, since light time and aberration depend on the observer.
+#
+def get_geocentric_positions(eph, bodies, t, precision):
+    if precision == "full":
+        return {}
+    earth_at = eph["earth"].at(t)
+    return {body: eph[body].at(t) - earth_at for body in bodies}
+
+
+#
+# The site's observer at `t`: barycentric for the "full" tier, geocentric (to
+# offset the shared positions) for the "display" tier. In the "full" tier the
+# precession and nutation of `t` are computed once and reused by every site.
+#
+def get_observer_at(eph, site, t, precision):
+    if precision == "full":
+        return (eph["earth"] + get_topos(site)).at(t)
+    return get_display_observer_at(site, t)
+
+
+#
+# Position of `body` seen by the observer: the apparent place for the "full"
+# tier, the geometric vector for the "display" tier. Both offer radec() and
+# separation_from().
+#
+def observe_body(eph, observer_at, body, geocentric, precision):
+    if precision == "full":
+        return observer_at.observe(eph[body]).apparent()
+    return geocentric[body] - observer_at
+
+
+#
+# Azimuth and altitude arrays (degrees) of a position from observe_body().
+#
+def get_altaz(position, t, precision, site):
+    if precision == "full":
+        alt, az, _ = position.altaz()
+        return az.degrees, alt.degrees
+    ra, dec, _ = position.radec()
+    timestamps = (t.ut1 - horizon.JD_UNIX_EPOCH) * 86400.0
+    altaz = [
+        horizon.equatorial_to_horizontal(
+            ra_hr * 15, dec_deg, site["latitude"], site["longitude"], timestamp
         )
+        for ra_hr, dec_deg, timestamp in zip(ra.hours, dec.degrees, timestamps)
+    ]
+    return np.array([az for az, _ in altaz]), np.array([alt for _, alt in altaz])
 
-        planets_info = {}
-        for planet_name in PLANETS:
-            planet = eph[planet_name]
-            app = observer.at(t).observe(planet).apparent()
 
-            alt, az, distance = app.altaz()
-            ra, dec, _ = app.radec()
-            dist_au = distance.au
+#
+# Sun, moon and planet positions of one site at the times `t` (00:00 UTC of
+# every date in `dates`). Each body is evaluated once over the Time array.
+#
+def compute_site_positions(eph, site, t, dates, geocentric, precision):
+    observer_at = get_observer_at(eph, site, t, precision)
+
+    sun_pos = observe_body(eph, observer_at, "sun", geocentric, precision)
+    moon_pos = observe_body(eph, observer_at, "moon", geocentric, precision)
+
+    phase_angles = sun_pos.separation_from(moon_pos).degrees
+    illuminations = (1 + np.cos(np.radians(phase_angles))) / 2 * 100
+    _, sun_dec, _ = sun_pos.radec()
+
+    planet_positions = {}
+    for planet_name in PLANETS:
+        position = observe_body(eph, observer_at, planet_name, geocentric, precision)
+        az, alt = get_altaz(position, t, precision, site)
+        ra, dec, _ = position.radec()
+        planet_positions[planet_name] = (az, alt, ra.hours, dec.degrees)
 
+    positions = {}
+    for i, current in enumerate(dates):
+        phase_name, emoji = get_phase_info(phase_angles[i])
+        planets_info = {}
+        for planet_name, (az, alt, ra, dec) in planet_positions.items():
             planets_info[planet_name] = {
-                "azimuth_deg": round(az.degrees, 2),
-                "altitude_deg": round(alt.degrees, 2),
-                "right_ascension_hr": round(ra.hours, 3),
-                "declination_deg": round(dec.degrees, 3),
-                # "distance_au": round(dist_au, 5),
+                "azimuth_deg": round(float(az[i]), 2),
+                "altitude_deg": round(float(alt[i]), 2),
+                "right_ascension_hr": round(float(ra[i]), 3),
+                "declination_deg": round(float(dec[i]), 3),
             }
+        positions[current.isoformat()] = {
+            "moon_illumination_percent": round(float(illuminations[i]), 1),
+            "sun_declination": round(float(sun_dec.degrees[i]), 4),
+            "moon_phase": phase_name,
+            "moon_emoji": emoji,
+            "planets": planets_info,
+        }
+    return positions
+
+
+#
+# Positions at 00:00 UTC of every date in `dates` for every site, as
+# {site name: {date: {...}}}. The times (and in the display tier the body
+# positions) are shared; only the observer differs per site.
+#
+def compute_daily_positions(eph, ts, sites, dates, precision="full"):
+    t = get_times(ts, dates, [0])
+    geocentric = get_geocentric_positions(eph, ["sun", "moon"] + PLANETS, t, precision)
+    return {
+        site["name"]: compute_site_positions(eph, site, t, dates, geocentric, precision)
+        for site in sites
+    }
+
+
+#
+# Hourly RA/Dec and distance of every planet for each site and date, as
+# {site name: {date: {planet: {"ra_hr": [...], "dec_deg": [...],
+# "distance_au": [...]}}}}. All dates and hours are one Time array, shared by
+# every site.
+#
+def compute_hourly_samples(eph, ts, sites, dates, precision="full"):
+    t = get_times(ts, dates, np.arange(HOURLY_SAMPLES))
+    geocentric = get_geocentric_positions(eph, PLANETS, t, precision)
+
+    samples = {}
+    for site in sites:
+        observer_at = get_observer_at(eph, site, t, precision)
+        site_samples = {d.isoformat(): {} for d in dates}
+        for planet_name in PLANETS:
+            position = observe_body(
+                eph, observer_at, planet_name, geocentric, precision
+            )
+            ra, dec, distance = position.radec()
+            shape = (len(dates), HOURLY_SAMPLES)
+            ra = np.round(ra.hours.reshape(shape), 5).tolist()
+            dec = np.round(dec.degrees.reshape(shape), 4).tolist()
+            distance = np.round(distance.au.reshape(shape), 5).tolist()
+            for i, current in enumerate(dates):
+                site_samples[current.isoformat()][planet_name] = {
+                    "ra_hr": ra[i],
+                    "dec_deg": dec[i],
+                    "distance_au": distance[i],
+                }
+        samples[site["name"]] = site_samples
+    return samples
+
+
+#
+# Cubic through the samples y[0..3] at -1, 0, 1, 2, evaluated at x.
+#
+def interpolate_cubic(y, x):
+    return (
+        -y[0] * x * (x - 1) * (x - 2) / 6
+        + y[1] * (x + 1) * (x - 1) * (x - 2) / 2
+        - y[2] * (x + 1) * x * (x - 2) / 2
+        + y[3] * (x + 1) * x * (x - 1) / 6
+    )
 
-        daily_data[date_str]["planets"] = planets_info
-        current += timedelta(days=1)
 
-    with open(striker.FILE_SOLAR_SYSTEM_DATA, "w") as f:
-        json.dump(daily_data, f, indent=2)
+#
+# Minutes (after 00:00 UTC of `first`) at which the altitudes `height` (minus
+# the horizon, sampled every EVENT_STEP_MINUTES at `minutes`) change sign, and
+# whether the body rises there. Each crossing is bisected on a cubic through
+# the four surrounding samples: (estimates, rising, grid index).
+#
+def interpolate_crossings(minutes, height):
+    up = height > 0
+    index = np.flatnonzero(up[:-1] != up[1:])
+    index = index[(index >= 1) & (index + 2 < len(height))]
+    samples = np.stack([height[index + k] for k in (-1, 0, 1, 2)])
+    low = np.zeros(len(index))
+    high = np.ones(len(index))
+    for _ in range(30):
+        middle = (low + high) / 2
+        below = (interpolate_cubic(samples, middle) > 0) == up[index]
+        low = np.where(below, middle, low)
+        high = np.where(below, high, middle)
+    estimates = minutes[index] + (low + high) / 2 * EVENT_STEP_MINUTES
+    return estimates, up[index + 1], index
 
-    print(f"✅ 3-month solar system data written to: {striker.FILE_SOLAR_SYSTEM_DATA}")
+
+#
+# Refine the crossings of the almanac function `is_up` (sunrise_sunset() or
+# risings_and_settings()) to the time it changes state. Each estimate is
+# bracketed by EVENT_MARGIN_SECONDS and bisected EVENT_REFINE_STEPS times, all
+# crossings in one call per step; a bracket the almanac does not confirm falls
+# back to find_discrete() over its grid interval. Returns (Time, events).
+#
+def refine_crossings(ts, first, minutes, is_up, estimates, rising, index):
+    def at(values):
+        return ts.utc(first.year, first.month, first.day, 0, values)
+
+    margin = EVENT_MARGIN_SECONDS / 60
+    low, high = estimates - margin, estimates + margin
+    states = is_up(at(np.concatenate([low, high])))
+    confirmed = (states[: len(low)] != rising) & (states[len(low) :] == rising)
+    low, high = low[confirmed], high[confirmed]
+    for _ in range(EVENT_REFINE_STEPS):
+        middle = (low + high) / 2
+        reached = is_up(at(middle)) == rising[confirmed]
+        high = np.where(reached, middle, high)
+        low = np.where(reached, low, middle)
+
+    values = list((low + high) / 2)
+    events = list(rising[confirmed].astype(int))
+    for i in index[~confirmed]:
+        times, found = find_discrete(at(minutes[i]), at(minutes[i + 1]), is_up)
+        values.extend((times.tt - at(0).tt) * 1440)
+        events.extend(found)
+    order = np.argsort(values)
+    return at(np.array(values)[order]), np.array(events, dtype=int)[order]
+
+
+#
+# Rise/set events of every site from the first date to the end of the last
+# one, as {site name: (sun events, moon events)} (see group_events_by_date).
+# The geocentric apparent Sun and Moon are computed once on an
+# EVENT_STEP_MINUTES grid; each site only subtracts its own position and
+# rotates to its horizon to bracket the crossings, which the almanac functions
+# then refine.
+#
+def find_events(eph, ts, sites, dates):
+    first = dates[0]
+    span = ((dates[-1] - first).days + 1) * 1440
+    # Two samples of margin before the first date and three after the last
+    minutes = np.arange(
+        -2 * EVENT_STEP_MINUTES, span + 3 * EVENT_STEP_MINUTES, EVENT_STEP_MINUTES
+    )
+    t = ts.utc(first.year, first.month, first.day, 0, minutes)
+    earth_at = eph["earth"].at(t)
+    geocentric = {
+        body: earth_at.observe(eph[body]).apparent().position.au
+        for body in ("sun", "moon")
+    }
+
+    events = {}
+    for site in sites:
+        topos = get_topos(site)
+        rotation = topos.rotation_at(t)
+        offset = topos.at(t).position.au
+        searches = (
+            ("sun", SUN_HORIZON_DEG, sunrise_sunset(eph, topos), SUN_LABELS),
+            (
+                "moon",
+                MOON_HORIZON_DEG,
+                risings_and_settings(eph, eph["moon"], topos),
+                MOON_LABELS,
+            ),
+        )
+        site_events = []
+        for body, horizon_deg, is_up, labels in searches:
+            local = mxv(rotation, geocentric[body] - offset)
+            height = np.degrees(np.arcsin(local[2] / length_of(local))) - horizon_deg
+            times, found = refine_crossings(
+                ts, first, minutes, is_up, *interpolate_crossings(minutes, height)
+            )
+            inside = (times.tt >= t[2].tt) & (times.tt < t[-3].tt)
+            site_events.append(
+                group_events_by_date(times[inside], found[inside], labels)
+            )
+        events[site["name"]] = tuple(site_events)
+    return events
+
+
+#
+# A cached day can be reused when every computed field is present.
+#
+def is_complete(day):
+    return (
+        day is not None
+        and all(key in day for key in DAY_KEYS)
+        and all(
+            planet in day["planets"] and "hourly" in day["planets"][planet]
+            for planet in PLANETS
+        )
+    )
+
+
+#
+# Merge the events, positions and samples of one site into its cached days.
+#
+def build_days(positions, samples, sun_data, moon_data):
+    daily_data = {}
+    for date_str, values in positions.items():
+        for planet_name, hourly in samples[date_str].items():
+            values["planets"][planet_name]["hourly"] = hourly
+        day = {}
+        day.update(sun_data.get(date_str, {}))
+        day.update(moon_data.get(date_str, {}))
+        day.update(values)
+        day["day_length_minutes"] = get_day_length_minutes(
+            day.get("sunrise_epoch"), day.get("sunset_epoch")
+        )
+        day["day_length"] = solarstore.format_day_length(day["day_length_minutes"])
+        daily_data[date_str] = day
+    return daily_data
+
+
+#
+# Rise/set events and positions for `dates` at every site, as
+# {site name: {date: day}}. All sites are evaluated in one pass over shared
+# time arrays.
+#
+def compute_days(eph, ts, sites, dates, precision="full"):
+    events = find_events(eph, ts, sites, dates)
+    positions = compute_daily_positions(eph, ts, sites, dates, precision)
+    samples = compute_hourly_samples(eph, ts, sites, dates, precision)
+    return {
+        site["name"]: build_days(
+            positions[site["name"]],
+            samples[site["name"]],
+            *events[site["name"]],
+        )
+        for site in sites
+    }
+
+
+#
+# Write the solar-system cache of every observer site (or of `sites`, from
+# striker.load_observer_sites()) for today and the next DAYS days. In
+# incremental mode the days already in a site's cache are reused; expired days
+# are dropped and the days missing at any site (or built for another schema,
+# location or precision tier) are computed for all of them in one pass.
+#
+def collect_data(incremental=False, precision=PRECISION, sites=None):
+    sites = sites or striker.load_observer_sites()
+    today = datetime.utcnow().date()
+    dates = [today + timedelta(days=i) for i in range(DAYS + 1)]
+
+    site_data = {}
+    for site in sites:
+        cached = {}
+        if incremental:
+            cached = striker.load_cache(
+                striker.get_site_file(striker.FILE_SOLAR_SYSTEM_DATA, site),
+                get_cache_meta(site, precision),
+            )
+        site_data[site["name"]] = {
+            d.isoformat(): cached[d.isoformat()]
+            for d in dates
+            if is_complete(cached.get(d.isoformat()))
+        }
+    missing = [
+        d
+        for d in dates
+        if any(d.isoformat() not in daily_data for daily_data in site_data.values())
+    ]
+
+    if missing:
+        eph = ensure_ephemeris(missing[0], missing[-1] + timedelta(days=1))
+        ts = load.timescale()
+        for name, days in compute_days(eph, ts, sites, missing, precision).items():
+            site_data[name].update(days)
+
+    for site in sites:
+        data_file = striker.get_site_file(striker.FILE_SOLAR_SYSTEM_DATA, site)
+        store_file = striker.get_site_file(striker.FILE_SOLAR_SYSTEM_STORE, site)
+        daily_data = dict(sorted(site_data[site["name"]].items()))
+        os.makedirs(site["cache_dir"], exist_ok=True)
+        striker.save_cache(data_file, get_cache_meta(site, precision), daily_data)
+        solarstore.write_store(
+            store_file,
+            daily_data,
+            PLANETS,
+            HOURLY_SAMPLES,
+            striker.get_site_location(site),
+        )
+        print(
+            f"✅ 3-month solar system data for {site['name']} ({len(missing)} of "
+            f"{len(dates)} days computed, {precision} precision) "
+            f"written to: {data_file} and {store_file}"
+        )
 
 
 if __name__ == "__main__":
-    collect_data()
+    parser = argparse.ArgumentParser(description="Generate the solar-system cache.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="reuse cached days and only compute the missing ones",
+    )
+    parser.add_argument(
+        "--precision",
+        choices=PRECISION_TIERS,
+        default=PRECISION,
+        help="position precision tier (default: $CONKY_ASTRO_PRECISION or full)",
+    )
+    parser.add_argument(
+        "--site",
+        action="append",
+        dest="sites",
+        help="only generate this observer site (repeatable, default: every site)",
+    )
+    args = parser.parse_args()
+    try:
+        sites = striker.load_observer_sites(args.sites)
+    except ValueError as e:
+        parser.error(str(e))
+    collect_data(args.incremental, args.precision, sites)
@@ -1,19 +1,28 @@
 #!/usr/bin/env python3
 
+import altazgrid
+import argparse
+import columnar
 import striker
 import random
 import os
-import json
 from datetime import datetime, timedelta
 from astroquery.utils.tap.core import TapPlus
-from astropy.coordinates import SkyCoord, AltAz, EarthLocation
 from astropy.time import Time
-from astropy import units as u
 import numpy.ma as ma
 import math
 
-# Location for Az/Alt calculations (Salt Lake City, UT)
-location = EarthLocation(lat=40.7 * u.deg, lon=-111.9 * u.deg, height=1500 * u.m)
+DAYS = 90
+
+# Bump when the fields stored per exoplanet change, the selection is then rebuilt
+SCHEMA_VERSION = 1
+
+
+#
+# Cache metadata of an observer site from striker.load_observer_sites().
+#
+def get_cache_meta(site):
+    return {"schema": SCHEMA_VERSION, "location": striker.get_site_location(site)}
 
 
 def classify_world_type(mass_earth):
@@ -61,8 +70,7 @@ def apparent_brightness_lsun(luminosity_lsun, distance_pc):
 
 
 # TAP query: fetch 1000 nearest exoplanets
-tap = TapPlus(url="https://exoplanetarchive.ipac.caltech.edu/TAP")
-query = """
+QUERY = """
 SELECT TOP 1000
     pl_name, pl_bmassj, pl_bmasse, pl_orbsmax, ra, dec, hostname,
     st_teff, st_rad, st_mass, sy_dist, st_spectype
@@ -71,24 +79,24 @@ WHERE pl_bmasse IS NOT NULL AND sy_dist IS NOT NULL AND st_spectype IS NOT NULL
 ORDER BY sy_dist ASC
 """
 
-# tap = TapPlus(url="https://exoplanetarchive.ipac.caltech.edu/TAP")
-job = tap.launch_job(query)
-table = job.get_results()
 
-# Shuffle & select 36 random exoplanets
-rows = list(table)
-random.shuffle(rows)
-selected = rows[:36]
-exoplanet_data = {}
+#
+# Shuffle & select 36 random exoplanets from the nearest 1000
+#
+def select_exoplanets(count=36):
+    tap = TapPlus(url="https://exoplanetarchive.ipac.caltech.edu/TAP")
+    job = tap.launch_job(QUERY)
+    table = job.get_results()
 
-# Build 90-day observation window
-today = datetime.utcnow().date()
-dates = [today + timedelta(days=i) for i in range(90)]
+    rows = list(table)
+    random.shuffle(rows)
+    return rows[:count]
 
-# for row in table:
-for row in selected:
-    pl_name = row["pl_name"]
-    coord = SkyCoord(ra=row["ra"] * u.deg, dec=row["dec"] * u.deg)
+
+#
+#
+#
+def build_world(row):
     host_star = row["hostname"]
     mass_jup = get_safe(row["pl_bmassj"], ndigits=4)
     mass_earth = get_safe(row["pl_bmasse"], ndigits=2)
@@ -109,7 +117,7 @@ for row in selected:
     lum_lsun = luminosity_relative_to_sun(radius_rsun, temp_k)
     app_brightness = apparent_brightness_lsun(lum_lsun, distance_pc)
 
-    world = {
+    return {
         "host_star": host_star,
         "mass_jupiter": mass_jup,
         "mass_earth": mass_earth,
@@ -121,28 +129,163 @@ for row in selected:
         "star_distance_pc": distance_pc,
         "star_distance_ly": distance_ly,
         "star_spectral_type": spectral_type,
+        "ra_deg": float(row["ra"]),
+        "dec_deg": float(row["dec"]),
         "observations": [],
     }
 
-    for dt in dates:
-        time = Time(dt.isoformat() + " 00:00:00")
-        altaz = coord.transform_to(AltAz(obstime=time, location=location))
-        world["observations"].append(
-            {
-                "date": dt.isoformat(),
-                "azimuth_deg": round(altaz.az.deg, 2),
-                "altitude_deg": round(altaz.alt.deg, 2),
-            }
+
+#
+# Add the observations of `dates` missing from each site's worlds
+# ({site name: {name: world}}, the same worlds at every site), sorted by date,
+# and return how many were computed. All sites, worlds and days are
+# transformed at once.
+#
+def compute_observations(site_worlds, sites, dates):
+    known = {
+        site["name"]: [
+            {o["date"] for o in world["observations"]}
+            for world in site_worlds[site["name"]].values()
+        ]
+        for site in sites
+    }
+    missing = [
+        dt
+        for dt in dates
+        if any(
+            dt.isoformat() not in dates_known
+            for site_known in known.values()
+            for dates_known in site_known
+        )
+    ]
+    catalog = site_worlds[sites[0]["name"]]
+    computed = 0
+    if catalog and missing:
+        az, alt = altazgrid.compute_altaz_grid(
+            [world["ra_deg"] for world in catalog.values()],
+            [world["dec_deg"] for world in catalog.values()],
+            Time([dt.isoformat() + " 00:00:00" for dt in missing]),
+            sites,
         )
+        for s, site in enumerate(sites):
+            worlds = site_worlds[site["name"]]
+            for i, world in enumerate(worlds.values()):
+                for j, dt in enumerate(missing):
+                    if dt.isoformat() not in known[site["name"]][i]:
+                        world["observations"].append(
+                            {
+                                "date": dt.isoformat(),
+                                "azimuth_deg": round(float(az[s, i, j]), 2),
+                                "altitude_deg": round(float(alt[s, i, j]), 2),
+                            }
+                        )
+                        computed += 1
+
+    for worlds in site_worlds.values():
+        for world in worlds.values():
+            world["observations"].sort(key=lambda o: o["date"])
+    return computed
 
-    exoplanet_data[pl_name] = world
 
-# Sort by distance (parsecs)
-sorted_data = dict(
-    sorted(exoplanet_data.items(), key=lambda kv: kv[1]["star_distance_pc"] or 9999)
-)
+#
+# Write the exoplanet cache of every observer site (or of `sites`) for the next
+# DAYS days. Every site shares one selection. In incremental mode a cached
+# selection is kept (no archive query), expired days are dropped and only the
+# days missing at a site are computed.
+#
+def collect_exoplanets(incremental=False, sites=None):
+    sites = sites or striker.load_observer_sites()
+    today = datetime.utcnow().date()
+    dates = [today + timedelta(days=i) for i in range(DAYS)]
+    window = {dt.isoformat() for dt in dates}
 
-with open(striker.FILE_EXOPLANET_DATA, "w") as f:
-    json.dump(sorted_data, f, indent=2)
+    cached = {site["name"]: {} for site in sites}
+    if incremental:
+        for site in sites:
+            cached[site["name"]] = striker.load_cache(
+                striker.get_site_file(striker.FILE_EXOPLANET_DATA, site),
+                get_cache_meta(site),
+            )
+    selection = next((data for data in cached.values() if data), None)
+    if selection is None:
+        selection = {row["pl_name"]: build_world(row) for row in select_exoplanets()}
 
-print(f"✅ Exoplanet data for 90 days written to: {striker.FILE_EXOPLANET_DATA}")
+    site_worlds = {}
+    for site in sites:
+        site_cache = cached[site["name"]]
+        site_worlds[site["name"]] = {
+            pl_name: dict(
+                world,
+                observations=[
+                    o
+                    for o in site_cache.get(pl_name, {}).get("observations", [])
+                    if o["date"] in window
+                ],
+            )
+            for pl_name, world in selection.items()
+        }
+    computed = compute_observations(site_worlds, sites, dates)
+
+    for site in sites:
+        # Sort by distance (parsecs)
+        sorted_data = dict(
+            sorted(
+                site_worlds[site["name"]].items(),
+                key=lambda kv: kv[1]["star_distance_pc"] or 9999,
+            )
+        )
+        data_file = striker.get_site_file(striker.FILE_EXOPLANET_DATA, site)
+        store_file = striker.get_site_file(striker.FILE_EXOPLANET_POSITIONS, site)
+        os.makedirs(site["cache_dir"], exist_ok=True)
+        striker.save_cache(data_file, get_cache_meta(site), sorted_data)
+        columnar.write_store(
+            store_file,
+            {
+                pl_name: {
+                    key: value for key, value in world.items() if key != "observations"
+                }
+                for pl_name, world in sorted_data.items()
+            },
+            today,
+            DAYS,
+            columnar.build_columns(
+                [
+                    {o["date"]: o for o in world["observations"]}
+                    for world in sorted_data.values()
+                ],
+                today,
+                DAYS,
+                lambda observations, day: observations.get(day.isoformat()),
+            ),
+            get_cache_meta(site),
+        )
+        print(
+            f"✅ Exoplanet data for {site['name']} written to: {data_file} and "
+            f"{store_file}"
+        )
+
+    print(
+        f"✅ 90 days of {len(selection)} exoplanets for {len(sites)} site(s), "
+        f"{computed} observations computed"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the exoplanet cache.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="keep the cached selection and only compute the missing days",
+    )
+    parser.add_argument(
+        "--site",
+        action="append",
+        dest="sites",
+        help="only generate this observer site (repeatable, default: every site)",
+    )
+    args = parser.parse_args()
+    try:
+        sites = striker.load_observer_sites(args.sites)
+    except ValueError as e:
+        parser.error(str(e))
+    collect_exoplanets(args.incremental, sites)
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 
-import json
+import altazgrid
+import argparse
+import columnar
+import os
 import striker
 from datetime import datetime, timedelta
-from astropy.coordinates import SkyCoord, AltAz, EarthLocation
+from astropy.coordinates import SkyCoord
 from astropy.time import Time
 from astropy import units as u
 from astroquery.simbad import Simbad
@@ -33,61 +36,201 @@ brightest_stars = [
     ("Kitalpha", "Equuleus", "Little Horse"),
 ]
 
-# Observer location and times
-location = EarthLocation(lat=40.5142 * u.deg, lon=-112.0325 * u.deg, height=1500 * u.m)
-now = datetime.utcnow()
-dates = [now + timedelta(days=i) for i in range(90)]
+DAYS = 90
 
-# Configure Simbad to include required fields
-Simbad.reset_votable_fields()
-Simbad.add_votable_fields("ra", "dec", "flux(V)", "sp", "plx")
+# Bump when the fields stored per star change, cached stars are then re-queried
+SCHEMA_VERSION = 2
 
 
-results = {}
+#
+# Cache metadata of an observer site from striker.load_observer_sites().
+#
+def get_cache_meta(site):
+    return {"schema": SCHEMA_VERSION, "location": striker.get_site_location(site)}
 
-# Query each star
-for star_name, constellation, meaning in brightest_stars:
+
+#
+# Look a star up in Simbad, None when it is not found.
+#
+def query_star(star_name, constellation, meaning):
+    result = Simbad.query_object(star_name)
+    if result is None:
+        print(f"❌ Not found: {star_name}")
+        return None
+
+    ra = result["ra"][0]
+    dec = result["dec"][0]
+    mag = float(result["V"][0]) if result["V"].mask is False else None
+    sp_type = result["sp_type"][0]
+    plx = result["plx_value"][0]
+    distance_pc = 1000.0 / plx if plx and plx > 0 else None
+    distance_ly = round(distance_pc * 3.26156, 2) if distance_pc else None
+
+    coord = SkyCoord(ra=ra, dec=dec, unit=(u.hourangle, u.deg))
+
+    return {
+        "constellation": constellation,
+        "meaning": meaning,
+        "spectral_type": sp_type,
+        "visual_mag": mag,
+        "distance_ly": distance_ly,
+        "coordinates": {"ra": ra, "dec": dec},
+        "ra_deg": float(coord.ra.deg),
+        "dec_deg": float(coord.dec.deg),
+        "daily_positions": {},
+    }
+
+
+#
+# Fill the days of `dates` missing from the daily_positions of each site's
+# stars ({site name: {star name: star}}, the same stars at every site) and
+# return the number of days computed per star over all sites. All sites,
+# stars and days are transformed at once.
+#
+def compute_daily_positions(site_stars, sites, dates):
+    keys = [dt.isoformat() for dt in dates]
+    missing = [
+        j
+        for j, key in enumerate(keys)
+        if any(
+            key not in star["daily_positions"]
+            for stars in site_stars.values()
+            for star in stars.values()
+        )
+    ]
+    catalog = site_stars[sites[0]["name"]]
+    computed = {name: 0 for name in catalog}
+    if not catalog or not missing:
+        return computed
+
+    az, alt = altazgrid.compute_altaz_grid(
+        [star["ra_deg"] for star in catalog.values()],
+        [star["dec_deg"] for star in catalog.values()],
+        Time([dates[j].isoformat() + " 00:00:00" for j in missing]),
+        sites,
+    )
+    for s, site in enumerate(sites):
+        for i, (name, star) in enumerate(site_stars[site["name"]].items()):
+            daily = star["daily_positions"]
+            for k, j in enumerate(missing):
+                if keys[j] not in daily:
+                    daily[keys[j]] = {
+                        "azimuth_deg": round(float(az[s, i, k]), 2),
+                        "altitude_deg": round(float(alt[s, i, k]), 2),
+                    }
+                    computed[name] += 1
+    return computed
+
+
+#
+# Write the star cache of every observer site (or of `sites`) for the next DAYS
+# days. The catalog is shared: stars cached at any site are not queried again.
+# In incremental mode expired days are dropped and only the days missing at a
+# site are computed.
+#
+def collect_stars(incremental=False, sites=None):
+    sites = sites or striker.load_observer_sites()
+    today = datetime.utcnow().date()
+    dates = [today + timedelta(days=i) for i in range(DAYS)]
+    window = {dt.isoformat() for dt in dates}
+
+    # Configure Simbad to include required fields
+    Simbad.reset_votable_fields()
+    Simbad.add_votable_fields("ra", "dec", "flux(V)", "sp", "plx")
+
+    cached = {site["name"]: {} for site in sites}
+    if incremental:
+        for site in sites:
+            cached[site["name"]] = striker.load_cache(
+                striker.get_site_file(striker.FILE_STAR_DATA, site),
+                get_cache_meta(site),
+            )
+
+    site_stars = {site["name"]: {} for site in sites}
+
+    # Query each star
+    for star_name, constellation, meaning in brightest_stars:
+        try:
+            star = next(
+                (stars[star_name] for stars in cached.values() if star_name in stars),
+                None,
+            )
+            if star is None:
+                star = query_star(star_name, constellation, meaning)
+                if star is None:
+                    continue
+            for site in sites:
+                positions = (
+                    cached[site["name"]].get(star_name, {}).get("daily_positions", {})
+                )
+                site_stars[site["name"]][star_name] = dict(
+                    star,
+                    constellation=constellation,
+                    meaning=meaning,
+                    daily_positions={
+                        day: position
+                        for day, position in positions.items()
+                        if day in window
+                    },
+                )
+        except Exception as e:
+            print(f"❌ Error with {star_name}: {e}")
+
+    computed = compute_daily_positions(site_stars, sites, dates)
+    for star_name, star in site_stars[sites[0]["name"]].items():
+        print(
+            f"✅ {star_name} ({star['constellation']}) {computed[star_name]} days "
+            f"computed for {len(sites)} site(s)"
+        )
+
+    # Save to JSON and to the columnar store read by the panel, per site
+    for site in sites:
+        results = site_stars[site["name"]]
+        for star in results.values():
+            star["daily_positions"] = dict(sorted(star["daily_positions"].items()))
+        data_file = striker.get_site_file(striker.FILE_STAR_DATA, site)
+        store_file = striker.get_site_file(striker.FILE_STAR_POSITIONS, site)
+        os.makedirs(site["cache_dir"], exist_ok=True)
+        striker.save_cache(data_file, get_cache_meta(site), results)
+        columnar.write_store(
+            store_file,
+            {
+                name: {
+                    key: value
+                    for key, value in star.items()
+                    if key != "daily_positions"
+                }
+                for name, star in results.items()
+            },
+            dates[0].date(),
+            DAYS,
+            columnar.build_columns(
+                results.values(),
+                dates[0].date(),
+                DAYS,
+                lambda star, day: star["daily_positions"].get(day.isoformat()),
+            ),
+            get_cache_meta(site),
+        )
+        print(f"✅ Star data for {site['name']} saved to {data_file} and {store_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the star cache.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="reuse cached stars and days and only compute the missing days",
+    )
+    parser.add_argument(
+        "--site",
+        action="append",
+        dest="sites",
+        help="only generate this observer site (repeatable, default: every site)",
+    )
+    args = parser.parse_args()
     try:
-        result = Simbad.query_object(star_name)
-        if result is None:
-            print(f"❌ Not found: {star_name}")
-            continue
-
-        ra = result["ra"][0]
-        dec = result["dec"][0]
-        mag = float(result["V"][0]) if result["V"].mask is False else None
-        sp_type = result["sp_type"][0]
-        plx = result["plx_value"][0]
-        distance_pc = 1000.0 / plx if plx and plx > 0 else None
-        distance_ly = round(distance_pc * 3.26156, 2) if distance_pc else None
-
-        coord = SkyCoord(ra=ra, dec=dec, unit=(u.hourangle, u.deg))
-
-        daily = {}
-        for dt in dates:
-            t = Time(dt)
-            altaz = coord.transform_to(AltAz(obstime=t, location=location))
-            daily[dt.strftime("%Y-%m-%d")] = {
-                "azimuth_deg": round(altaz.az.deg, 2),
-                "altitude_deg": round(altaz.alt.deg, 2),
-            }
-
-        results[star_name] = {
-            "constellation": constellation,
-            "meaning": meaning,
-            "spectral_type": sp_type,
-            "visual_mag": mag,
-            "distance_ly": distance_ly,
-            "coordinates": {"ra": ra, "dec": dec},
-            "daily_positions": daily,
-        }
-
-        print(f"✅ {star_name} ({constellation})")
-    except Exception as e:
-        print(f"❌ Error with {star_name}: {e}")
-
-# Save to JSON
-with open(striker.FILE_STAR_DATA, "w") as f:
-    json.dump(results, f, indent=2)
-
-print(f"\n✅ Star data saved to {striker.FILE_STAR_DATA}")
+        sites = striker.load_observer_sites(args.sites)
+    except ValueError as e:
+        parser.error(str(e))
+    collect_stars(args.incremental, sites)
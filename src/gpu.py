@@ -1,24 +1,25 @@
 #!/usr/bin/env python3
 
-import GPUtil
 import striker
 import exception
+import hostfacts
 
 
 #
 #
 #
 def conky_gpu_model():
-    gpus = GPUtil.getGPUs()
-    for gpu in gpus:
-        return gpu.name
-    return ""
+    gpu_names = hostfacts.get_host_facts()["gpu_names"]
+    return gpu_names[0] if gpu_names else ""
 
 
 #
 #
 #
 def conky_gpu_usage():
+    # Imported here: the model line only needs the cached host facts
+    import GPUtil
+
     results = f"${{font}}"
 
     gpus = GPUtil.getGPUs()
@@ -41,9 +42,16 @@ def conky_gpu_usage():
 #
 #
 #
-if __name__ == "__main__":
+def main():
     print(striker.get_section_title("GPU", conky_gpu_model()))
     try:
         print(conky_gpu_usage())
     except exception.StrikerException as e:
         print(exception.StrikerException.get_message(e))
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Equatorial to horizontal coordinates for fixed objects, fast enough to run on
+every panel refresh.
+
+RA/Dec (J2000) are precessed to the date (IAU 1976), the hour angle comes from
+the Greenwich mean sidereal time (IAU 1982) and the observer longitude, and
+the altitude can optionally be corrected for atmospheric refraction (Bennett).
+Nutation, aberration and UT1-UTC are ignored; scripts/horizon-validation.py
+bounds the resulting error against astropy.
+
+Only the math module is used so the panels stay within their import budget.
+"""
+
+import math
+import time
+
+# Julian date of the Unix epoch and of J2000.0
+JD_UNIX_EPOCH = 2440587.5
+JD_J2000 = 2451545.0
+ARCSEC = 1.0 / 3600.0
+DEG2RAD = math.pi / 180.0
+
+
+#
+#
+#
+def julian_date(timestamp):
+    return timestamp / 86400.0 + JD_UNIX_EPOCH
+
+
+#
+# Greenwich mean sidereal time in degrees.
+#
+def gmst_deg(jd):
+    d = jd - JD_J2000
+    t = d / 36525.0
+    gmst = 280.46061837 + 360.98564736629 * d + 0.000387933 * t * t - t**3 / 38710000.0
+    return gmst % 360.0
+
+
+#
+# IAU 1976 precession angles zeta, z and theta (radians) from J2000 to `jd`.
+# Plain arithmetic, so `jd` may also be a numpy array.
+#
+def precession_angles(jd):
+    t = (jd - JD_J2000) / 36525.0
+    zeta = (2306.2181 * t + 0.30188 * t * t + 0.017998 * t**3) * ARCSEC
+    z = (2306.2181 * t + 1.09468 * t * t + 0.018203 * t**3) * ARCSEC
+    theta = (2004.3109 * t - 0.42665 * t * t - 0.041833 * t**3) * ARCSEC
+    return zeta * DEG2RAD, z * DEG2RAD, theta * DEG2RAD
+
+
+#
+# Precess J2000 RA/Dec (degrees) to the mean equator and equinox of `jd`.
+#
+def precess_from_j2000(ra_deg, dec_deg, jd):
+    zeta, z, theta = precession_angles(jd)
+
+    ra = math.radians(ra_deg)
+    dec = math.radians(dec_deg)
+    a = math.cos(dec) * math.sin(ra + zeta)
+    b = math.cos(theta) * math.cos(dec) * math.cos(ra + zeta) - math.sin(
+        theta
+    ) * math.sin(dec)
+    c = math.sin(theta) * math.cos(dec) * math.cos(ra + zeta) + math.cos(
+        theta
+    ) * math.sin(dec)
+    return (
+        math.degrees(math.atan2(a, b) + z) % 360.0,
+        math.degrees(math.asin(max(-1.0, min(1.0, c)))),
+    )
+
+
+#
+# Refraction in degrees to add to a geometric altitude (Bennett / Saemundsson),
+# scaled for pressure and temperature. Zero well below the horizon.
+#
+def refraction_deg(alt_deg, pressure_hpa=1010.0, temperature_c=10.0):
+    if alt_deg < -1.0:
+        return 0.0
+    arcmin = 1.02 / math.tan(math.radians(alt_deg + 10.3 / (alt_deg + 5.11)))
+    return arcmin / 60.0 * (pressure_hpa / 1010.0) * (283.0 / (273.0 + temperature_c))
+
+
+#
+# (azimuth, altitude) in degrees, azimuth from north through east, of a J2000
+# RA/Dec for an observer at `latitude`/`longitude` (east positive) at
+# `timestamp` (Unix seconds, default now).
+#
+def equatorial_to_horizontal(
+    ra_deg, dec_deg, latitude, longitude, timestamp=None, refraction=False
+):
+    jd = julian_date(time.time() if timestamp is None else timestamp)
+    ra, dec = precess_from_j2000(ra_deg, dec_deg, jd)
+
+    hour_angle = math.radians(gmst_deg(jd) + longitude - ra)
+    dec = math.radians(dec)
+    lat = math.radians(latitude)
+
+    sin_alt = math.sin(lat) * math.sin(dec) + math.cos(lat) * math.cos(dec) * math.cos(
+        hour_angle
+    )
+    alt = math.degrees(math.asin(max(-1.0, min(1.0, sin_alt))))
+    az = math.degrees(
+        math.atan2(
+            -math.sin(hour_angle) * math.cos(dec),
+            math.cos(lat) * math.sin(dec)
+            - math.sin(lat) * math.cos(dec) * math.cos(hour_angle),
+        )
+    )
+    if refraction:
+        alt += refraction_deg(alt)
+    return az % 360.0, alt
+
+
+#
+# Live (azimuth, altitude) of a cache entry holding ra_deg/dec_deg for the
+# cache location ({"latitude", "longitude"}), None when either is missing.
+#
+def current_position(entry, location, timestamp=None, refraction=True):
+    if not location or entry.get("ra_deg") is None or entry.get("dec_deg") is None:
+        return None
+    return equatorial_to_horizontal(
+        entry["ra_deg"],
+        entry["dec_deg"],
+        location["latitude"],
+        location["longitude"],
+        timestamp,
+        refraction,
+    )
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Static host facts (CPU model, core topology, frequency limits, GPU names and
+total memory) collected once per boot and cached in CONKY_ASTRO_CACHE.
+
+The cache is keyed on the kernel boot id and a cheap hardware signature, so it
+is rebuilt automatically after a reboot or when CPUs or memory change.
+"""
+
+import os
+import subprocess
+import psutil
+import striker
+
+_host_facts = None
+
+
+#
+# CPU count and installed memory, both readable without spawning anything.
+#
+def get_hardware_signature():
+    with open("/proc/meminfo", "r") as f:
+        mem_total = f.readline().split()[1]
+    return f"{os.cpu_count()}:{mem_total}"
+
+
+#
+#
+#
+def read_cpu_model():
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    try:
+        result = subprocess.run(["lscpu"], capture_output=True, text=True)
+        for line in result.stdout.split("\n"):
+            if "Model name" in line:
+                return line.split(":")[1].strip()
+    except Exception as e:
+        return f"Error retrieving CPU model: {e}"
+    return ""
+
+
+#
+#
+#
+def read_gpu_names():
+    try:
+        import GPUtil
+
+        return [gpu.name for gpu in GPUtil.getGPUs()]
+    except Exception:
+        return []
+
+
+#
+#
+#
+def collect_host_facts():
+    cpu_freq = psutil.cpu_freq()
+    return {
+        "boot_id": striker.get_boot_id(),
+        "hardware_signature": get_hardware_signature(),
+        "cpu_model": read_cpu_model(),
+        "cpu_count_physical": psutil.cpu_count(logical=False),
+        "cpu_count_logical": psutil.cpu_count(logical=True),
+        "cpu_freq_min": cpu_freq.min if cpu_freq else 0.0,
+        "cpu_freq_max": cpu_freq.max if cpu_freq else 0.0,
+        "gpu_names": read_gpu_names(),
+        "memory_total": psutil.virtual_memory().total,
+    }
+
+
+#
+#
+#
+def is_current(facts):
+    return (
+        facts is not None
+        and facts.get("boot_id") == striker.get_boot_id()
+        and facts.get("hardware_signature") == get_hardware_signature()
+    )
+
+
+#
+# Return the host facts, collecting them only when the cache is missing or stale.
+#
+def get_host_facts():
+    global _host_facts
+    if is_current(_host_facts):
+        return _host_facts
+
+    try:
+        facts = striker.load_json(striker.FILE_HOST_FACTS)
+    except (FileNotFoundError, ValueError):
+        facts = None
+    if not is_current(facts):
+        facts = collect_host_facts()
+        striker.save_json_atomic(striker.FILE_HOST_FACTS, facts, indent=2)
+
+    _host_facts = facts
+    return facts
+
+
+#
+#
+#
+if __name__ == "__main__":
+    for key, value in get_host_facts().items():
+        print(f"{key:<20} {value}")
@@ -1,8 +1,20 @@
 #!/usr/bin/env python3
 
-import psutil
 import striker
 import exception
+import hostfacts
+
+
+#
+# The fields of /proc/meminfo in bytes ({"MemAvailable": ..., ...}).
+#
+def read_meminfo(path="/proc/meminfo"):
+    values = {}
+    with open(path, "r") as f:
+        for line in f:
+            fields = line.split()
+            values[fields[0].rstrip(":")] = int(fields[1]) * 1024
+    return values
 
 
 #
@@ -11,18 +23,22 @@ import exception
 def get_memory_usage():
     results = f"${{font}}"
 
-    memory = psutil.virtual_memory()
-    memory_size = memory.total / striker.CONVERT_GB
-    memory_used = memory.used / striker.CONVERT_GB
+    # The total is a per-boot host fact; only the changing values are read,
+    # used as in psutil.virtual_memory() (total minus available)
+    meminfo = read_meminfo()
+    memory_total = hostfacts.get_host_facts()["memory_total"]
+    available = meminfo.get("MemAvailable", meminfo["MemFree"])
+    memory_size = memory_total / striker.CONVERT_GB
+    memory_used = (memory_total - available) / striker.CONVERT_GB
     memory_free = memory_size - memory_used
-    memory_percent = (memory.used / memory.total) * 100
+    memory_percent = (memory_total - available) / memory_total * 100
     memory_color = striker.get_color_percent(memory_percent)
 
-    swap = psutil.swap_memory()
-    swap_size = swap.total / striker.CONVERT_GB
-    swap_used = swap.used / striker.CONVERT_GB
+    swap_total = meminfo["SwapTotal"]
+    swap_size = swap_total / striker.CONVERT_GB
+    swap_used = (swap_total - meminfo["SwapFree"]) / striker.CONVERT_GB
     swap_free = swap_size - swap_used
-    swap_percent = (swap.used / swap.total) * 100
+    swap_percent = swap_used / swap_size * 100 if swap_total else 0.0
     swap_color = striker.get_color_percent(swap_percent)
 
     results += (
@@ -42,9 +58,16 @@ def get_memory_usage():
 #
 #
 #
-if __name__ == "__main__":
+def main():
     print(striker.get_section_title("Memory", ""))
     try:
         print(get_memory_usage())
     except exception.StrikerException as e:
         print(exception.StrikerException.get_message(e))
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
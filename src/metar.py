@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Bulk METAR weather source of the airports panel.
+
+One METAR cycle file (the aviationweather.gov CSV cache, gzipped or not) covers
+every reporting station. It is downloaded from CONKY_METAR_URL, or read from
+the newest *.csv / *.csv.gz file dropped in CONKY_METAR_DIR, and parsed in one
+streaming pass into a dict keyed by ICAO code. Each station is converted to the
+OpenWeather fields display_weather() reads. A downloaded cycle is kept in
+memory for CYCLE_SECONDS, a dropped file until a newer one appears.
+"""
+
+import argparse
+import csv
+import glob
+import gzip
+import io
+import json
+import os
+import threading
+import time
+from datetime import datetime
+import requests
+import striker
+
+# The upstream cache is rebuilt every minute from hourly (and special) reports
+CYCLE_SECONDS = 300
+
+# Sky cover codes, ranked so the most covering layer describes the sky
+SKY_COVER = {
+    "SKC": (0, "clear sky"),
+    "CLR": (0, "clear sky"),
+    "CAVOK": (0, "clear sky"),
+    "FEW": (1, "few clouds"),
+    "SCT": (2, "scattered clouds"),
+    "BKN": (3, "broken clouds"),
+    "OVC": (4, "overcast clouds"),
+    "OVX": (5, "obscured sky"),
+}
+
+# Present weather (wx_string) descriptors and phenomena
+WEATHER_DESCRIPTORS = {
+    "MI": "shallow",
+    "PR": "partial",
+    "BC": "patches of",
+    "DR": "drifting",
+    "BL": "blowing",
+    "SH": "showers of",
+    "TS": "thunderstorm with",
+    "FZ": "freezing",
+    "VC": "nearby",
+}
+WEATHER_PHENOMENA = {
+    "DZ": "drizzle",
+    "RA": "rain",
+    "SN": "snow",
+    "SG": "snow grains",
+    "IC": "ice crystals",
+    "PL": "ice pellets",
+    "GR": "hail",
+    "GS": "small hail",
+    "UP": "precipitation",
+    "BR": "mist",
+    "FG": "fog",
+    "FU": "smoke",
+    "VA": "volcanic ash",
+    "DU": "dust",
+    "SA": "sand",
+    "HZ": "haze",
+    "PO": "dust whirls",
+    "SQ": "squalls",
+    "FC": "funnel cloud",
+    "SS": "sandstorm",
+    "DS": "duststorm",
+}
+SNOW_PHENOMENA = {"SN", "SG", "IC", "PL", "GR", "GS"}
+RAIN_PHENOMENA = {"DZ", "RA", "UP"}
+
+# Stations of the last cycle, where they came from and when they were loaded
+_stations = None
+_source = None
+_loaded_at = None
+_lock = threading.Lock()
+
+
+#
+# Numeric CSV field, None when empty ("10+" miles of visibility reads as 10).
+#
+def get_number(value):
+    value = value.strip().rstrip("+")
+    return float(value) if value else None
+
+
+#
+# Readable description of a present weather group such as "-SHRA" or "VCFG".
+#
+def describe_weather_group(group):
+    words = []
+    if group[:1] in "-+":
+        words.append("light" if group[0] == "-" else "heavy")
+        group = group[1:]
+    codes = [group[i : i + 2] for i in range(0, len(group), 2)]
+    for code in codes:
+        words.append(WEATHER_DESCRIPTORS.get(code) or WEATHER_PHENOMENA.get(code, code))
+    if words and words[-1] in WEATHER_DESCRIPTORS.values():
+        # A descriptor on its own: "TS" is a thunderstorm, "SH" showers
+        words[-1] = words[-1].split()[0]
+    return " ".join(words)
+
+
+#
+# OpenWeather-style reply of one CSV row, None when the report lacks the
+# temperature, dew point or pressure.
+#
+def get_station_weather(row, columns):
+    def field(name):
+        index = columns.get(name)
+        return row[index] if index is not None and index < len(row) else ""
+
+    temp_c = get_number(field("temp_c"))
+    dew_c = get_number(field("dewpoint_c"))
+    altimeter_inhg = get_number(field("altim_in_hg"))
+    sea_level_hpa = get_number(field("sea_level_pressure_mb"))
+    if (
+        temp_c is None
+        or dew_c is None
+        or (altimeter_inhg is None and sea_level_hpa is None)
+    ):
+        return None
+
+    pressure = sea_level_hpa
+    if altimeter_inhg is not None:
+        pressure = striker.inches_of_mercury_to_hectopascals(altimeter_inhg)
+    weather = {
+        "main": {
+            "temp": temp_c,
+            "humidity": round(striker.relative_humidity_percent(temp_c, dew_c)),
+            "pressure": round(pressure, 1),
+        },
+        "wind": {},
+        "name": field("station_id"),
+        "metar": field("raw_text"),
+    }
+
+    observed = field("observation_time")
+    if observed:
+        weather["dt"] = int(
+            datetime.fromisoformat(observed.replace("Z", "+00:00")).timestamp()
+        )
+
+    wind_speed_kt = get_number(field("wind_speed_kt"))
+    if wind_speed_kt is not None:
+        weather["wind"]["speed"] = round(
+            striker.knots_to_meters_per_second(wind_speed_kt), 2
+        )
+    wind_dir = field("wind_dir_degrees").strip()
+    if wind_dir.isdigit():
+        weather["wind"]["deg"] = int(wind_dir)
+
+    visibility_mi = get_number(field("visibility_statute_mi"))
+    if visibility_mi is not None:
+        weather["visibility"] = round(striker.miles_to_meters(visibility_mi))
+
+    # Present weather first, then the most covering cloud layer
+    groups = field("wx_string").split()
+    descriptions = [describe_weather_group(group) for group in groups]
+    covers = [SKY_COVER[row[i]] for i in columns["sky_cover"] if row[i] in SKY_COVER]
+    if covers:
+        descriptions.append(max(covers)[1])
+    weather["weather"] = [{"description": ", ".join(descriptions) or "unknown"}]
+
+    # Precipitation since the last hourly report, as rain or snow
+    phenomena = {group.lstrip("-+")[i : i + 2] for group in groups for i in (0, 2, 4)}
+    precip_in = get_number(field("precip_in"))
+    if phenomena & (SNOW_PHENOMENA | RAIN_PHENOMENA):
+        kind = "snow" if phenomena & SNOW_PHENOMENA else "rain"
+        weather[kind] = {"1h": (precip_in or 0.0) * 25.4}
+    return weather
+
+
+#
+# Parse the lines of a METAR cycle CSV into {ICAO code: weather}. Lines before
+# the header row (the cache's "No errors" preamble) are skipped.
+#
+def parse_metars(lines):
+    stations = {}
+    columns = None
+    for row in csv.reader(lines):
+        if columns is None:
+            if row and row[0] == "raw_text":
+                columns = {name: i for i, name in enumerate(row)}
+                columns["sky_cover"] = [
+                    i for i, name in enumerate(row) if name == "sky_cover"
+                ]
+            continue
+        if len(row) <= columns["station_id"]:
+            continue
+        weather = get_station_weather(row, columns)
+        if weather is not None:
+            stations[weather["name"]] = weather
+    if columns is None:
+        raise ValueError("no METAR header row")
+    return stations
+
+
+#
+# Text lines of a binary stream, gunzipped when it starts with the gzip magic.
+#
+def get_lines(stream):
+    stream = io.BufferedReader(stream)
+    if stream.peek(2)[:2] == b"\x1f\x8b":
+        stream = gzip.GzipFile(fileobj=stream)
+    return io.TextIOWrapper(stream, encoding="utf-8", errors="replace", newline="")
+
+
+#
+# Newest METAR file dropped in CONKY_METAR_DIR, None when it is not set.
+#
+def get_drop_file():
+    if not striker.CONKY_METAR_DIR:
+        return None
+    files = glob.glob(os.path.join(striker.CONKY_METAR_DIR, "*.csv")) + glob.glob(
+        os.path.join(striker.CONKY_METAR_DIR, "*.csv.gz")
+    )
+    if not files:
+        raise FileNotFoundError(f"No METAR file in {striker.CONKY_METAR_DIR}")
+    return max(files, key=os.path.getmtime)
+
+
+#
+# Stations of the current cycle, downloaded with `session` (connect and read
+# `timeout`) or read from the drop directory, and reused until it is replaced.
+#
+def get_stations(session, timeout, now=None):
+    global _stations, _source, _loaded_at
+    now = time.time() if now is None else now
+    with _lock:
+        drop_file = get_drop_file()
+        if drop_file is not None:
+            source = (drop_file, os.path.getmtime(drop_file))
+            if _stations is None or source != _source:
+                with open(drop_file, "rb") as stream:
+                    _stations = parse_metars(get_lines(stream))
+                _source, _loaded_at = source, now
+            return _stations
+
+        source = striker.CONKY_METAR_URL
+        if _stations is None or source != _source or now - _loaded_at >= CYCLE_SECONDS:
+            with session.get(source, timeout=timeout, stream=True) as response:
+                response.raise_for_status()
+                # Undo any transfer encoding, and keep reads after the end of
+                # the body (the gzip trailer check) from hitting a closed file
+                response.raw.decode_content = True
+                response.raw.auto_close = False
+                _stations = parse_metars(get_lines(response.raw))
+            _source, _loaded_at = source, now
+        return _stations
+
+
+#
+# Print the weather of stations from the current cycle.
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("stations", nargs="+", help="ICAO codes, e.g. KSLC")
+    args = parser.parse_args()
+
+    stations = get_stations(requests.Session(), (3.05, 30))
+    for code in args.stations:
+        print(json.dumps(stations.get(code.upper()), indent=2))
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
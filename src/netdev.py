@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Network interface counters from one read of /proc/net/dev.
+
+The interfaces are selected with the glob patterns of CONKY_NET_INTERFACES
+(comma separated, "!" excludes), so a VPN link that is down simply drops out
+of the sample instead of failing the panel. By default only the physical links
+are counted; tunnels and virtual links would count the same traffic twice.
+Per-interface rates come from rates.py; interfaces that appear get no rate
+until their second sample, and an interface that comes back with reset
+counters starts over the same way.
+"""
+
+import argparse
+import fnmatch
+import striker
+import rates
+
+NET_DEV_FILE = "/proc/net/dev"
+
+# Columns of a /proc/net/dev line after the interface name (psutil's names)
+FIELDS = {
+    "bytes_recv": 0,
+    "packets_recv": 1,
+    "errin": 2,
+    "dropin": 3,
+    "bytes_sent": 8,
+    "packets_sent": 9,
+    "errout": 10,
+    "dropout": 11,
+}
+
+
+#
+# Included and excluded glob patterns of a CONKY_NET_INTERFACES value.
+#
+def get_patterns(spec=None):
+    spec = striker.CONKY_NET_INTERFACES if spec is None else spec
+    patterns = [pattern.strip() for pattern in spec.split(",") if pattern.strip()]
+    include = [pattern for pattern in patterns if not pattern.startswith("!")]
+    exclude = [pattern[1:] for pattern in patterns if pattern.startswith("!")]
+    return include, exclude
+
+
+#
+#
+#
+def is_selected(name, include, exclude):
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in include) and not any(
+        fnmatch.fnmatchcase(name, pattern) for pattern in exclude
+    )
+
+
+#
+# Counters ({interface: {field: value}}) of the selected interfaces in the
+# lines of a /proc/net/dev file. The two header lines have no colon.
+#
+def parse_net_dev(lines, spec=None):
+    include, exclude = get_patterns(spec)
+    counters = {}
+    for line in lines:
+        name, colon, data = line.partition(":")
+        name = name.strip()
+        if not colon or not is_selected(name, include, exclude):
+            continue
+        values = data.split()
+        counters[name] = {
+            field: int(values[column]) for field, column in FIELDS.items()
+        }
+    return counters
+
+
+#
+#
+#
+def read_net_dev(spec=None, path=None):
+    with open(NET_DEV_FILE if path is None else path, "r") as f:
+        return parse_net_dev(f, spec)
+
+
+#
+# Totals and rates of the selected interfaces and of all of them together:
+# ({interface: stats}, stats) with stats holding total_down, total_up,
+# down_speed, up_speed (None until known), errors and drops. The rates are
+# taken against the rates.py snapshot called `name`.
+#
+def sample(spec=None, path=None, now=None, name="network"):
+    counters = read_net_dev(spec, path)
+    results = rates.update_rates(
+        name,
+        {
+            iface: {
+                "bytes_recv": fields["bytes_recv"],
+                "bytes_sent": fields["bytes_sent"],
+            }
+            for iface, fields in counters.items()
+        },
+        now,
+    )
+
+    interfaces = {
+        iface: {
+            "total_down": fields["bytes_recv"],
+            "total_up": fields["bytes_sent"],
+            "down_speed": results[iface]["bytes_recv"]["rate"],
+            "up_speed": results[iface]["bytes_sent"]["rate"],
+            "errors": fields["errin"] + fields["errout"],
+            "drops": fields["dropin"] + fields["dropout"],
+        }
+        for iface, fields in counters.items()
+    }
+    total = {
+        "total_down": sum(stats["total_down"] for stats in interfaces.values()),
+        "total_up": sum(stats["total_up"] for stats in interfaces.values()),
+        "down_speed": rates.sum_rates(results, "bytes_recv"),
+        "up_speed": rates.sum_rates(results, "bytes_sent"),
+        "errors": sum(stats["errors"] for stats in interfaces.values()),
+        "drops": sum(stats["drops"] for stats in interfaces.values()),
+    }
+    return interfaces, total
+
+
+#
+# Names of the `count` busiest interfaces, by download plus upload rate;
+# interfaces without a rate yet come last.
+#
+def get_busiest(interfaces, count):
+    def load(name):
+        stats = interfaces[name]
+        return (stats["down_speed"] or 0) + (stats["up_speed"] or 0)
+
+    return sorted(interfaces, key=lambda name: (-load(name), name))[:count]
+
+
+#
+# Print the selected interfaces, busiest first. The rates are kept in a
+# snapshot of their own (since the previous run of this command), so the
+# network panel's rates are left alone.
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--interfaces", help="glob patterns (default: CONKY_NET_INTERFACES)"
+    )
+    parser.add_argument("--file", help=f"counters file (default: {NET_DEV_FILE})")
+    args = parser.parse_args()
+
+    interfaces, total = sample(args.interfaces, args.file, name="netdev-cli")
+    rows = [
+        (name, interfaces[name]) for name in get_busiest(interfaces, len(interfaces))
+    ]
+    for name, stats in rows + [("total", total)]:
+        print(
+            f"{name:<16} down {striker.format_rate(stats['down_speed'])} "
+            f"up {striker.format_rate(stats['up_speed'])} "
+            f"errors {stats['errors']} drops {stats['drops']}"
+        )
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
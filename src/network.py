@@ -1,67 +1,66 @@
 #!/usr/bin/env python3
 
+import time
 import striker
 import exception
-import socket
-import psutil
-import time
+import netdev
+import remote
+import prober
+
+# A status record older than this means the prober is not running
+STATUS_MAX_AGE_SECONDS = 300
 
 
 #
+# Total transferred and current speed of one interface or of all of them.
 #
-#
-def get_net_io(interface):
-    stats1 = psutil.net_io_counters(pernic=True)[interface]
-    time.sleep(1)
-    stats2 = psutil.net_io_counters(pernic=True)[interface]
+def format_transfer(stats):
+    total_down = stats["total_down"] / striker.CONVERT_GB
+    down_speed = striker.format_rate(stats["down_speed"])
+    total_up = stats["total_up"] / striker.CONVERT_GB
+    up_speed = striker.format_rate(stats["up_speed"])
+    return f"${{alignr}}Download: {total_down:8,.1f} GB ({down_speed}) | Upload: {total_up:8,.1f} GB ({up_speed})"
 
-    total_down = stats2.bytes_recv
-    total_up = stats2.bytes_sent
-    down_speed = stats2.bytes_recv - stats1.bytes_recv
-    up_speed = stats2.bytes_sent - stats1.bytes_sent
 
-    return {
-        "total_down": total_down,
-        "total_up": total_up,
-        "down_speed": down_speed,
-        "up_speed": up_speed,
-    }
+#
+# Connectivity from the prober's status record, with the latency and how long
+# it has been in that state.
+#
+def get_connection_status(status, now=None):
+    now = time.time() if now is None else now
+    record = status.get("connectivity")
+    if not record or now - record["checked_at"] > STATUS_MAX_AGE_SECONDS:
+        return "${color gray}Unknown (prober not running)"
+    since = remote.format_age(now - record["changed_at"])
+    if record["value"]:
+        return f"${{color green}}Connected {record['latency_ms']:.0f} ms, up {since}"
+    return f"${{color red}}Disconnected, down {since}"
 
 
 #
+# Value of a probe from the prober's status record, "?" when unknown.
 #
-#
-def is_connected(host="8.8.8.8", port=53, timeout=3):
-    try:
-        socket.setdefaulttimeout(timeout)
-        socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((host, port))
-        return True
-    except socket.error:
-        return False
+def get_probe_value(status, name):
+    value = status.get(name, {}).get("value")
+    return "?" if value is None else value
 
 
 #
 #
 #
 def get_network():
-    iface = "nordlynx"
-    data = get_net_io(iface)
-    total_down = data["total_down"] / striker.CONVERT_GB
-    down_speed = data["down_speed"] / 1024
-    total_up = data["total_up"] / striker.CONVERT_GB
-    up_speed = data["up_speed"] / 1024
-    results = "${font}"
-
-    # Fetch the public IP using curl
-    public_ip_from_curl = "${execi 1800 curl -s ifconfig.me}"
-    public_ip = "${execi 1800 curl -s ifconfig.me}"
-    local_ip = "${exec hostname -I | awk '{print $1}'}"
-    gateway = "${exec ip route | awk '/default/ {print $3}'}"
-
-    # Check internet connectivity
-    connection_status = (
-        "${color green}Connected" if is_connected() else "${color red}Disconnected"
-    )
+    interfaces, total = netdev.sample()
+    if not interfaces:
+        raise exception.StrikerException(
+            f"No network interface matches {striker.CONKY_NET_INTERFACES}"
+        )
+
+    # Addresses and connectivity as last probed in the background
+    status = prober.load_status()
+    public_ip = get_probe_value(status, "public_ip")
+    local_ip = get_probe_value(status, "local_ip")
+    gateway = get_probe_value(status, "gateway")
+    connection_status = get_connection_status(status)
 
     # Create the formatted results string
     results = (
@@ -72,18 +71,31 @@ def get_network():
         + "\n"
     )
     results += striker.get_line_align_right(
-        "Total transferred(speed)",
-        f"${{alignr}}Download: {total_down:8,.1f} GB ({down_speed:8,.1f} KB/s) | Upload: {total_up:8,.1f} GB ({up_speed:8,.1f} KB/s)",
+        "Total transferred(speed)", format_transfer(total)
     )
+
+    # Busiest links, when there is more than one
+    if len(interfaces) > 1:
+        for name in netdev.get_busiest(interfaces, striker.CONKY_NET_TOP):
+            results += "\n" + striker.get_line_align_right(
+                f"  {name}", format_transfer(interfaces[name])
+            )
     return results
 
 
 #
 #
 #
-if __name__ == "__main__":
+def main():
     print(striker.get_section_title("Network", ""))
     try:
         print(get_network())
     except exception.StrikerException as e:
         print(exception.StrikerException.get_message(e))
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
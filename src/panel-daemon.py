@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Keep every Conky panel resident in one Python process.
+
+Each panel module is imported once and re-rendered on its own schedule. The
+rendered markup is written to CONKY_ASTRO_PANELS/<panel>.txt so the conky
+configuration only has to `cat` the file instead of starting an interpreter.
+"""
+
+import argparse
+import importlib
+import io
+import os
+import sys
+import threading
+import time
+import striker
+import exception
+
+# Panel module and refresh interval in seconds. The planet, star and
+# exoplanet positions are live Az/Alt, and the sun panel must follow the local
+# date within a few minutes.
+PANELS = [
+    ("sun", 300),
+    ("airports", 180),
+    ("system", 1800),
+    ("network", 60),
+    ("memory", 60),
+    ("gpu", 3),
+    ("cpu", 3),
+    ("disks", 60),
+    ("planets", 60),
+    ("exoplanets", 60),
+    ("stars", 60),
+    ("definitions", 28800),
+]
+
+# Background job module and how often its run_due() is called, in seconds; the
+# jobs keep caches the panels only read
+JOBS = [
+    ("prober", 5),
+]
+
+
+#
+# Route print() from each panel thread into that thread's own buffer.
+#
+class ThreadStdout:
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
+
+    def _target(self):
+        return getattr(self.local, "buffer", None) or self.default
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def capture(self):
+        self.local.buffer = io.StringIO()
+
+    def release(self):
+        text = self.local.buffer.getvalue()
+        self.local.buffer = None
+        return text
+
+
+#
+#
+#
+def get_panel_file(name):
+    return os.path.join(striker.CONKY_ASTRO_PANELS, f"{name}.txt")
+
+
+#
+# Render one panel and return its Conky markup.
+#
+def render_panel(name, stdout):
+    stdout.capture()
+    try:
+        module = importlib.import_module(name)
+        module.main()
+    except Exception as e:
+        print(exception.StrikerException.get_message(f"{name}: {e}"))
+    return stdout.release()
+
+
+#
+#
+#
+def run_panel(name, interval, stdout, stop):
+    while not stop.is_set():
+        started = time.monotonic()
+        striker.write_text_atomic(get_panel_file(name), render_panel(name, stdout))
+        stop.wait(max(0.0, interval - (time.monotonic() - started)))
+
+
+#
+# Run one background job, reporting its errors on stderr (its output is not a
+# panel).
+#
+def run_job_once(name):
+    try:
+        importlib.import_module(name).run_due()
+    except Exception as e:
+        print(f"{name}: {e}", file=sys.stderr)
+
+
+#
+#
+#
+def run_job(name, interval, stop):
+    while not stop.is_set():
+        run_job_once(name)
+        stop.wait(interval)
+
+
+#
+#
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--panels", help="comma separated panel names (default: all panels)"
+    )
+    parser.add_argument(
+        "--once", action="store_true", help="render each panel once and exit"
+    )
+    args = parser.parse_args()
+
+    panels = PANELS
+    if args.panels:
+        selected = args.panels.split(",")
+        panels = [(name, interval) for name, interval in PANELS if name in selected]
+
+    os.makedirs(striker.CONKY_ASTRO_PANELS, exist_ok=True)
+    stdout = ThreadStdout(sys.stdout)
+    sys.stdout = stdout
+
+    if args.once:
+        for name, _ in JOBS:
+            run_job_once(name)
+        for name, _ in panels:
+            striker.write_text_atomic(get_panel_file(name), render_panel(name, stdout))
+        return
+
+    stop = threading.Event()
+    threads = [
+        threading.Thread(
+            target=run_panel, args=(name, interval, stdout, stop), daemon=True
+        )
+        for name, interval in panels
+    ]
+    threads += [
+        threading.Thread(target=run_job, args=(name, interval, stop), daemon=True)
+        for name, interval in JOBS
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stop.set()
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,72 @@
 #!/usr/bin/env python3
 
-from datetime import datetime
+from datetime import datetime, timezone
 import os
 import json
 import striker
+import horizon
 import exception
 
 
+#
+# RA (hours), Dec and distance `hours` after 00:00 UTC, linearly interpolated
+# between the sub-daily samples of one day.
+#
+def interpolate_position(hourly, hours):
+    ra = hourly["ra_hr"]
+    step = 24.0 / (len(ra) - 1)
+    index = min(int(hours / step), len(ra) - 2)
+    fraction = hours / step - index
+
+    ra0, ra1 = ra[index], ra[index + 1]
+    # RA wraps at 24h
+    if ra1 - ra0 > 12:
+        ra1 -= 24
+    elif ra0 - ra1 > 12:
+        ra1 += 24
+
+    def between(values):
+        return values[index] + (values[index + 1] - values[index]) * fraction
+
+    return (
+        (ra0 + (ra1 - ra0) * fraction) % 24,
+        between(hourly["dec_deg"]),
+        between(hourly["distance_au"]),
+    )
+
+
+#
+# Current (az, alt, distance) of a planet from its samples for today, None
+# when the cache has no samples or no location.
+#
+def get_live_position(position, location, now):
+    hourly = position.get("hourly")
+    if not hourly or not location:
+        return None
+    hours = now.hour + now.minute / 60 + now.second / 3600
+    ra_hr, dec_deg, distance_au = interpolate_position(hourly, hours)
+    az, alt = horizon.equatorial_to_horizontal(
+        ra_hr * 15,
+        dec_deg,
+        location["latitude"],
+        location["longitude"],
+        now.timestamp(),
+        refraction=True,
+    )
+    return az, alt, distance_au
+
+
 #
 #
 #
 def get_planets():
-    today = datetime.utcnow().date().isoformat()
+    now = datetime.now(timezone.utc)
+    today = now.date()
 
-    planet_data = striker.load_json(striker.FILE_PLANET_DATA)
-    solar_data = striker.load_json(striker.FILE_SOLAR_SYSTEM_DATA)
-    today_data = solar_data.get(today, {})
+    planet_data = striker.load_json_cached(striker.FILE_PLANET_DATA)
+    today_data = striker.load_solar_system_day(today) or {}
     planet_positions = today_data.get("planets", {})
+    location = striker.load_solar_system_location()
 
     lines = []
 
@@ -31,10 +81,13 @@ def get_planets():
         temp_f = striker.kelvin_to_fahrenheit(temp_k)
         radius_miles = striker.kilometers_to_miles(details.get("radius_km"))
 
-        # Get position info from solar system data JSON
+        # Live position from today's samples, else the 00:00 UTC position
         pos = planet_positions.get(planet_name.lower(), {})
         az = pos.get("azimuth_deg")
         alt = pos.get("altitude_deg")
+        live = get_live_position(pos, location, now)
+        if live:
+            az, alt, distance = live
 
         if az is not None and alt is not None:
             color = "green" if alt > 0 else "lightgray"
@@ -65,7 +118,7 @@ def get_planets():
 #
 #
 #
-if __name__ == "__main__":
+def main():
     print(striker.get_section_title("Planets", ""))
     print(
         f"${{color yellow}}${{goto 20}}Planet${{alignr}}| Rotation   | Orbit    | Radius    | Temp   | Mag    | World Type    | Az   | Alt  | Distance     | Mass      "
@@ -75,3 +128,10 @@ if __name__ == "__main__":
         print(get_planets() + f"\n")
     except exception.StrikerException as e:
         print(exception.StrikerException.get_message(e))
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
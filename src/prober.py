@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Background network probes for the network panel.
+
+Connectivity (TCP connect latency), the public IP, the default gateway and the
+local address are each probed on their own interval, concurrently and with a
+deadline, and written to one status record in CONKY_ASTRO_CACHE. Every probe
+keeps its value, when it was checked, when the value last changed and when it
+is due again (sooner after a failure). The panel daemon calls run_due() as a
+background job; network.py only reads the record, so rendering the panel opens
+no sockets and starts no processes.
+"""
+
+import argparse
+import json
+import os
+import socket
+import struct
+import threading
+import time
+import striker
+import remote
+
+# Connectivity is checked with a TCP connect to a public DNS server
+CONNECTIVITY_HOST = "8.8.8.8"
+CONNECTIVITY_PORT = 53
+CONNECTIVITY_TIMEOUT_SECONDS = 3
+
+PUBLIC_IP_URL = "https://ifconfig.me/ip"
+PUBLIC_IP_DEADLINE_SECONDS = 5
+
+# Probe intervals, and the retry interval of a failed probe
+PROBE_INTERVALS = {
+    "connectivity": 30,
+    "public_ip": 1800,
+    "gateway": 60,
+    "local_ip": 60,
+}
+RETRY_SECONDS = 60
+
+# Flags of a usable route with a gateway, from linux/route.h
+RTF_UP = 0x1
+RTF_GATEWAY = 0x2
+
+# Probes of this process
+_lock = threading.Lock()
+
+
+#
+#
+#
+def get_status_file():
+    return os.path.join(striker.CONKY_ASTRO_CACHE, "network-status.json")
+
+
+#
+# Status record, {} before the first probe.
+#
+def load_status():
+    try:
+        return striker.load_json(get_status_file())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+#
+# Latency in milliseconds of a TCP connect to CONNECTIVITY_HOST, None when it
+# fails. The connect goes through the "connectivity" breaker of remote.py, so
+# an unreachable host is not connected to again while its breaker is open.
+#
+def probe_connectivity():
+    def connect():
+        started = time.perf_counter()
+        remote.probe_tcp(
+            CONNECTIVITY_HOST, CONNECTIVITY_PORT, CONNECTIVITY_TIMEOUT_SECONDS
+        )
+        return (time.perf_counter() - started) * 1000
+
+    try:
+        return remote.call(
+            "connectivity", connect, deadline=CONNECTIVITY_TIMEOUT_SECONDS + 1
+        )
+    except (OSError, remote.RemoteError):
+        return None
+
+
+#
+# Public address as seen by PUBLIC_IP_URL.
+#
+def probe_public_ip():
+    # Imported here: network.py reads the status through this module
+    import urllib.request
+
+    def fetch():
+        with urllib.request.urlopen(
+            PUBLIC_IP_URL, timeout=PUBLIC_IP_DEADLINE_SECONDS
+        ) as response:
+            return response.read(64).decode().strip()
+
+    address = remote.call("public-ip", fetch, deadline=PUBLIC_IP_DEADLINE_SECONDS)
+    socket.inet_pton(socket.AF_INET6 if ":" in address else socket.AF_INET, address)
+    return address
+
+
+#
+# Gateway of the default route in /proc/net/route, None without one.
+#
+def probe_gateway(route_file="/proc/net/route"):
+    with open(route_file) as routes:
+        next(routes)
+        for line in routes:
+            fields = line.split()
+            if len(fields) < 4 or fields[1] != "00000000":
+                continue
+            if int(fields[3], 16) & (RTF_UP | RTF_GATEWAY) == RTF_UP | RTF_GATEWAY:
+                return socket.inet_ntoa(struct.pack("<L", int(fields[2], 16)))
+    return None
+
+
+#
+# Local address of the interface that routes to the internet. Connecting a UDP
+# socket only picks the route, nothing is sent.
+#
+def probe_local_ip():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.connect((CONNECTIVITY_HOST, CONNECTIVITY_PORT))
+        return probe.getsockname()[0]
+
+
+#
+# Run one probe: {"value": ..., "ok": ...} plus the latency for connectivity.
+#
+def run_probe(name):
+    if name == "connectivity":
+        latency = probe_connectivity()
+        return {"value": latency is not None, "ok": True, "latency_ms": latency}
+    function = {
+        "public_ip": probe_public_ip,
+        "gateway": probe_gateway,
+        "local_ip": probe_local_ip,
+    }[name]
+    try:
+        return {"value": function(), "ok": True}
+    except (OSError, ValueError, remote.RemoteError) as e:
+        return {"ok": False, "error": str(e) or type(e).__name__}
+
+
+#
+# Merge a probe result into its previous record: a failed probe keeps the last
+# value and is retried sooner.
+#
+def update_record(name, previous, result, now):
+    record = dict(previous or {})
+    record["checked_at"] = now
+    interval = PROBE_INTERVALS[name]
+    if not result["ok"]:
+        record["error"] = result["error"]
+        record["next_at"] = now + min(interval, RETRY_SECONDS)
+        return record
+
+    record.pop("error", None)
+    if "value" not in record or record["value"] != result["value"]:
+        record["changed_at"] = now
+    record["value"] = result["value"]
+    if "latency_ms" in result:
+        record["latency_ms"] = result["latency_ms"]
+    record["next_at"] = now + interval
+    return record
+
+
+#
+# Run the probes that are due (all of them with `force`), concurrently, and
+# save the status record. Returns the names of the probes run.
+#
+def run_due(now=None, force=False):
+    now = time.time() if now is None else now
+    with _lock:
+        status = load_status()
+        due = [
+            name
+            for name in PROBE_INTERVALS
+            if force or now >= status.get(name, {}).get("next_at", 0)
+        ]
+        if not due:
+            return []
+
+        results = {}
+
+        def probe(name):
+            results[name] = run_probe(name)
+
+        workers = [threading.Thread(target=probe, args=(name,)) for name in due]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        for name in due:
+            status[name] = update_record(name, status.get(name), results[name], now)
+        striker.save_json_atomic(get_status_file(), status)
+    return due
+
+
+#
+# Run the due probes once (or forever) and print the status record.
+#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--force", action="store_true", help="run every probe now")
+    parser.add_argument(
+        "--forever", action="store_true", help="keep probing, every 5 seconds"
+    )
+    args = parser.parse_args()
+
+    run_due(force=args.force)
+    while args.forever:
+        time.sleep(5)
+        run_due()
+    print(json.dumps(load_status(), indent=2))
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Per-second rates for monotonically increasing counters (bytes sent, sectors
+read, ...) without sleeping between two samples.
+
+Every call stores a timestamped snapshot of the counters in CONKY_ASTRO_CACHE
+and reports the rate since the previous snapshot, so the rate window is the
+real refresh interval of the panel. An exponentially smoothed rate is kept
+alongside the raw rate.
+"""
+
+import math
+import os
+import time
+import striker
+
+# Time constant of the exponential smoothing, in seconds
+SMOOTHING_SECONDS = 300.0
+
+
+#
+#
+#
+def get_snapshot_file(name):
+    return os.path.join(striker.CONKY_ASTRO_CACHE, f"rates-{name}.json")
+
+
+#
+# Rate of one counter between two samples, None when it cannot be computed
+# (first sample, counter reset by a reboot or wrap, clock going backwards).
+#
+def get_rate(value, previous, elapsed):
+    if previous is None or elapsed is None or elapsed <= 0 or value < previous:
+        return None
+    return (value - previous) / elapsed
+
+
+#
+# Exponentially weighted moving average over irregular sample intervals.
+#
+def smooth_rate(rate, previous_smoothed, elapsed, smoothing_seconds):
+    if rate is None:
+        return None
+    if previous_smoothed is None:
+        return rate
+    alpha = 1.0 - math.exp(-elapsed / smoothing_seconds)
+    return previous_smoothed + alpha * (rate - previous_smoothed)
+
+
+#
+# Update the snapshot called `name` with `counters` ({key: {field: value}})
+# and return {key: {field: {"total": ..., "rate": ..., "smoothed": ...}}}.
+# Keys that appear for the first time get rate None, keys that disappeared
+# are dropped from the snapshot.
+#
+def update_rates(name, counters, now=None, smoothing_seconds=SMOOTHING_SECONDS):
+    now = time.time() if now is None else now
+    snapshot_file = get_snapshot_file(name)
+    try:
+        snapshot = striker.load_json(snapshot_file)
+    except (FileNotFoundError, ValueError):
+        snapshot = {}
+
+    previous_time = snapshot.get("time")
+    previous_counters = snapshot.get("counters", {})
+    previous_smoothed = snapshot.get("smoothed", {})
+    elapsed = now - previous_time if previous_time is not None else None
+
+    results = {}
+    smoothed_counters = {}
+    for key, fields in counters.items():
+        results[key] = {}
+        smoothed_counters[key] = {}
+        for field, value in fields.items():
+            rate = get_rate(value, previous_counters.get(key, {}).get(field), elapsed)
+            smoothed = smooth_rate(
+                rate,
+                previous_smoothed.get(key, {}).get(field),
+                elapsed,
+                smoothing_seconds,
+            )
+            results[key][field] = {"total": value, "rate": rate, "smoothed": smoothed}
+            smoothed_counters[key][field] = smoothed
+
+    striker.save_json_atomic(
+        snapshot_file,
+        {"time": now, "counters": counters, "smoothed": smoothed_counters},
+    )
+    return results
+
+
+#
+# Sum one field over several keys, None when no key has a value yet.
+#
+def sum_rates(results, field, kind="rate", keys=None):
+    values = [
+        results[key][field][kind]
+        for key in (keys if keys is not None else results)
+        if key in results and results[key][field][kind] is not None
+    ]
+    return sum(values) if values else None
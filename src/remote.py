@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Remote calls of the panels, with a deadline per call and a circuit breaker per
+endpoint.
+
+call() runs a function in a worker thread and gives up on it after its
+deadline, so a hung connection never stalls a panel. After FAILURE_THRESHOLD
+consecutive failures the breaker of the endpoint opens: calls fail at once with
+CircuitOpenError for OPEN_SECONDS, then one more attempt is let through, and
+the breaker stays open twice as long (up to MAX_OPEN_SECONDS) each time that
+attempt fails. Breaker states are kept in CONKY_ASTRO_REMOTE so standalone
+panel runs share them. Panels show their last good output with
+get_stale_marker() while an endpoint is failing.
+"""
+
+import os
+import socket
+import threading
+import time
+import striker
+
+# Consecutive failures that open a breaker, and how long it stays open
+FAILURE_THRESHOLD = 3
+OPEN_SECONDS = 60
+MAX_OPEN_SECONDS = 1800
+
+# Default deadline of a call
+DEADLINE_SECONDS = 5
+
+# Breaker updates from the threads of one process
+_lock = threading.Lock()
+
+
+class RemoteError(Exception):
+    pass
+
+
+class CircuitOpenError(RemoteError):
+    pass
+
+
+class DeadlineError(RemoteError):
+    pass
+
+
+#
+#
+#
+def get_breaker_file(endpoint):
+    return os.path.join(striker.CONKY_ASTRO_REMOTE, f"{endpoint}.json")
+
+
+#
+# Breaker state of an endpoint: consecutive failures, when it opened (None when
+# closed) and for how long.
+#
+def load_breaker(endpoint):
+    try:
+        return striker.load_json(get_breaker_file(endpoint))
+    except (FileNotFoundError, ValueError):
+        return {"failures": 0, "opened_at": None, "open_seconds": OPEN_SECONDS}
+
+
+#
+# Seconds until the breaker of an endpoint lets a call through, 0 when closed.
+#
+def get_retry_in(endpoint, now=None):
+    now = time.time() if now is None else now
+    breaker = load_breaker(endpoint)
+    if breaker["opened_at"] is None:
+        return 0
+    return max(0, breaker["opened_at"] + breaker["open_seconds"] - now)
+
+
+#
+#
+#
+def is_open(endpoint, now=None):
+    return get_retry_in(endpoint, now) > 0
+
+
+#
+# Record the outcome of a call to an endpoint: a success closes its breaker, a
+# failure opens it after FAILURE_THRESHOLD in a row, or reopens it for twice as
+# long when the call let through an open breaker failed.
+#
+def record_result(endpoint, ok, now=None):
+    now = time.time() if now is None else now
+    with _lock:
+        breaker = load_breaker(endpoint)
+        if ok:
+            if breaker["failures"] or breaker["opened_at"] is not None:
+                breaker = {
+                    "failures": 0,
+                    "opened_at": None,
+                    "open_seconds": OPEN_SECONDS,
+                }
+            else:
+                return
+        else:
+            breaker["failures"] += 1
+            if breaker["opened_at"] is not None:
+                breaker["opened_at"] = now
+                breaker["open_seconds"] = min(
+                    2 * breaker["open_seconds"], MAX_OPEN_SECONDS
+                )
+            elif breaker["failures"] >= FAILURE_THRESHOLD:
+                breaker["opened_at"] = now
+                breaker["open_seconds"] = OPEN_SECONDS
+        os.makedirs(striker.CONKY_ASTRO_REMOTE, exist_ok=True)
+        striker.save_json_atomic(get_breaker_file(endpoint), breaker)
+
+
+#
+# Call function(*args, **kwargs) for an endpoint within `deadline` seconds and
+# return its result. Raises CircuitOpenError while the endpoint's breaker is
+# open, DeadlineError when the call is still running at the deadline (it is
+# left to finish in the background), or the exception the call raised.
+#
+def call(endpoint, function, *args, deadline=DEADLINE_SECONDS, **kwargs):
+    retry_in = get_retry_in(endpoint)
+    if retry_in:
+        raise CircuitOpenError(
+            f"{endpoint} unavailable, retry in {format_age(retry_in)}"
+        )
+
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = function(*args, **kwargs)
+        except Exception as e:
+            outcome["error"] = e
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    worker.join(deadline)
+    if worker.is_alive():
+        record_result(endpoint, False)
+        raise DeadlineError(f"{endpoint}: no reply in {deadline}s")
+    record_result(endpoint, "error" not in outcome)
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+#
+# Open and close a TCP connection to host:port, raising OSError on failure.
+#
+def probe_tcp(host, port, timeout):
+    with socket.create_connection((host, port), timeout=timeout):
+        pass
+
+
+#
+# Short age such as "45s", "12m", "3h" or "2d".
+#
+def format_age(seconds):
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{seconds // size:.0f}{unit}"
+    return f"{seconds:.0f}s"
+
+
+#
+# Line marking output as the last good one, saved at `saved_at`, shown because
+# of `reason`.
+#
+def get_stale_marker(saved_at, reason, now=None):
+    now = time.time() if now is None else now
+    return (
+        f"${{goto 20}}${{color orange}}Stale, updated {format_age(now - saved_at)} "
+        f"ago: {reason}"
+    )
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Read hwmon temperatures and fans straight from sysfs.
+
+The hwmon tree is walked once per boot to build an index of the input files
+the panels need (coretemp "Core N" per physical core, plus optional NVMe,
+k10temp and fan sensors). Each refresh then only reads those files; a reading
+that fails is reported as None, and the tree is only walked again when an
+indexed hwmon device is gone.
+Logical CPUs are mapped to their physical core through the CPU topology, not
+by list position.
+"""
+
+import os
+import re
+import striker
+
+HWMON_ROOT = "/sys/class/hwmon"
+CPU_ROOT = "/sys/devices/system/cpu"
+
+# hwmon driver name → kind of extra sensor line
+EXTRA_SENSOR_DRIVERS = {"nvme": "nvme", "k10temp": "k10temp"}
+
+_sensor_index = None
+
+
+#
+#
+#
+def read_text(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+#
+# Directory listing that treats a missing directory as empty.
+#
+def list_dir(path):
+    try:
+        return os.listdir(path)
+    except OSError:
+        return []
+
+
+#
+# Map every logical CPU to "<package>:<core>" using sysfs topology.
+#
+def read_cpu_topology(cpu_root=None):
+    cpu_root = cpu_root or CPU_ROOT
+    topology = {}
+    for entry in list_dir(cpu_root):
+        match = re.fullmatch(r"cpu(\d+)", entry)
+        if not match:
+            continue
+        base = os.path.join(cpu_root, entry, "topology")
+        package = read_text(os.path.join(base, "physical_package_id"))
+        core = read_text(os.path.join(base, "core_id"))
+        if package is not None and core is not None:
+            topology[int(match.group(1))] = f"{package}:{core}"
+    return [topology.get(cpu) for cpu in range(max(topology, default=-1) + 1)]
+
+
+#
+# Walk the hwmon tree once and return the index of sensor input files.
+#
+def discover_sensors(hwmon_root=None, cpu_root=None):
+    hwmon_root = hwmon_root or HWMON_ROOT
+    devices = {}
+    cores = {}
+    extra = []
+    coretemp_count = 0
+    for device in sorted(list_dir(hwmon_root)):
+        device_path = os.path.join(hwmon_root, device)
+        driver = read_text(os.path.join(device_path, "name"))
+        inputs = []
+        for entry in sorted(list_dir(device_path)):
+            match = re.fullmatch(r"(temp|fan)(\d+)_input", entry)
+            if match and read_input(os.path.join(device_path, entry), 1) is not None:
+                kind, number = match.groups()
+                label = read_text(os.path.join(device_path, f"{kind}{number}_label"))
+                inputs.append(
+                    (kind, label or f"{kind}{number}", os.path.join(device_path, entry))
+                )
+
+        if inputs:
+            devices[device_path] = driver
+
+        if driver == "coretemp":
+            # One coretemp device per package; the "Package id N" label names it
+            package = str(coretemp_count)
+            for kind, label, path in inputs:
+                if label.startswith("Package id "):
+                    package = label.split()[-1]
+            coretemp_count += 1
+            for kind, label, path in inputs:
+                if label.startswith("Core "):
+                    cores[f"{package}:{label.split()[-1]}"] = path
+
+        for kind, label, path in inputs:
+            if kind == "fan":
+                extra.append(
+                    {"kind": "fan", "label": f"{driver} {label}", "path": path}
+                )
+            elif driver in EXTRA_SENSOR_DRIVERS:
+                extra.append(
+                    {
+                        "kind": EXTRA_SENSOR_DRIVERS[driver],
+                        "label": f"{driver} {label}",
+                        "path": path,
+                    }
+                )
+
+    return {
+        "boot_id": striker.get_boot_id(),
+        "topology": read_cpu_topology(cpu_root),
+        "devices": devices,
+        "cores": cores,
+        "extra": extra,
+    }
+
+
+#
+# Return the sensor index, rediscovering it after a reboot.
+#
+def get_sensor_index(refresh=False):
+    global _sensor_index
+    boot_id = striker.get_boot_id()
+    if not refresh and _sensor_index and _sensor_index["boot_id"] == boot_id:
+        return _sensor_index
+
+    index = None
+    if not refresh:
+        try:
+            index = striker.load_json(striker.FILE_SENSOR_INDEX)
+        except (FileNotFoundError, ValueError):
+            index = None
+    if index is None or index.get("boot_id") != boot_id:
+        index = discover_sensors()
+        striker.save_json_atomic(striker.FILE_SENSOR_INDEX, index, indent=2)
+
+    _sensor_index = index
+    return index
+
+
+#
+# True while every hwmon device of the index is still there under the same
+# driver (hwmon numbers can change when a driver is reloaded).
+#
+def is_index_current(index):
+    devices = index.get("devices")
+    return devices is not None and all(
+        read_text(os.path.join(path, "name")) == driver
+        for path, driver in devices.items()
+    )
+
+
+#
+# hwmon reports temperatures in millidegrees and fans in RPM. None when the
+# input cannot be read or holds no number.
+#
+def read_input(path, scale):
+    try:
+        return int(read_text(path)) / scale
+    except (TypeError, ValueError):
+        return None
+
+
+#
+# Temperature of the physical core behind each logical CPU (None if unknown).
+#
+def read_core_temperatures(index):
+    core_temps = {}
+    for core, path in index["cores"].items():
+        temp = read_input(path, 1000.0)
+        if temp is not None:
+            core_temps[core] = temp
+    return [core_temps.get(core) for core in index["topology"]], core_temps
+
+
+#
+#
+#
+def read_extra_sensors(index, kinds):
+    readings = []
+    for sensor in index["extra"]:
+        if sensor["kind"] in kinds:
+            scale = 1.0 if sensor["kind"] == "fan" else 1000.0
+            readings.append(
+                (sensor["kind"], sensor["label"], read_input(sensor["path"], scale))
+            )
+    return readings
+
+
+#
+# Read the per-CPU temperatures and the requested extra sensors, rebuilding
+# the index first if a hwmon device moved since it was discovered.
+#
+def read_sensors(extra_kinds=()):
+    index = get_sensor_index()
+    if not is_index_current(index):
+        index = get_sensor_index(refresh=True)
+    return read_core_temperatures(index), read_extra_sensors(index, extra_kinds)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Fixed-record binary store for the daily solar-system data.
+
+Layout (little endian):
+
+    header   magic "CASS", version, record size, epoch (date ordinal of
+             record 0), day count, planet count, samples per planet and
+             day, observer latitude and longitude
+    names    one 32-byte, NUL padded name per planet
+    records  one fixed-size record per day, record N is epoch + N days
+
+Each record holds the rise/set times as epoch seconds (-1 when there is no
+event that day), the day length in minutes, the sun declination, the moon
+illumination and phase, and per planet four float32 values at 00:00 UTC (az,
+alt, ra, dec) followed by the sub-daily ra, dec and distance samples. Readers
+memory-map the file and unpack a single record.
+
+Run this module with a date (default today) to dump that day as JSON.
+"""
+
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+from datetime import date, datetime, timezone
+
+MAGIC = b"CASS"
+VERSION = 2
+HEADER = struct.Struct("<4sHHiHHH2xdd")
+NAME = struct.Struct("<32s")
+DAY = struct.Struct("<qqqqiffB3x")
+PLANET = struct.Struct("<4f")
+
+# Sub-daily sample columns per planet and the rounding kept in the JSON cache
+SAMPLE_FIELDS = (("ra_hr", 5), ("dec_deg", 4), ("distance_au", 5))
+
+NO_TIME = -1
+EVENTS = ("sunrise", "sunset", "moonrise", "moonset")
+MOON_PHASES = [
+    ("new_moon", "🌑"),
+    ("waxing_crescent", "🌒"),
+    ("first_quarter", "🌓"),
+    ("waxing_gibbous", "🌔"),
+    ("full_moon", "🌕"),
+    ("waning_gibbous", "🌖"),
+    ("last_quarter", "🌗"),
+    ("waning_crescent", "🌘"),
+]
+PHASE_INDEX = {name: index for index, (name, _) in enumerate(MOON_PHASES)}
+NO_PHASE = 255
+
+
+#
+#
+#
+def get_record_size(planet_count, samples):
+    return DAY.size + planet_count * (PLANET.size + len(SAMPLE_FIELDS) * samples * 4)
+
+
+#
+# Day length "H:MM" from the minutes stored in a record.
+#
+def format_day_length(minutes):
+    if minutes < 0:
+        return "--:--"
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+#
+#
+#
+def pack_day(day, planets, samples):
+    if day is None:
+        day = {}
+    times = [day.get(f"{event}_epoch", NO_TIME) for event in EVENTS]
+    day_length = day.get("day_length_minutes", -1)
+    record = DAY.pack(
+        *times,
+        day_length,
+        day.get("sun_declination", math.nan),
+        day.get("moon_illumination_percent", math.nan),
+        PHASE_INDEX.get(day.get("moon_phase"), NO_PHASE),
+    )
+    for planet in planets:
+        position = day.get("planets", {}).get(planet, {})
+        record += PLANET.pack(
+            position.get("azimuth_deg", math.nan),
+            position.get("altitude_deg", math.nan),
+            position.get("right_ascension_hr", math.nan),
+            position.get("declination_deg", math.nan),
+        )
+        hourly = position.get("hourly", {})
+        for field, _ in SAMPLE_FIELDS:
+            record += struct.pack(
+                f"<{samples}f", *hourly.get(field, [math.nan] * samples)
+            )
+    return record
+
+
+#
+# Write `daily_data` ({"YYYY-MM-DD": day}) as one record per day from the
+# first to the last date; days without data get an empty record. `samples` is
+# the number of sub-daily samples per planet, `location` the observer
+# ({"latitude", "longitude"}).
+#
+def write_store(filename, daily_data, planets, samples, location):
+    days = sorted(date.fromisoformat(day) for day in daily_data)
+    epoch = days[0].toordinal()
+    count = days[-1].toordinal() - epoch + 1
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        get_record_size(len(planets), samples),
+        epoch,
+        count,
+        len(planets),
+        samples,
+        location["latitude"],
+        location["longitude"],
+    )
+    names = b"".join(NAME.pack(planet.encode()) for planet in planets)
+    records = b"".join(
+        pack_day(
+            daily_data.get(date.fromordinal(epoch + i).isoformat()), planets, samples
+        )
+        for i in range(count)
+    )
+
+    temp_filename = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_filename, "wb") as f:
+        f.write(header + names + records)
+    os.replace(temp_filename, filename)
+
+
+#
+# UTC "%H:%M" rounded to the nearest minute, like skyfield's utc_strftime().
+#
+def format_time(epoch):
+    return datetime.fromtimestamp(epoch + 30, timezone.utc).strftime("%H:%M")
+
+
+#
+#
+#
+def unpack_day(buffer, offset, planets, samples):
+    values = DAY.unpack_from(buffer, offset)
+    day = {}
+    for event, epoch in zip(EVENTS, values[:4]):
+        if epoch != NO_TIME:
+            day[event] = format_time(epoch)
+            day[f"{event}_epoch"] = epoch
+    day["day_length"] = format_day_length(values[4])
+    day["day_length_minutes"] = values[4]
+    day["sun_declination"] = round(values[5], 4)
+    day["moon_illumination_percent"] = round(values[6], 1)
+    if values[7] != NO_PHASE:
+        day["moon_phase"], day["moon_emoji"] = MOON_PHASES[values[7]]
+
+    day["planets"] = {}
+    offset += DAY.size
+    for planet in planets:
+        az, alt, ra, dec = PLANET.unpack_from(buffer, offset)
+        day["planets"][planet] = {
+            "azimuth_deg": round(az, 2),
+            "altitude_deg": round(alt, 2),
+            "right_ascension_hr": round(ra, 3),
+            "declination_deg": round(dec, 3),
+        }
+        offset += PLANET.size
+
+        hourly = {}
+        for field, digits in SAMPLE_FIELDS:
+            values = struct.unpack_from(f"<{samples}f", buffer, offset)
+            offset += samples * 4
+            if samples and not math.isnan(values[0]):
+                hourly[field] = [round(value, digits) for value in values]
+        if hourly:
+            day["planets"][planet]["hourly"] = hourly
+    return day
+
+
+#
+# Header fields as a dict, raises ValueError for another format or version.
+#
+def read_header(buffer, filename):
+    (
+        magic,
+        version,
+        record_size,
+        epoch,
+        count,
+        planet_count,
+        samples,
+        latitude,
+        longitude,
+    ) = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Unsupported solar-system store: {filename}")
+    return {
+        "record_size": record_size,
+        "epoch": epoch,
+        "count": count,
+        "samples": samples,
+        "location": {"latitude": latitude, "longitude": longitude},
+        "planets": [
+            NAME.unpack_from(buffer, HEADER.size + i * NAME.size)[0]
+            .rstrip(b"\0")
+            .decode()
+            for i in range(planet_count)
+        ],
+    }
+
+
+#
+# Observer location the store was computed for.
+#
+def read_location(filename):
+    with open(filename, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return read_header(buffer, filename)["location"]
+
+
+#
+# The record for `day` as a dict shaped like a JSON cache entry, None when
+# the day is outside the store.
+#
+def read_day(filename, day):
+    with open(filename, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            header = read_header(buffer, filename)
+            index = day.toordinal() - header["epoch"]
+            if index < 0 or index >= header["count"]:
+                return None
+
+            planets = header["planets"]
+            offset = (
+                HEADER.size + len(planets) * NAME.size + index * header["record_size"]
+            )
+            return unpack_day(buffer, offset, planets, header["samples"])
+
+
+#
+#
+#
+if __name__ == "__main__":
+    import striker
+
+    day = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else date.today()
+    print(
+        json.dumps(
+            read_day(striker.FILE_SOLAR_SYSTEM_STORE, day), indent=2, ensure_ascii=False
+        )
+    )
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 
 import striker
+import astro
+import columnar
+import horizon
 import json
 import exception
 import re
@@ -11,47 +14,87 @@ import os
 
 
 #
+# Read the rotation index, store the next one and return it.
 #
-#
-def get_stars():
-    star_data = striker.load_json(striker.FILE_STAR_DATA)
-    star_items = [(name, data) for name, data in star_data.items() if name != "Sun"]
-
-    # Load current index
+def get_rotation_index(total):
     try:
         with open(striker.FILE_STAR_TOGGLE, "r") as f:
             index = int(f.read().strip())
     except (FileNotFoundError, ValueError):
         index = 0
 
-    # Rotate and get 6 items
-    total = len(star_items)
-    if total == 0:
-        return
     index %= total
-    rotated = star_items[index:] + star_items[:index]
-    selected = rotated[:8]
-
-    # Save updated index for next run
-    next_index = (index + 1) % total
     with open(striker.FILE_STAR_TOGGLE, "w") as f:
-        f.write(str(next_index))
+        f.write(str((index + 1) % total))
+    return index
+
+
+#
+# (location, [(name, details, az, alt)]) of the stars to show on `day`, with
+# the az/alt cached for 00:00 UTC. Only the selected rows are read from the
+# columnar store; the JSON cache is the fallback.
+#
+def load_visible_stars(day, count=8):
+    if os.path.exists(striker.FILE_STAR_POSITIONS):
+        with columnar.ColumnarStore(striker.FILE_STAR_POSITIONS) as store:
+            rows = [row for row, name in enumerate(store.names) if name != "Sun"]
+            if not rows:
+                return None, []
+            index = get_rotation_index(len(rows))
+            return store.meta.get("location"), [
+                (
+                    store.names[row],
+                    store.metadata(row),
+                    store.value("az", row, day),
+                    store.value("alt", row, day),
+                )
+                for row in (rows[index:] + rows[:index])[:count]
+            ]
+
+    cache = striker.load_json_cached(striker.FILE_STAR_DATA)
+    location = cache.get(striker.CACHE_META_KEY, {}).get("location")
+    star_data = striker.get_cache_entries(cache)
+    star_items = [(name, data) for name, data in star_data.items() if name != "Sun"]
+    if not star_items:
+        return None, []
+    index = get_rotation_index(len(star_items))
+    visible = []
+    for star_name, details in (star_items[index:] + star_items[:index])[:count]:
+        position = details.get("daily_positions", {}).get(day.isoformat(), {})
+        visible.append(
+            (
+                star_name,
+                details,
+                position.get("azimuth_deg"),
+                position.get("altitude_deg"),
+            )
+        )
+    return location, visible
+
 
-    today_str = date.today().isoformat()  # e.g., '2025-06-22'
+#
+#
+#
+def get_stars():
+    location, selected = load_visible_stars(date.today())
+    if not selected:
+        return
     lines = []
 
-    for star_name, details in selected:
+    for star_name, details, az, alt in selected:
         luminosity = details.get("luminosity", 0)
         mass = details.get("mass_msun", 0)
         mag = details.get("app_mag", 0)
         spt = details.get("spectral_type", "---")
-        spt_info = striker.parse_spectral_type(spt)
+        spt_info = astro.parse_spectral_type(spt)
 
-        # Use today's az/alt if available in daily_positions
-        daily_positions = details.get("daily_positions", {})
-        today_position = daily_positions.get(today_str, {})
-        az = today_position.get("azimuth_deg", 0.0)
-        alt = today_position.get("altitude_deg", 0.0)
+        # Live az/alt from the cached RA/Dec, else today's cached 00:00 UTC
+        # position, 0 when the day is not cached
+        live = horizon.current_position(details, location)
+        if live:
+            az, alt = live
+        az = az if az is not None else 0.0
+        alt = alt if alt is not None else 0.0
 
         constellation = details.get("constellation", "Unknown")
         meaning = details.get("meaning", "Unknown")
@@ -75,7 +118,7 @@ def get_stars():
 #
 #
 #
-if __name__ == "__main__":
+def main():
     print(striker.get_section_title("Stars", ""))
     print(
         f"${{color yellow}}${{goto 20}}Star${{alignr}}| Constellation   | Meaning           | Temperature   | Star type     | Az   | Alt  | Distance     | Mass      "
@@ -85,3 +128,10 @@ if __name__ == "__main__":
         print(get_stars())
     except exception.StrikerException as e:
         print(exception.StrikerException.get_message(e))
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
 
-from astropy.coordinates import EarthLocation
-from astropy import units as u
+import importlib
 import math
 import json
-import re
 import os
+import sys
+import threading
 
 
 # Earth's radius in miles
@@ -20,10 +20,46 @@ try:
     CONKY_PUBLIC_IP = os.getenv("CONKY_PUBLIC_IP")
 
     KEY_OPEN_WEATHER_API = os.getenv("KEY_OPEN_WEATHER_API")
+    CONKY_WEATHER_URL = os.getenv(
+        "CONKY_WEATHER_URL", "https://api.openweathermap.org/data/2.5/weather"
+    )
+    # Weather source of the airports panel: "openweather" (one call per
+    # airport) or "metar" (one bulk METAR cycle file for every station, from
+    # CONKY_METAR_URL or the newest file dropped in CONKY_METAR_DIR)
+    CONKY_WEATHER_SOURCE = os.getenv("CONKY_WEATHER_SOURCE", "openweather")
+    CONKY_METAR_URL = os.getenv(
+        "CONKY_METAR_URL", "https://aviationweather.gov/data/cache/metars.cache.csv.gz"
+    )
+    CONKY_METAR_DIR = os.getenv("CONKY_METAR_DIR", "")
+    # Cached weather is fresh for CONKY_WEATHER_TTL seconds, then served while
+    # it is refreshed until CONKY_WEATHER_MAX_STALE seconds old
+    CONKY_WEATHER_TTL = int(os.getenv("CONKY_WEATHER_TTL", "600"))
+    CONKY_WEATHER_MAX_STALE = int(os.getenv("CONKY_WEATHER_MAX_STALE", "10800"))
+    # Weather API call limits of the key (OpenWeather free plan by default)
+    CONKY_WEATHER_CALLS_PER_MINUTE = int(
+        os.getenv("CONKY_WEATHER_CALLS_PER_MINUTE", "60")
+    )
+    CONKY_WEATHER_CALLS_PER_MONTH = int(
+        os.getenv("CONKY_WEATHER_CALLS_PER_MONTH", "1000000")
+    )
 
     CONKY_HOME = os.environ.get("CONKY_HOME", "/home/wade/Conky")
     CONKY_ASTRO_HOME = os.getenv("CONKY_ASTRO_HOME")
+    CONKY_ASTRO_SITE = os.getenv("CONKY_ASTRO_SITE", "")
     CONKY_AIRPORT_CODE = os.getenv("CONKY_AIRPORT_CODE", "KSLC")
+    CONKY_EXTRA_SENSORS = os.getenv("CONKY_EXTRA_SENSORS", "")
+    # Network interfaces of the network panel: comma separated glob patterns,
+    # "!" excludes (e.g. "eth*,wl*,nordlynx"), and how many of the busiest are
+    # listed under the total. Loopback, tunnels (VPN) and virtual links
+    # (containers, bridges) are left out by default: their traffic is already
+    # counted on the physical link that carries it.
+    CONKY_NET_INTERFACES = os.getenv(
+        "CONKY_NET_INTERFACES",
+        "*,!lo,!nordlynx,!tun*,!wg*,!docker*,!br-*,!veth*,!virbr*",
+    )
+    CONKY_NET_TOP = int(os.getenv("CONKY_NET_TOP", "3"))
+    # Seconds the disk usage of a mount is reused before it is sampled again
+    CONKY_DISK_RESAMPLE = int(os.getenv("CONKY_DISK_RESAMPLE", "300"))
 except ValueError as e:
     raise ValueError(f"Invalid environment variables: {e}")
 
@@ -31,22 +67,46 @@ except ValueError as e:
 CONKY_ASTRO_SCRIPTS = os.path.join(CONKY_ASTRO_HOME, "scripts")
 CONKY_ASTRO_DATA = os.path.join(CONKY_ASTRO_HOME, "data")
 CONKY_ASTRO_CACHE = os.path.join(CONKY_ASTRO_HOME, "cache")
+CONKY_ASTRO_PANELS = os.path.join(CONKY_ASTRO_CACHE, "panels")
+CONKY_ASTRO_WEATHER = os.path.join(CONKY_ASTRO_CACHE, "weather")
+CONKY_ASTRO_REMOTE = os.path.join(CONKY_ASTRO_CACHE, "remote")
+# Per-site caches of the observer sites other than the default one; the panels
+# show CONKY_ASTRO_SITE (unset: the default site, in CONKY_ASTRO_CACHE)
+CONKY_ASTRO_SITES = os.path.join(CONKY_ASTRO_CACHE, "sites")
+CONKY_ASTRO_SITE_CACHE = (
+    os.path.join(CONKY_ASTRO_SITES, CONKY_ASTRO_SITE)
+    if CONKY_ASTRO_SITE
+    else CONKY_ASTRO_CACHE
+)
 
 #
 # add constants
 #
 FILE_EPH_DATA = os.path.join(CONKY_ASTRO_CACHE, "de422.bsp")
+FILE_EPH_EXCERPT = os.path.join(CONKY_ASTRO_CACHE, "de422-excerpt.bsp")
 FILE_AIRPORT_DATA = os.path.join(CONKY_ASTRO_DATA, "airport-data.json")
 FILE_DEFINITION_DATA = os.path.join(CONKY_ASTRO_DATA, "definitions.json")
 FILE_DEFINITION_TOGGLE = os.path.join(CONKY_ASTRO_CACHE, "definition-toggle.txt")
-
-FILE_SOLAR_SYSTEM_DATA = os.path.join(CONKY_ASTRO_CACHE, "solar-system-data.json")
-FILE_EXOPLANET_DATA = os.path.join(CONKY_ASTRO_CACHE, "exoplanet-data.json")
+FILE_OBSERVER_SITES = os.path.join(CONKY_ASTRO_DATA, "observer-sites.json")
+
+FILE_SOLAR_SYSTEM_DATA = os.path.join(CONKY_ASTRO_SITE_CACHE, "solar-system-data.json")
+FILE_SOLAR_SYSTEM_STORE = os.path.join(CONKY_ASTRO_SITE_CACHE, "solar-system-data.bin")
+FILE_EXOPLANET_DATA = os.path.join(CONKY_ASTRO_SITE_CACHE, "exoplanet-data.json")
+FILE_EXOPLANET_POSITIONS = os.path.join(
+    CONKY_ASTRO_SITE_CACHE, "exoplanet-positions.npz"
+)
 FILE_EXOPLANET_TOGGLE = os.path.join(CONKY_ASTRO_CACHE, "exoplanet-toggle.txt")
 FILE_PLANET_DATA = os.path.join(CONKY_ASTRO_DATA, "planet-data.json")
-FILE_STAR_DATA = os.path.join(CONKY_ASTRO_CACHE, "star-data.json")
+FILE_STAR_DATA = os.path.join(CONKY_ASTRO_SITE_CACHE, "star-data.json")
+FILE_STAR_POSITIONS = os.path.join(CONKY_ASTRO_SITE_CACHE, "star-positions.npz")
 FILE_STAR_TOGGLE = os.path.join(CONKY_ASTRO_CACHE, "star-toggle.txt")
 
+FILE_CPU_SNAPSHOT = os.path.join(CONKY_ASTRO_CACHE, "cpu-snapshot.json")
+FILE_HOST_FACTS = os.path.join(CONKY_ASTRO_CACHE, "host-facts.json")
+FILE_SENSOR_INDEX = os.path.join(CONKY_ASTRO_CACHE, "sensor-index.json")
+
+FILE_BOOT_ID = "/proc/sys/kernel/random/boot_id"
+
 
 #
 #
@@ -91,115 +151,188 @@ def load_json(filename):
 
 
 #
+# Load JSON once per process and reuse it until the file changes on disk.
+# The panel daemon keeps modules resident, so this saves re-parsing the
+# caches on every refresh. Callers must treat the result as read-only.
 #
+_json_cache = {}
+
+
+def load_json_cached(filename):
+    stat = os.stat(filename)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _json_cache.get(filename)
+    if cached is None or cached[0] != key:
+        cached = (key, load_json(filename))
+        _json_cache[filename] = cached
+    return cached[1]
+
+
 #
-def parse_spectral_type(spt):
-    # Spectral class → (Color, Temp in Kelvin, Color Code)
-    spectral_classes = {
-        "O": ("Blue", 40000, "blue"),
-        "B": ("Blue-White", 20000, "lightblue"),
-        "A": ("White", 8500, "white"),
-        "F": ("Yellow-White", 6500, "lightyellow"),
-        "G": ("Yellow", 5800, "yellow"),
-        "K": ("Orange", 4500, "orange"),
-        "M": ("Red", 3200, "red"),
-    }
+# Write text so readers never see a half-written file. The temporary name is
+# unique per thread: the panel daemon writes shared files from several threads.
+#
+def write_text_atomic(filename, text):
+    temp_filename = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_filename, "w") as file:
+        file.write(text)
+    os.replace(temp_filename, filename)
 
-    luminosity_classesX = {
-        "I": "I",
-        "II": "II",
-        "III": "III",
-        "IV": "IV",
-        "V": "V",
-        "VI": "VI",
-        "VII": "VII",
-    }
-    luminosity_classes = {
-        "I": "Supergiant",
-        "II": "Bright Giant",
-        "III": "Giant",
-        "IV": "Sub-giant",
-        "V": "Main Sequence",
-        "VI": "Sub-dwarf",
-        "VII": "White-dwarf",
-    }
 
-    if not spt:
-        return {
-            "type": "-",
-            "color": "-",
-            "temperature": "-",
-            "size": "-",
-            "color_code": "gray",
-        }
-
-    match = re.match(r"([OBAFGKM])(\d)?([IV]+)?", spt)
-    if not match:
-        return {
-            "type": "-",
-            "color": "-",
-            "temperature": "-",
-            "size": "-",
-            "color_code": "gray",
-        }
-
-    spectral_class = match.group(1)
-    subclass = int(match.group(2)) if match.group(2) else 5
-    lum_class_raw = match.group(3) or "V"
-
-    # Get color and base temp
-    color, base_temp, color_code = spectral_classes.get(
-        spectral_class, ("Unknown", 0, "gray")
-    )
-    # Adjust temp slightly by subclass (lower subclass = hotter)
-    temp = int(base_temp - (subclass * (base_temp * 0.05)))
+#
+# Hand the panel output over before slow background work: flush stdout and
+# point it at /dev/null, so conky's execpi sees end of file and renders while
+# the process keeps running.
+#
+def detach_stdout():
+    sys.stdout.flush()
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+    os.close(devnull)
+
+
+#
+# Identifier of the current boot, changes on every reboot.
+#
+def get_boot_id():
+    try:
+        with open(FILE_BOOT_ID, "r") as file:
+            return file.read().strip()
+    except OSError:
+        return ""
+
+
+#
+#
+#
+def save_json_atomic(filename, data, indent=None):
+    write_text_atomic(filename, json.dumps(data, indent=indent))
+
+
+#
+# Observer sites from FILE_OBSERVER_SITES, only those in `names` when given, as
+# dicts with "name", "latitude", "longitude", "height_m" and the "cache_dir"
+# their generated caches go to. The default site keeps the top-level cache.
+#
+def load_observer_sites(names=None):
+    data = load_json(FILE_OBSERVER_SITES)
+    sites = []
+    for site in data["sites"]:
+        if names and site["name"] not in names:
+            continue
+        cache_dir = CONKY_ASTRO_CACHE
+        if site["name"] != data["default"]:
+            cache_dir = os.path.join(CONKY_ASTRO_SITES, site["name"])
+        sites.append(dict(site, cache_dir=cache_dir))
 
-    # Map luminosity class
-    size = luminosity_classes.get(lum_class_raw, "Unknown")
+    unknown = set(names or ()) - {site["name"] for site in sites}
+    if unknown:
+        raise ValueError(f"Unknown observer sites: {', '.join(sorted(unknown))}")
+    return sites
 
+
+#
+# A site's copy of a per-site cache file (one of the FILE_* caches above).
+#
+def get_site_file(filename, site):
+    return os.path.join(site["cache_dir"], os.path.basename(filename))
+
+
+#
+# Cache location metadata of a site.
+#
+def get_site_location(site):
     return {
-        "type": spectral_class,
-        "color": color,
-        "temperature": temp,
-        "size": size,
-        "color_code": color_code,
+        "latitude": site["latitude"],
+        "longitude": site["longitude"],
+        "height_m": site["height_m"],
     }
 
 
-def classify_luminosity_class(spectral):
-    if not spectral:
-        return "?"
-    if "Ia" in spectral or "Ib" in spectral:
-        return "🌟"  # Supergiant
-    elif "III" in spectral:
-        return "🌕"  # Giant
-    elif "IV" in spectral:
-        return "🌓"  # Subgiant
-    elif "V" in spectral:
-        return "☀️"  # Main sequence
-    elif "D" in spectral:
-        return "⚪"  # White dwarf
-    return "?"
-
-
-def classify_temp_color(temp_k):
-    if temp_k is None:
-        return ("?", "?")
-    t = float(temp_k)
-    if t >= 30000:
-        return ("Blue", "🔵")
-    elif t >= 10000:
-        return ("Blue-white", "🔹")
-    elif t >= 7500:
-        return ("White", "⚪")
-    elif t >= 6000:
-        return ("Yellow-white", "🟡")
-    elif t >= 5000:
-        return ("Yellow", "🟨")
-    elif t >= 3500:
-        return ("Orange", "🟧")
-    else:
-        return ("Red", "🔴")
+#
+# Generated caches (solar system, stars, exoplanets) keep their schema version
+# and observer location under this key, next to the per-date/per-object entries.
+#
+CACHE_META_KEY = "_meta"
+
+
+def get_cache_entries(data):
+    return {key: value for key, value in data.items() if key != CACHE_META_KEY}
+
+
+#
+# Entries of a generated cache, or {} when it is missing, unreadable or was
+# built for a different schema or location.
+#
+def load_cache(filename, meta):
+    try:
+        data = load_json(filename)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if data.get(CACHE_META_KEY) != meta:
+        return {}
+    return get_cache_entries(data)
+
+
+#
+#
+#
+def save_cache(filename, meta, entries):
+    data = {CACHE_META_KEY: meta}
+    data.update(entries)
+    save_json_atomic(filename, data, indent=2)
+
+
+#
+# Solar-system data for one date (a dict shaped like a JSON cache entry), or
+# None when the date is not cached. Reads the single record from the binary
+# store and falls back to the JSON export when no store has been written or it
+# was written in an older format.
+#
+def load_solar_system_day(day):
+    if os.path.exists(FILE_SOLAR_SYSTEM_STORE):
+        solarstore = importlib.import_module("solarstore")
+        try:
+            return solarstore.read_day(FILE_SOLAR_SYSTEM_STORE, day)
+        except ValueError:
+            pass
+    data = load_json_cached(FILE_SOLAR_SYSTEM_DATA)
+    return data.get(day.isoformat())
+
+
+#
+# Observer location ({"latitude", "longitude"}) of the solar-system cache,
+# None when it is not recorded.
+#
+def load_solar_system_location():
+    if os.path.exists(FILE_SOLAR_SYSTEM_STORE):
+        solarstore = importlib.import_module("solarstore")
+        try:
+            return solarstore.read_location(FILE_SOLAR_SYSTEM_STORE)
+        except ValueError:
+            pass
+    data = load_json_cached(FILE_SOLAR_SYSTEM_DATA)
+    return data.get(CACHE_META_KEY, {}).get("location")
+
+
+#
+# Astronomy helpers live in astro.py. Resolve them on first use so panels that
+# never touch them do not pay for loading that module.
+#
+ASTRO_HELPERS = {
+    "parse_spectral_type",
+    "classify_luminosity_class",
+    "classify_temp_color",
+    "azimuth_direction",
+    "altitude_description",
+    "location_description",
+}
+
+
+def __getattr__(name):
+    if name in ASTRO_HELPERS:
+        return getattr(importlib.import_module("astro"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 #
@@ -269,54 +402,12 @@ def initial_bearing(lat1, lon1, lat2, lon2):
 
 
 #
+# Format a bytes-per-second rate, dashes when it is not known yet.
 #
-#
-def azimuth_direction(az_deg):
-    """Convert azimuth degrees to compass direction."""
-    directions = [
-        "N",
-        "NNE",
-        "NE",
-        "ENE",
-        "E",
-        "ESE",
-        "SE",
-        "SSE",
-        "S",
-        "SSW",
-        "SW",
-        "WSW",
-        "W",
-        "WNW",
-        "NW",
-        "NNW",
-    ]
-    index = int((az_deg + 11.25) % 360 // 22.5)
-    return directions[index]
-
-
-#
-#
-#
-def altitude_description(alt_deg):
-    """Categorize altitude angle into visibility height."""
-    if alt_deg < 0:
-        return "Below"
-    elif alt_deg < 20:
-        return "Low"
-    elif alt_deg < 50:
-        return "Mid"
-    else:
-        return "High"
-
-
-#
-#
-#
-def location_description(az, alt):
-    direction = azimuth_direction(az)
-    height = altitude_description(alt)
-    return f"{height:<5}, {direction:>3}"
+def format_rate(bytes_per_second, divisor=1024, unit="KB/s", width=8):
+    if bytes_per_second is None:
+        return f"{'---':>{width}} {unit}"
+    return f"{bytes_per_second / divisor:{width},.1f} {unit}"
 
 
 #
@@ -351,6 +442,19 @@ def dew_point_celsius(temp_celsius, humidity_percent):
     return dew_point
 
 
+#
+# Relative humidity from the temperature and dew point (inverse of
+# dew_point_celsius).
+#
+def relative_humidity_percent(temp_celsius, dew_point_celsius):
+    a = 17.62
+    b = 243.12
+    return 100.0 * math.exp(
+        (a * dew_point_celsius) / (b + dew_point_celsius)
+        - (a * temp_celsius) / (b + temp_celsius)
+    )
+
+
 #
 #
 #
@@ -358,6 +462,20 @@ def hectopascals_to_inches_of_mercury(hectopascals):
     return hectopascals * 0.02953
 
 
+#
+#
+#
+def inches_of_mercury_to_hectopascals(inches_of_mercury):
+    return inches_of_mercury / 0.02953
+
+
+#
+#
+#
+def knots_to_meters_per_second(knots):
+    return knots * 0.514444
+
+
 #
 #
 #
@@ -379,6 +497,13 @@ def meters_to_miles(meters):
     return meters / 1609.344
 
 
+#
+#
+#
+def miles_to_meters(miles):
+    return miles * 1609.344
+
+
 #
 #
 #
@@ -1,40 +1,39 @@
 #!/usr/bin/env python3
 
 import os
-import json
 from datetime import date
 import striker
 import exception
 
 
 #
-# Display today's sun and moon data from the precomputed JSON file.
-# The data is assumed to be generated by another script and stored in striker.FILE_SOLAR_SYSTEM_DATA.
+# Display today's sun and moon data from the precomputed solar-system cache.
+# The data is generated by get-astro-data.py; striker reads today's record from
+# striker.FILE_SOLAR_SYSTEM_STORE, or from the JSON export when there is no store.
 #
 def get_sun_and_moon():
     # Get today's date in ISO format (YYYY-MM-DD)
     today = date.today()
     date_str = today.isoformat()
 
-    # Ensure solar system data file exists
-    if not os.path.exists(striker.FILE_SOLAR_SYSTEM_DATA):
+    # Ensure solar system data exists
+    if not os.path.exists(striker.FILE_SOLAR_SYSTEM_STORE) and not os.path.exists(
+        striker.FILE_SOLAR_SYSTEM_DATA
+    ):
         print(
             f"${{goto 20}}${{alignc}}${{font4}}${{color red}}No astronomy data: {striker.FILE_SOLAR_SYSTEM_DATA}"
         )
         return
 
-    # Load JSON data from file
+    # Load today's astronomy data
     try:
-        with open(striker.FILE_SOLAR_SYSTEM_DATA, "r") as f:
-            data = json.load(f)
-    except json.JSONDecodeError:
+        today_data = striker.load_solar_system_day(today)
+    except ValueError:
         print(
-            f"${{goto 20}}${{alignc}}${{font4}}${{color red}}Invalid JSON: {striker.FILE_SOLAR_SYSTEM_DATA}"
+            f"${{goto 20}}${{alignc}}${{font4}}${{color red}}Invalid astronomy data: {striker.FILE_SOLAR_SYSTEM_DATA}"
         )
         return
 
-    # Get today's astronomy data
-    today_data = data.get(date_str)
     if not today_data:
         print(f"${{goto 20}}${{alignc}}${{font4}}${{color red}}No entry for {date_str}")
         return
@@ -68,8 +67,15 @@ def get_sun_and_moon():
 #
 # Main execution
 #
-if __name__ == "__main__":
+def main():
     try:
         get_sun_and_moon()
     except exception.StrikerException as e:
         print(exception.StrikerException.get_message(e))
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
@@ -25,7 +25,7 @@ def get_system():
 #
 # Main Execution
 #
-if __name__ == "__main__":
+def main():
     # Print section header with hostname
     print(striker.get_section_title("System", "${nodename}"))
 
@@ -34,3 +34,10 @@ if __name__ == "__main__":
         print(get_system())
     except exception.StrikerException as e:
         print(exception.StrikerException.get_message(e))
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
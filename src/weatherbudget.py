@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Call budget of the weather API key, persisted in CONKY_ASTRO_CACHE so every
+panel process shares it.
+
+Calls are counted per minute and per calendar month (UTC) against
+CONKY_WEATHER_CALLS_PER_MINUTE and CONKY_WEATHER_CALLS_PER_MONTH. Each call is
+reserved with a priority: home airports may use the whole budget, the rotating
+airports on screen all but the last 10%, and background refreshes and
+prefetches all but the last 25%, as long as the month is on pace. When the
+budget runs low the lower priorities are refused first and the panel keeps
+showing cached weather.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import striker
+
+HOME = 0
+ROTATING = 1
+BACKGROUND = 2
+
+# Share of the per-minute and per-month budgets each priority may use
+PRIORITY_SHARE = {HOME: 1.0, ROTATING: 0.9, BACKGROUND: 0.75}
+
+# Projections need at least this much of the month behind them
+MIN_PROJECTION_SECONDS = 3600
+
+# Reservations from the threads of one process
+_lock = threading.Lock()
+
+
+#
+#
+#
+def get_budget_file():
+    return os.path.join(striker.CONKY_ASTRO_CACHE, "weather-budget.json")
+
+
+#
+# Start and end of the calendar month (UTC) of `now`, as epoch seconds.
+#
+def get_month_bounds(now):
+    start = datetime.fromtimestamp(now, timezone.utc).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start.timestamp(), end.timestamp()
+
+
+#
+# Counters of the minute and month of `now`, reset when either has rolled over.
+#
+def load_counters(now):
+    try:
+        counters = striker.load_json(get_budget_file())
+    except (FileNotFoundError, ValueError):
+        counters = {}
+
+    minute = int(now // 60)
+    if counters.get("minute") != minute:
+        counters.update(minute=minute, minute_calls=0)
+    month_start, _ = get_month_bounds(now)
+    if counters.get("month_start") != month_start:
+        counters.update(month_start=month_start, month_calls=0, month_denied=0)
+    return counters
+
+
+#
+# Whether one more call of `priority` fits in the budget. Background calls also
+# keep to the month's pace, with a day's worth of calls in hand.
+#
+def is_allowed(counters, priority, now):
+    share = PRIORITY_SHARE[priority]
+    if counters["minute_calls"] + 1 > share * striker.CONKY_WEATHER_CALLS_PER_MINUTE:
+        return False
+    if counters["month_calls"] + 1 > share * striker.CONKY_WEATHER_CALLS_PER_MONTH:
+        return False
+    if priority == BACKGROUND:
+        start, end = get_month_bounds(now)
+        per_second = striker.CONKY_WEATHER_CALLS_PER_MONTH / (end - start)
+        pace = per_second * (now - start + 86400)
+        return counters["month_calls"] + 1 <= pace
+    return True
+
+
+#
+# Reserve one call per priority in `priorities`, highest priority first. Returns
+# whether each call was granted, in the same order; granted calls are counted
+# whether or not they succeed.
+#
+def reserve(priorities, now=None):
+    now = time.time() if now is None else now
+    granted = [False] * len(priorities)
+    with _lock:
+        counters = load_counters(now)
+        for i in sorted(range(len(priorities)), key=lambda i: priorities[i]):
+            granted[i] = is_allowed(counters, priorities[i], now)
+            if granted[i]:
+                counters["minute_calls"] += 1
+                counters["month_calls"] += 1
+            else:
+                counters["month_denied"] += 1
+        if priorities:
+            striker.save_json_atomic(get_budget_file(), counters)
+    return granted
+
+
+#
+# Calls this minute and month, calls refused this month, and the calls projected
+# for the whole month at the current rate (None early in the month).
+#
+def get_usage(now=None):
+    now = time.time() if now is None else now
+    counters = load_counters(now)
+    start, end = get_month_bounds(now)
+    projected = None
+    if now - start >= MIN_PROJECTION_SECONDS:
+        projected = round(counters["month_calls"] * (end - start) / (now - start))
+    return {
+        "minute_calls": counters["minute_calls"],
+        "month_calls": counters["month_calls"],
+        "month_denied": counters["month_denied"],
+        "projected": projected,
+    }
+
+
+#
+# Print the usage against the budget.
+#
+def main():
+    usage = get_usage()
+    per_month = striker.CONKY_WEATHER_CALLS_PER_MONTH
+    print(
+        f"minute     {usage['minute_calls']:>9} / "
+        f"{striker.CONKY_WEATHER_CALLS_PER_MINUTE} calls"
+    )
+    print(
+        f"month      {usage['month_calls']:>9} / {per_month} calls "
+        f"({usage['month_calls'] / per_month:.1%}), {usage['month_denied']} refused"
+    )
+    if usage["projected"] is None:
+        print("projected          - (too early in the month)")
+    else:
+        print(
+            f"projected  {usage['projected']:>9} calls this month "
+            f"({usage['projected'] / per_month:.1%})"
+        )
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()
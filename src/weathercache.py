@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Disk cache of raw weather API replies, one JSON file per airport and
+coordinates in CONKY_ASTRO_WEATHER.
+
+Each entry keeps the payload, the time it was fetched and the observation time
+(`dt`) the API reported. An entry is fresh for CONKY_WEATHER_TTL seconds; after
+that it is stale and may still be served while the caller refreshes it, up to
+CONKY_WEATHER_MAX_STALE seconds. evict() removes entries older than
+MAX_AGE_SECONDS and then the oldest ones until the cache fits in MAX_BYTES.
+"""
+
+import os
+import time
+import striker
+
+FRESH = "fresh"
+STALE = "stale"
+MISSING = "missing"
+
+# Entries are deleted after a day, and the cache is kept under 1 MiB
+MAX_AGE_SECONDS = 24 * 3600
+MAX_BYTES = 1024 * 1024
+
+
+#
+# Cache key of an airport at given coordinates, so moving an airport in
+# airport-data.json never serves the weather of its old position.
+#
+def get_key(code, latitude, longitude):
+    return f"{code}_{latitude:.4f}_{longitude:.4f}"
+
+
+#
+#
+#
+def get_entry_file(key):
+    return os.path.join(striker.CONKY_ASTRO_WEATHER, f"{key}.json")
+
+
+#
+# Last entry stored for a key whatever its age, None when there is none.
+#
+def load_last(key):
+    try:
+        entry = striker.load_json(get_entry_file(key))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(entry, dict) or not isinstance(
+        entry.get("fetched_at"), (int, float)
+    ):
+        return None
+    return entry
+
+
+#
+# (state, entry) of a key: FRESH or STALE with the cached entry, or MISSING
+# with None when there is no usable entry.
+#
+def load(key, now=None):
+    now = time.time() if now is None else now
+    entry = load_last(key)
+    if entry is None:
+        return MISSING, None
+    age = now - entry["fetched_at"]
+    if age < striker.CONKY_WEATHER_TTL:
+        return FRESH, entry
+    if age < striker.CONKY_WEATHER_MAX_STALE:
+        return STALE, entry
+    return MISSING, None
+
+
+#
+# Store a payload fetched at `now`.
+#
+def store(key, payload, now=None):
+    os.makedirs(striker.CONKY_ASTRO_WEATHER, exist_ok=True)
+    striker.save_json_atomic(
+        get_entry_file(key),
+        {
+            "fetched_at": time.time() if now is None else now,
+            "dt": payload.get("dt"),
+            "payload": payload,
+        },
+    )
+
+
+#
+# Delete entries older than `max_age` seconds (by modification time), then the
+# oldest remaining ones while the cache is larger than `max_bytes`. Returns the
+# number of files removed.
+#
+def evict(now=None, max_age=MAX_AGE_SECONDS, max_bytes=MAX_BYTES):
+    now = time.time() if now is None else now
+    try:
+        names = os.listdir(striker.CONKY_ASTRO_WEATHER)
+    except FileNotFoundError:
+        return 0
+
+    entries = []
+    for name in names:
+        filename = os.path.join(striker.CONKY_ASTRO_WEATHER, name)
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, filename))
+    entries.sort()
+
+    removed = 0
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, filename in entries:
+        if now - mtime <= max_age and total <= max_bytes:
+            break
+        try:
+            os.remove(filename)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        total -= size
+    return removed
+
+
+#
+# Print the cached entries and their state.
+#
+def main():
+    now = time.time()
+    try:
+        names = sorted(os.listdir(striker.CONKY_ASTRO_WEATHER))
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        key = name[: -len(".json")]
+        state, entry = load(key, now)
+        age = f"{now - entry['fetched_at']:.0f}s" if entry else "-"
+        print(f"{key:<32} {state:<8} {age:>8}")
+    print(f"{len(names)} entries in {striker.CONKY_ASTRO_WEATHER}")
+
+
+#
+#
+#
+if __name__ == "__main__":
+    main()